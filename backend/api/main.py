@@ -1,14 +1,31 @@
+import asyncio
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 
 from ..api.routes import router
 from ..db.init_db import init_db
+from ..utils.embedder import warm_up
+from ..vectorstore.factory import close_vector_stores
+from ..llm.ollama_client import get_ollama_client
+from ..jobs.queue import ingest_queue
+from ..jobs.embedding_indexer import embedding_indexer
+from ..upload.whisper_transcriber import shutdown_pool as shutdown_whisper_pool
+from ..upload.ocr_reader import shutdown_pool as shutdown_ocr_pool
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    await asyncio.to_thread(warm_up)
+    await embedding_indexer.start()
+    await ingest_queue.start()
     yield
+    await ingest_queue.stop()
+    await embedding_indexer.stop()
+    await close_vector_stores()
+    await get_ollama_client().aclose()
+    shutdown_whisper_pool()
+    shutdown_ocr_pool()
 
 app = FastAPI(title="DreamWeaver AI", lifespan=lifespan)
 
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
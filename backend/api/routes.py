@@ -1,26 +1,41 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
+import asyncio
+import json
+import uuid
+import asyncio
 from pathlib import Path
-import shutil
+import hashlib
 import traceback
 from fastapi import Query
 from typing import List, Optional, Set, Dict
-from collections import Counter, defaultdict
 import re
 from sqlalchemy.orm import Session
 from fastapi import Depends
-from datetime import datetime
+from datetime import datetime, date
 from fastapi import Query
 from pydantic import BaseModel
 from sqlalchemy import text
 from ..db.database import engine
 from ..db.models import Base
-from ..utils.embedder import Embedder
-from ..vectorstore.qdrant_client import QdrantVectorStore
-from ..llm.ollama_client import generate_response as local_llm
+from ..utils.model_registry import model_status
+from ..llm.cache import llm_cache
+from ..utils.query_cache import query_embedding_cache
+from ..vectorstore.factory import get_vector_store, VECTOR_BACKEND
+from ..llm.ollama_client import generate_response as local_llm, agenerate_response, stream_response
+from .streaming import sse_response, single_token
 from ..db.models import JournalEntry
-from ..upload.processor import import_file
-from ..db.database import SessionLocal
-from ..db.crud import get_all_entries_grouped_by_date, get_entry_by_id
+from ..jobs.queue import ingest_queue, QueueFullError
+from ..jobs.embedding_indexer import embedding_indexer
+from ..db.database import get_db
+from ..db.fts import create_fts_index, drop_fts_index
+from ..search.hybrid import hybrid_search
+from ..search.context import build_context
+from ..search.filters import SearchFilters, resolve_filters
+from ..db.crud import (
+    get_entries_page, get_entry_by_id, get_job, get_insight_counts,
+    list_tag_names, filter_entries_by_tags, set_entry_tags,
+    find_duplicate, get_uploaded_file, record_uploaded_file
+)
 
 router = APIRouter()
 
@@ -28,51 +43,106 @@ UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
 @router.post("/upload/")
-async def upload_journal(file: UploadFile = File(...)):
-    """Upload a journal file (txt, json, audio, image)."""
+def upload_journal(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Upload a journal file (txt, json, audio, image) and queue it for import.
+
+    Plain def: saving the file, hashing it and the SQLite lookups all block,
+    so FastAPI runs this in its threadpool instead of on the event loop.
+    """
     if not file.filename:
         raise HTTPException(status_code=400, detail="Uploaded file must have a filename.")
 
     filename = file.filename
     ext = Path(filename).suffix.lower()
-    temp_path = UPLOAD_DIR / filename
+    # Unique name so queued jobs never see their file overwritten by a later upload
+    temp_path = UPLOAD_DIR / f"{uuid.uuid4().hex[:8]}_{Path(filename).name}"
 
-    SUPPORTED_EXTS = [".txt", ".json", ".mp3", ".wav", ".m4a", ".jpg", ".jpeg", ".png"]
+    SUPPORTED_EXTS = [".txt", ".json", ".mp3", ".wav", ".m4a", ".jpg", ".jpeg", ".png", ".zip"]
     if ext not in SUPPORTED_EXTS:
         raise HTTPException(status_code=400, detail=f"Unsupported file type: {ext}")
 
+    # Hash the bytes while saving them so a re-upload can be recognized
+    digest = hashlib.sha256()
     try:
         with open(temp_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+            for chunk in iter(lambda: file.file.read(1024 * 1024), b""):
+                digest.update(chunk)
+                f.write(chunk)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save uploaded file: {str(e)}")
 
-    try:
-        await import_file(str(temp_path))
+    file_hash = digest.hexdigest()
+    previous = get_uploaded_file(db, file_hash)
+    previous_job = get_job(db, previous.job_id) if previous and previous.job_id else None
+    if previous_job and previous_job.status != "failed":
+        temp_path.unlink(missing_ok=True)
         return {
-            "message": f"File '{filename}' (type: {ext}) imported successfully.",
+            "message": f"File '{filename}' was already uploaded as '{previous.filename}'; nothing to import.",
             "filename": filename,
-            "type": ext
+            "type": ext,
+            "job_id": previous_job.id,
+            "duplicate": True
         }
+
+    try:
+        job_id = ingest_queue.submit(filename, str(temp_path))
+        record_uploaded_file(db, file_hash, filename, job_id)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue import: {str(e)}")
+
+    return {
+        "message": f"File '{filename}' (type: {ext}) queued for import.",
+        "filename": filename,
+        "type": ext,
+        "job_id": job_id,
+        "duplicate": False
+    }
+
+
+@router.get("/jobs/{job_id}")
+def get_job_status(job_id: str, db: Session = Depends(get_db)):
+    """Progress of a queued upload: status, current stage and entries done / total."""
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job.id,
+        "filename": job.filename,
+        "status": job.status,
+        "stage": job.stage,
+        "entries_done": job.entries_done,
+        "entries_total": job.entries_total,
+        "stats": json.loads(job.stats) if job.stats else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
 
 
 # ===== MODELS =====
 
 class QueryRequest(BaseModel):
     question: str
+    # Optional restrictions; without a date range, phrases like "last month" in the question set one
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    moods: List[str] = []
+    tags: List[str] = []
+    sources: List[str] = []
+    no_cache: bool = False  # ask Ollama again instead of replaying a cached answer
+
+    def filters(self) -> SearchFilters:
+        return SearchFilters(
+            date_from=self.date_from, date_to=self.date_to,
+            moods=self.moods, tags=self.tags, sources=self.sources
+        )
 
 class ReflectionRequest(BaseModel):
     entry_id: int
+    no_cache: bool = False  # ask Ollama again instead of replaying a cached answer
 
 class CreateEntryRequest(BaseModel):
     text: str
@@ -98,6 +168,16 @@ def create_entry(entry: CreateEntryRequest, db: Session = Depends(get_db)):
         except ValueError:
             return {"success": False, "message": "Invalid date format. Use YYYY-MM-DD."}
 
+        # Duplicate check ((date, content-hash) index) before spending an LLM call on tags
+        existing = find_duplicate(db, entry.text, parsed_date)
+
+        if existing:
+            return {
+                "success": False,
+                "message": f"Duplicate entry already exists for {existing.date.isoformat()}.",
+                "entry_id": existing.id
+            }
+
         if not entry.tags or not entry.tags.strip():
             llm_prompt = f"""Extract up to 7 relevant tags that best describe the following journal entry. 
             Respond only with a comma-separated list of tags. Do not include any extra explanation or introductory text.
@@ -112,19 +192,6 @@ def create_entry(entry: CreateEntryRequest, db: Session = Depends(get_db)):
             auto_tags = entry.tags
         
         mood = entry.mood_label or "reflective"
-        
-        # Duplicate check
-        existing = db.query(JournalEntry).filter(
-            JournalEntry.text == entry.text.strip(),
-            JournalEntry.date == parsed_date
-        ).first()
-
-        if existing:
-            return {
-                "success": False,
-                "message": f"Duplicate entry already exists for {entry.date}.",
-                "entry_id": existing.id
-            }
 
         # Save if unique
         new_entry = JournalEntry(
@@ -136,9 +203,12 @@ def create_entry(entry: CreateEntryRequest, db: Session = Depends(get_db)):
         )
 
 
+        set_entry_tags(db, new_entry, auto_tags)
+
         db.add(new_entry)
         db.commit()
         db.refresh(new_entry)
+        embedding_indexer.notify()  # the commit queued it in embedding_outbox
 
         return {
             "success": True,
@@ -151,38 +221,75 @@ def create_entry(entry: CreateEntryRequest, db: Session = Depends(get_db)):
     except Exception as e:
         return {"success": False, "message": f"Failed to create entry: {str(e)}"}
 
-# ===== LIST ALL ENTRIES =====
+# ===== LIST ENTRIES =====
+
+def entry_to_dict(entry: JournalEntry) -> Dict:
+    return {
+        "id": entry.id,
+        "date": entry.date.isoformat(),
+        "text": entry.text,
+        "source_type": entry.source_type,
+        "tags": entry.tags,
+        "mood_label": entry.mood_label,
+        "word_count": entry.word_count
+    }
+
+
 @router.get("/entries/")
-def list_entries():
-    """List all journal entries grouped by date."""
-    db = SessionLocal()
-    grouped = get_all_entries_grouped_by_date(db)
-    return grouped
+def list_entries(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    on_date: Optional[date] = Query(None, alias="date", description="Only entries for this day"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    fields: str = Query("full", pattern="^(full|summary)$", description="'summary' returns id/date/preview only"),
+    db: Session = Depends(get_db),
+):
+    """Page through journal entries ordered by (date, id)."""
+    if on_date:
+        date_from = date_to = on_date
+
+    try:
+        rows, next_cursor = get_entries_page(
+            db,
+            limit=limit,
+            cursor=cursor,
+            date_from=date_from,
+            date_to=date_to,
+            descending=(order == "desc"),
+            summary=(fields == "summary"),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if fields == "summary":
+        entries = [{"id": row.id, "date": row.date.isoformat(), "preview": row.preview} for row in rows]
+    else:
+        entries = [entry_to_dict(row) for row in rows]
+
+    return {"entries": entries, "next_cursor": next_cursor}
 
 
 # ===== GET SINGLE ENTRY =====
 
 @router.get("/entry/{entry_id}")
-def get_entry(entry_id: int):
+def get_entry(entry_id: int, db: Session = Depends(get_db)):
     """Get a specific journal entry by ID."""
-    db = SessionLocal()
     entry = get_entry_by_id(db, entry_id)
     if not entry:
         raise HTTPException(status_code=404, detail="Entry not found")
-    return entry
+    return entry_to_dict(entry)
 
 
 # ===== REFLECTION USING LLM =====
 
-@router.post("/reflect/")
-def reflect_on_entry(payload: ReflectionRequest):
-    """Get reflection on a specific journal entry."""
-    db = SessionLocal()
-    entry: JournalEntry = get_entry_by_id(db, payload.entry_id)
+def build_reflection_prompt(db: Session, entry_id: int) -> str:
+    entry: JournalEntry = get_entry_by_id(db, entry_id)
     if not entry:
         raise HTTPException(status_code=404, detail="Entry not found")
 
-    prompt = f"""You are a reflective journaling assistant.
+    return f"""You are a reflective journaling assistant.
 Read the following journal entry and respond with a short reflection.
 
 Journal Entry:
@@ -190,87 +297,136 @@ Journal Entry:
 
 Reflection:"""
 
+
+@router.post("/reflect/")
+async def reflect_on_entry(payload: ReflectionRequest, db: Session = Depends(get_db)):
+    """Get reflection on a specific journal entry."""
+    # The entry lookup is a blocking SQLite read; keep it off the event loop
+    prompt = await asyncio.to_thread(build_reflection_prompt, db, payload.entry_id)
+
     try:
-        response = local_llm(prompt)
+        response = await agenerate_response(prompt, use_cache=not payload.no_cache)
     except Exception:
         response = "Error occurred while processing the request."
 
     return {"reflection": response}
 
 
-# ===== QUERY WITH VECTOR SEARCH + LLM =====
+@router.post("/reflect/stream")
+async def reflect_on_entry_stream(payload: ReflectionRequest, db: Session = Depends(get_db)):
+    """Same as /reflect/, but streams tokens as server-sent events."""
+    prompt = await asyncio.to_thread(build_reflection_prompt, db, payload.entry_id)
+    return sse_response(stream_response(prompt, use_cache=not payload.no_cache))
+
+
+# ===== SEARCH (FULL-TEXT + VECTOR, NO LLM) =====
+
+@router.get("/search")
+async def search_entries(
+    q: str = Query(..., min_length=1, description="Free-text query"),
+    limit: int = Query(10, ge=1, le=100),
+    vector_weight: Optional[float] = Query(None, ge=0, description="Weight of semantic results; 0 disables them"),
+    lexical_weight: Optional[float] = Query(None, ge=0, description="Weight of keyword (BM25) results; 0 disables them"),
+    date_from: Optional[date] = Query(None, alias="from", description="First day to include (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Last day to include (YYYY-MM-DD)"),
+    mood: List[str] = Query([], description="Mood label(s); repeat for several"),
+    tag: List[str] = Query([], description="Tag(s); entries with any of them match"),
+    source: List[str] = Query([], description="Source type(s): text, audio, image"),
+    db: Session = Depends(get_db),
+):
+    """Rank entries for a query by fusing keyword and semantic search.
+
+    Without from/to, a time phrase in the query ("last month", "in March") sets the date range.
+    """
+    filters, query = resolve_filters(q, SearchFilters(
+        date_from=date_from, date_to=date_to, moods=mood, tags=tag, sources=source
+    ))
+    results = await hybrid_search(
+        db, query, top_k=limit, vector_weight=vector_weight, lexical_weight=lexical_weight, filters=filters
+    )
+    return {
+        "query": q,
+        "filters": filters.model_dump(),
+        "results": [
+            {
+                **entry_to_dict(result["entry"]),
+                "score": round(result["score"], 6),
+                "vector_rank": result["vector_rank"],
+                "lexical_rank": result["lexical_rank"],
+                "passage": result["passage"],
+            }
+            for result in results
+        ],
+    }
 
-@router.post("/ask/")
-def ask_question(payload: QueryRequest):
-    """Ask a question based on all journal entries."""
-    embedder = Embedder()
-    vector_store = QdrantVectorStore()
-    query_vector = embedder.embed(payload.question)
-    results = vector_store.search(query_vector)
 
-    context = "\n\n".join([
-    point.payload.get("text", "") 
-    for point in results 
-    if point.payload is not None and "text" in point.payload
-    ])
+# ===== QUERY WITH VECTOR SEARCH + LLM =====
+
+async def build_ask_prompt(db: Session, question: str, filters: Optional[SearchFilters] = None) -> Optional[str]:
+    """Retrieve context for the question; None when nothing relevant was found."""
+    filters, query = resolve_filters(question, filters)
+    context, _ = await build_context(db, query, filters)
 
     if not context:
-        return {"answer": "No relevant context found."}
+        return None
 
-    prompt = f"""You are an AI assistant helping the user reflect on their journal.
+    return f"""You are an AI assistant helping the user reflect on their journal.
 
-Based on the following past context, answer the question.
+Based on the following past journal excerpts, answer the question. Each excerpt
+starts with [Entry <id> | <date>]; cite the entries you draw on as (Entry <id>, <date>).
 
 Context:
 \"\"\"{context}\"\"\"
 
-Question: {payload.question}
+Question: {question}
 Answer:"""
 
+
+@router.post("/ask/")
+async def ask_question(payload: QueryRequest, db: Session = Depends(get_db)):
+    """Ask a question based on all journal entries."""
+    prompt = await build_ask_prompt(db, payload.question, payload.filters())
+    if prompt is None:
+        return {"answer": "No relevant context found."}
+
     try:
-        answer = local_llm(prompt)
+        answer = await agenerate_response(prompt, use_cache=not payload.no_cache)
     except Exception:
         answer = "Error occurred while processing the request."
 
     return {"answer": answer}
 
 
-@router.get("/tags", response_model=List[str])
-def list_all_tags():
-    """List all unique tags from journal entries."""
-    db = SessionLocal()
-    entries = db.query(JournalEntry).all()
+@router.post("/ask/stream")
+async def ask_question_stream(payload: QueryRequest, db: Session = Depends(get_db)):
+    """Same as /ask/, but streams tokens as server-sent events."""
+    prompt = await build_ask_prompt(db, payload.question, payload.filters())
+    if prompt is None:
+        return sse_response(single_token("No relevant context found."))
+    return sse_response(stream_response(prompt, use_cache=not payload.no_cache))
 
-    tag_set: Set[str] = set()
-    for entry in entries:
-        # if entry.tags:
-        if entry.tags is not None and entry.tags.strip():
-            tag_list = [tag.strip().lower() for tag in entry.tags.split(",")]
-            tag_set.update(tag_list)
 
-    return sorted(tag_set)
+@router.get("/tags", response_model=List[str])
+def list_all_tags(db: Session = Depends(get_db)):
+    """List all unique tags from journal entries."""
+    return list_tag_names(db)
 
 
 # ===== FILTER ENTRIES BY TAG =====
 
 @router.get("/filter")
-def filter_entries_by_tag(tag: str = Query(..., description="Tag to filter by")):
-    """Get all entries that include a specific tag."""
-    db = SessionLocal()
-    entries = db.query(JournalEntry).all()
-
-    matching_entries = []
-    for entry in entries:
-        # if entry.tags:
-        if entry.tags is not None and entry.tags.strip():
-            tag_list = [t.strip().lower() for t in entry.tags.split(",")]
-            if tag.lower() in tag_list:
-                matching_entries.append(entry)
+def filter_entries_by_tag(
+    tag: List[str] = Query(..., description="Tag(s) to filter by; repeat or comma-separate for several"),
+    mode: str = Query("any", pattern="^(any|all)$", description="'any' = OR, 'all' = AND"),
+    db: Session = Depends(get_db),
+):
+    """Get all entries that include the given tag(s)."""
+    matching_entries = filter_entries_by_tags(db, tag, match_all=(mode == "all"))
 
     if not matching_entries:
-        raise HTTPException(status_code=404, detail=f"No entries found with tag '{tag}'")
+        raise HTTPException(status_code=404, detail=f"No entries found with tag '{', '.join(tag)}'")
 
-    return matching_entries
+    return [entry_to_dict(entry) for entry in matching_entries]
 
 
 
@@ -278,27 +434,30 @@ def filter_entries_by_tag(tag: str = Query(..., description="Tag to filter by"))
 
 @router.post("/reset/")
 def reset_all():
-    """Reset SQLite and Qdrant (dangerous)."""
+    """Reset SQLite and the vector store (dangerous)."""
     
     # --- SQLite Reset (Safe, no file delete) ---
     try:
+        drop_fts_index(engine)
         Base.metadata.drop_all(bind=engine)
         Base.metadata.create_all(bind=engine)
+        create_fts_index(engine)
         print("SQLite tables dropped and recreated")
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"SQLite reset failed: {str(e)}")
 
-    # --- Qdrant Reset ---
+    # --- Vector store Reset ---
     try:
-        vector_store = QdrantVectorStore()
+        vector_store = get_vector_store()
         vector_store.reset()
-        print("Qdrant collection reset")
+        query_embedding_cache.clear()
+        print(f"Vector store reset ({VECTOR_BACKEND})")
     except Exception as e:
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Qdrant reset failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Vector store reset failed: {str(e)}")
 
-    return {"message": "All data reset (SQLite & Qdrant)."}
+    return {"message": f"All data reset (SQLite & {VECTOR_BACKEND})."}
 
 #Color map for mood labels
 MOOD_COLOR_MAP = {
@@ -316,65 +475,66 @@ MOOD_COLOR_MAP = {
 }
 
 @router.get("/insights/")
-def get_insights():
-    """Return analytics about journal entries."""
-    db: Session = SessionLocal()
-    entries: list[JournalEntry] = db.query(JournalEntry).all()
-    if not entries:
+def get_insights(
+    date_from: Optional[date] = Query(None, alias="from", description="First day to include (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Last day to include (YYYY-MM-DD)"),
+    db: Session = Depends(get_db),
+):
+    """Return analytics about journal entries, optionally within a date range."""
+    counts = get_insight_counts(db, date_from, date_to)
+    total_entries = counts["total_entries"]
+    if not total_entries:
         return {"message": "No journal entries found."}
 
-    daily_counts = defaultdict(int)
-    weekly_counts = defaultdict(int)
-    tag_counter = Counter()
-    mood_counter = Counter()
-    total_words = 0
-    total_entries = 0
-
-    for entry in entries:
-        total_entries += 1
-        entry_date = entry.date
-        date_str = entry_date.strftime("%Y-%m-%d")
-        week_str = entry_date.strftime("%Y-W%U")
-        daily_counts[date_str] += 1
-        weekly_counts[week_str] += 1
-
-        # Word count
-        text_value = str(entry.text or "")
-        words = re.findall(r"\w+", text_value)
-        total_words += len(words)
-
-        # Tags
-        tags_value = str(entry.tags or "")
-        tags = [t.strip().lower() for t in tags_value.split(",") if t.strip()]
-        tag_counter.update(tags)
-
-        # Mood label
-        mood = str(entry.mood_label or "").strip().lower()
-        if mood:
-            mood_counter.update([mood])
-        
-        # Group by day and week
-        date_str = entry.date.strftime("%Y-%m-%d")
-        daily_counts[date_str] += 1
-        iso_year, iso_week, _ = entry.date.isocalendar()
-        weekly_key = f"{iso_year}-W{iso_week:02d}"
-        weekly_counts[weekly_key] += 1
-
-    avg_word_count = total_words // total_entries if total_entries else 0
+    daily_counts = {entry_date.strftime("%Y-%m-%d"): count for entry_date, count in counts["daily"]}
+
+    avg_word_count = counts["total_words"] // total_entries
     mood_distribution = [
         {
             "mood": mood,
             "count": count,
             "color": MOOD_COLOR_MAP.get(mood, "#CCCCCC")
         }
-        for mood, count in mood_counter.most_common()
+        for mood, count in counts["moods"]
     ]
     return {
         "total_entries": total_entries,
         "average_word_count": avg_word_count,
-        "entries_per_day": dict(daily_counts),
-        "entries_per_week": dict(weekly_counts),
-        "top_tags": tag_counter.most_common(10),
+        "entries_per_day": daily_counts,
+        "entries_per_week": counts["weekly"],
+        "top_tags": counts["tags"][:10],
         "mood_distribution": mood_distribution,
-        "moods": mood_counter.most_common(10)
+        "moods": counts["moods"][:10]
     }
+
+
+# ===== STATUS =====
+
+@router.get("/status/models")
+def get_model_status():
+    """Report the shared embedding models: load time and memory."""
+    return model_status()
+
+
+@router.get("/status/llm_cache")
+def get_llm_cache_status():
+    """Report LLM response cache size and hit/miss counters."""
+    return llm_cache.stats()
+
+
+@router.get("/index/status")
+def get_index_status():
+    """How far the vector store lags behind SQLite: pending outbox rows and the age of the oldest."""
+    return embedding_indexer.status()
+
+
+@router.post("/index/retry")
+def retry_dead_index_rows():
+    """Requeue entries that hit INDEXER_MAX_ATTEMPTS (see `dead` in /index/status)."""
+    return {"requeued": embedding_indexer.requeue_dead()}
+
+
+@router.get("/status/query_cache")
+def get_query_cache_status():
+    """Report query embedding cache size and hit rate."""
+    return query_embedding_cache.stats()
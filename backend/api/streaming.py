@@ -0,0 +1,28 @@
+import json
+from typing import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+
+async def single_token(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+async def sse_events(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Frame tokens as SSE `data:` events, ending with a `done` (or `error`) event."""
+    try:
+        async for token in tokens:
+            yield f"data: {json.dumps({'token': token})}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps({'message': str(e)})}\n\n"
+        return
+    yield "event: done\ndata: {}\n\n"
+
+
+def sse_response(tokens: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        sse_events(tokens),
+        media_type="text/event-stream",
+        # Stop proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,8 +1,63 @@
 from sqlalchemy.orm import Session
 from datetime import datetime, date
-from typing import Optional, Union
-from .models import JournalEntry
-from sqlalchemy import func
+from typing import Any, Dict, List, Optional, Union
+from .models import JournalEntry, IngestJob, Tag, UploadedFile, EmbeddingOutbox, entry_tags, parse_tags
+from ..utils.hashing import content_hash
+from sqlalchemy import func, or_, select, tuple_
+import base64
+from collections import defaultdict
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+
+class DuplicateEntryError(ValueError):
+    def __init__(self, entry_id: int):
+        super().__init__(f"Duplicate of entry {entry_id}.")
+        self.entry_id = entry_id
+
+
+def find_duplicate(db: Session, text: str, entry_date: date) -> Optional[JournalEntry]:
+    """Existing entry with the same normalized text on the same day (unique-index lookup)."""
+    return (
+        db.query(JournalEntry)
+        .filter(JournalEntry.date == entry_date, JournalEntry.content_hash == content_hash(text))
+        .first()
+    )
+
+
+def find_duplicate_source(db: Session, raw_text: str) -> Optional[JournalEntry]:
+    """Entry already imported from this raw upload text (or whose text is exactly it)."""
+    raw_hash = content_hash(raw_text)
+    return (
+        db.query(JournalEntry)
+        .filter(or_(JournalEntry.source_hash == raw_hash, JournalEntry.content_hash == raw_hash))
+        .first()
+    )
+
+
+def record_source_hash(db: Session, entry: JournalEntry, raw_text: str) -> None:
+    """Remember that `raw_text` cleans to an existing entry, so re-uploading it skips the LLM."""
+    if not entry.source_hash:
+        entry.source_hash = content_hash(raw_text)
+        db.commit()
+
+
+def get_or_create_tags(db: Session, names: List[str]) -> Dict[str, Tag]:
+    """Map tag names to Tag rows, inserting the missing ones (safe under concurrent writers)."""
+    if not names:
+        return {}
+    db.execute(
+        sqlite_insert(Tag).values([{"name": name} for name in names]).on_conflict_do_nothing(index_elements=["name"])
+    )
+    return {tag.name: tag for tag in db.query(Tag).filter(Tag.name.in_(names)).all()}
+
+
+def set_entry_tags(db: Session, entry: JournalEntry, tags: Optional[str], tag_map: Optional[Dict[str, Tag]] = None):
+    """Point entry.tag_set at the tags named in the comma-separated string."""
+    names = parse_tags(tags)
+    if tag_map is None:
+        tag_map = get_or_create_tags(db, names)
+    entry.tag_set = [tag_map[name] for name in names]
+
 
 def add_entry(
     db: Session,
@@ -10,7 +65,8 @@ def add_entry(
     date: Optional[Union[str, date]] = None,
     source_type: str = "text",
     tags: Optional[str] = "",
-    mood_label: Optional[str] = ""
+    mood_label: Optional[str] = "",
+    source_hash: Optional[str] = None
 ):
     if not text or not text.strip():
         raise ValueError("Journal entry text cannot be empty.")
@@ -24,13 +80,19 @@ def add_entry(
     elif isinstance(date, str):
         date = datetime.strptime(date, "%Y-%m-%d").date()
 
+    existing = find_duplicate(db, text, date)
+    if existing:
+        raise DuplicateEntryError(existing.id)
+
     entry = JournalEntry(
         date=date,
         text=text,
         source_type=source_type,
         tags=tags or "",
-        mood_label=mood_label or ""
+        mood_label=mood_label or "",
+        source_hash=source_hash
     )
+    set_entry_tags(db, entry, entry.tags)
 
     db.add(entry)
     db.commit()
@@ -38,10 +100,121 @@ def add_entry(
     return entry
 
 
+def add_entries(db: Session, rows: List[Dict[str, Any]]) -> List[JournalEntry]:
+    """Insert many entries in a single transaction, skipping duplicates (same text on the same day).
+
+    rows: list of {'text', 'date', 'source_type'?, 'tags'?, 'mood_label'?, 'source_hash'?}
+    Returns only the entries that were actually inserted.
+    """
+    hashes = [content_hash(row.get("text") or "") for row in rows]
+    seen = {
+        (entry_date, h) for entry_date, h in
+        db.query(JournalEntry.date, JournalEntry.content_hash).filter(JournalEntry.content_hash.in_(hashes)).all()
+    }
+
+    entries = []
+    for row, row_hash in zip(rows, hashes):
+        text = row.get("text")
+        if not text or not text.strip():
+            raise ValueError("Journal entry text cannot be empty.")
+        entry_date = row.get("date") or datetime.today().date()
+        if isinstance(entry_date, str):
+            entry_date = datetime.strptime(entry_date, "%Y-%m-%d").date()
+        if (entry_date, row_hash) in seen:
+            continue
+        seen.add((entry_date, row_hash))
+
+        entries.append(JournalEntry(
+            date=entry_date,
+            text=text,
+            source_type=row.get("source_type") or "text",
+            tags=row.get("tags") or "",
+            mood_label=row.get("mood_label") or "",
+            source_hash=row.get("source_hash")
+        ))
+
+    if not entries:
+        return []
+
+    # One tag upsert for the whole batch
+    tag_map = get_or_create_tags(db, list({name for entry in entries for name in parse_tags(entry.tags)}))
+    for entry in entries:
+        set_entry_tags(db, entry, entry.tags, tag_map)
+
+    db.add_all(entries)
+    db.flush()
+    ids = [entry.id for entry in entries]
+    db.commit()
+    # Reload the expired rows with one SELECT rather than a refresh per entry
+    db.query(JournalEntry).filter(JournalEntry.id.in_(ids)).all()
+    return entries
+
+
 def get_all_entries_grouped_by_date(db: Session):
     return db.query(JournalEntry).order_by(JournalEntry.date.asc()).all()
 
 
+PREVIEW_CHARS = 120
+
+
+def encode_cursor(entry_date: date, entry_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{entry_date.isoformat()}|{entry_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor."""
+    try:
+        raw_date, raw_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.strptime(raw_date, "%Y-%m-%d").date(), int(raw_id)
+    except Exception:
+        raise ValueError("Invalid cursor.")
+
+
+def get_entries_page(
+    db: Session,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    descending: bool = False,
+    summary: bool = False,
+):
+    """One page of entries in (date, id) order using keyset pagination.
+
+    Returns (rows, next_cursor). With summary=True only id, date and a text
+    preview are read from the table. The (date, id) order is served by the
+    date index, since SQLite appends the rowid id to every index.
+    """
+    if summary:
+        query = db.query(
+            JournalEntry.id,
+            JournalEntry.date,
+            func.substr(JournalEntry.text, 1, PREVIEW_CHARS).label("preview"),
+        )
+    else:
+        query = db.query(JournalEntry)
+
+    query = _in_date_range(query, date_from, date_to)
+
+    key = tuple_(JournalEntry.date, JournalEntry.id)
+    if cursor:
+        after = tuple_(*decode_cursor(cursor))
+        query = query.filter(key < after if descending else key > after)
+
+    if descending:
+        query = query.order_by(JournalEntry.date.desc(), JournalEntry.id.desc())
+    else:
+        query = query.order_by(JournalEntry.date.asc(), JournalEntry.id.asc())
+
+    # Fetch one extra row to learn whether another page exists
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].date, rows[-1].id)
+    return rows, next_cursor
+
+
 def get_entry_by_id(db: Session, entry_id: int):
     return db.query(JournalEntry).filter(JournalEntry.id == entry_id).first()
 
@@ -49,3 +222,178 @@ def get_entry_by_id(db: Session, entry_id: int):
 def reset_database(db: Session):
     db.query(JournalEntry).delete()
     db.commit()
+
+
+# ===== TAGS =====
+
+def list_tag_names(db: Session) -> List[str]:
+    """Tags used by at least one entry, alphabetically."""
+    rows = (
+        db.query(Tag.name)
+        .join(entry_tags, entry_tags.c.tag_id == Tag.id)
+        .distinct()
+        .order_by(Tag.name)
+        .all()
+    )
+    return [name for (name,) in rows]
+
+
+def filter_entries_by_tags(db: Session, tags: List[str], match_all: bool = False) -> List[JournalEntry]:
+    """Entries carrying any (OR) or all (AND) of the given tags."""
+    names = parse_tags(",".join(tags))
+    if not names:
+        return []
+
+    matching_ids = (
+        select(entry_tags.c.entry_id)
+        .join(Tag, Tag.id == entry_tags.c.tag_id)
+        .where(Tag.name.in_(names))
+        .group_by(entry_tags.c.entry_id)
+    )
+    if match_all:
+        matching_ids = matching_ids.having(func.count(entry_tags.c.tag_id) == len(names))
+
+    return (
+        db.query(JournalEntry)
+        .filter(JournalEntry.id.in_(matching_ids))
+        .order_by(JournalEntry.date.asc(), JournalEntry.id.asc())
+        .all()
+    )
+
+
+# ===== INSIGHTS =====
+
+def _in_date_range(query, date_from: Optional[date] = None, date_to: Optional[date] = None):
+    if date_from:
+        query = query.filter(JournalEntry.date >= date_from)
+    if date_to:
+        query = query.filter(JournalEntry.date <= date_to)
+    return query
+
+
+def get_insight_counts(db: Session, date_from: Optional[date] = None, date_to: Optional[date] = None) -> Dict[str, Any]:
+    """Aggregate counts for /insights/ with GROUP BY queries instead of loading rows."""
+    total_entries, total_words = _in_date_range(
+        db.query(func.count(JournalEntry.id), func.coalesce(func.sum(JournalEntry.word_count), 0)),
+        date_from, date_to
+    ).one()
+
+    daily_rows = _in_date_range(
+        db.query(JournalEntry.date, func.count(JournalEntry.id)),
+        date_from, date_to
+    ).group_by(JournalEntry.date).order_by(JournalEntry.date).all()
+
+    mood = func.lower(func.trim(JournalEntry.mood_label))
+    mood_rows = _in_date_range(
+        db.query(mood, func.count(JournalEntry.id)),
+        date_from, date_to
+    ).filter(mood != "").group_by(mood).order_by(func.count(JournalEntry.id).desc()).all()
+
+    tag_rows = _in_date_range(
+        db.query(Tag.name, func.count(entry_tags.c.entry_id))
+        .join(entry_tags, entry_tags.c.tag_id == Tag.id)
+        .join(JournalEntry, JournalEntry.id == entry_tags.c.entry_id),
+        date_from, date_to
+    ).group_by(Tag.name).order_by(func.count(entry_tags.c.entry_id).desc()).all()
+
+    # ISO weeks, so the days around New Year land in the week they belong to ("2025-W01" starts 2024-12-30)
+    weekly = defaultdict(int)
+    for day, count in daily_rows:
+        iso_year, iso_week, _ = day.isocalendar()
+        weekly[f"{iso_year}-W{iso_week:02d}"] += count
+
+    return {
+        "total_entries": total_entries,
+        "total_words": total_words,
+        "daily": [(day, count) for day, count in daily_rows],
+        "weekly": dict(weekly),
+        "moods": [(label, count) for label, count in mood_rows],
+        "tags": [(name, count) for name, count in tag_rows],
+    }
+
+
+# ===== UPLOADED FILES =====
+
+def get_uploaded_file(db: Session, sha256: str) -> Optional[UploadedFile]:
+    return db.query(UploadedFile).filter(UploadedFile.sha256 == sha256).first()
+
+
+def record_uploaded_file(db: Session, sha256: str, filename: str, job_id: str) -> None:
+    db.merge(UploadedFile(sha256=sha256, filename=filename, job_id=job_id))
+    db.commit()
+
+
+# ===== INGEST JOBS =====
+
+def create_job(db: Session, job_id: str, filename: str, file_path: str) -> IngestJob:
+    job = IngestJob(id=job_id, filename=filename, file_path=file_path)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: str) -> Optional[IngestJob]:
+    return db.query(IngestJob).filter(IngestJob.id == job_id).first()
+
+
+def update_job(db: Session, job_id: str, **fields) -> None:
+    db.query(IngestJob).filter(IngestJob.id == job_id).update(fields)
+    db.commit()
+
+
+def get_unfinished_jobs(db: Session) -> List[IngestJob]:
+    return (
+        db.query(IngestJob)
+        .filter(IngestJob.status.in_(["queued", "running"]))
+        .order_by(IngestJob.created_at.asc())
+        .all()
+    )
+
+
+# ===== EMBEDDING OUTBOX =====
+
+def get_outbox_batch(db: Session, limit: int, max_attempts: int) -> List[EmbeddingOutbox]:
+    """Oldest rows first, skipping dead-lettered ones (attempts >= max_attempts)."""
+    return (
+        db.query(EmbeddingOutbox)
+        .filter(EmbeddingOutbox.attempts < max_attempts)
+        .order_by(EmbeddingOutbox.id.asc())
+        .limit(limit)
+        .all()
+    )
+
+
+def delete_outbox_rows(db: Session, ids: List[int]) -> None:
+    db.query(EmbeddingOutbox).filter(EmbeddingOutbox.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+def mark_outbox_failed(db: Session, ids: List[int], error: str, count_attempt: bool = True) -> None:
+    values = {EmbeddingOutbox.last_error: error}
+    if count_attempt:
+        values[EmbeddingOutbox.attempts] = EmbeddingOutbox.attempts + 1
+    db.query(EmbeddingOutbox).filter(EmbeddingOutbox.id.in_(ids)).update(values, synchronize_session=False)
+    db.commit()
+
+
+def requeue_dead_outbox_rows(db: Session, max_attempts: int) -> int:
+    """Give dead-lettered rows a fresh set of attempts; returns how many."""
+    count = (
+        db.query(EmbeddingOutbox)
+        .filter(EmbeddingOutbox.attempts >= max_attempts)
+        .update({EmbeddingOutbox.attempts: 0}, synchronize_session=False)
+    )
+    db.commit()
+    return count
+
+
+def get_outbox_counts(db: Session, max_attempts: int) -> Dict[str, Any]:
+    live = EmbeddingOutbox.attempts < max_attempts
+    pending, oldest, failing, dead = db.query(
+        func.count(EmbeddingOutbox.id).filter(live),
+        func.min(EmbeddingOutbox.created_at).filter(live),
+        func.count(EmbeddingOutbox.id).filter(live, EmbeddingOutbox.attempts > 0),
+        func.count(EmbeddingOutbox.id).filter(EmbeddingOutbox.attempts >= max_attempts),
+    ).one()
+    return {"pending": pending, "oldest_pending_at": oldest, "failing": failing, "dead": dead}
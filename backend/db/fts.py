@@ -0,0 +1,109 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..search.filters import SearchFilters
+
+# External-content FTS5 index over journal_entries.text; the triggers keep it
+# in step with every insert, update and delete, whichever code path makes them.
+FTS_TABLE = "journal_entries_fts"
+
+_CREATE_STATEMENTS = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text,
+        content='journal_entries',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS journal_entries_fts_ai AFTER INSERT ON journal_entries BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS journal_entries_fts_ad AFTER DELETE ON journal_entries BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS journal_entries_fts_au AFTER UPDATE OF text ON journal_entries BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+
+
+def create_fts_index(engine: Engine):
+    """Create the FTS table and triggers; a new table is filled from existing entries."""
+    is_new = not inspect(engine).has_table(FTS_TABLE)
+    with engine.begin() as conn:
+        for statement in _CREATE_STATEMENTS:
+            conn.execute(text(statement))
+        if is_new:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+            print(f"[DB] Built full-text index {FTS_TABLE}")
+
+
+def drop_fts_index(engine: Engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+
+
+def build_match_query(query: str) -> str:
+    """Turn free text into an FTS5 MATCH expression: any of its words, each quoted.
+
+    Quoting keeps user input from being read as FTS5 syntax (AND, NEAR, column:...).
+    """
+    words = []
+    for word in re.findall(r"\w+", query.lower()):
+        if word not in words:
+            words.append(word)
+    return " OR ".join(f'"{word}"' for word in words)
+
+
+def _filter_clauses(filters: Optional[SearchFilters]) -> Tuple[List[str], Dict[str, Any], List[str]]:
+    """SQL conditions on journal_entries (aliased e) matching SearchFilters."""
+    clauses, params, expanding = [], {}, []
+    if not filters or filters.is_empty():
+        return clauses, params, expanding
+    if filters.date_from:
+        clauses.append("e.date >= :date_from")
+        params["date_from"] = filters.date_from.isoformat()
+    if filters.date_to:
+        clauses.append("e.date <= :date_to")
+        params["date_to"] = filters.date_to.isoformat()
+    if filters.moods:
+        # SearchFilters lowercases; stored labels may not be ("Happy" from older or hand-written entries)
+        clauses.append("lower(trim(e.mood_label)) IN :moods")
+        params["moods"] = list(filters.moods)
+        expanding.append("moods")
+    if filters.sources:
+        clauses.append("lower(trim(e.source_type)) IN :sources")
+        params["sources"] = list(filters.sources)
+        expanding.append("sources")
+    if filters.tags:
+        clauses.append(
+            "e.id IN (SELECT et.entry_id FROM entry_tags et JOIN tags t ON t.id = et.tag_id WHERE t.name IN :tags)"
+        )
+        params["tags"] = filters.normalized_tags()
+        expanding.append("tags")
+    return clauses, params, expanding
+
+
+def search_fts(
+    db: Session, query: str, limit: int = 20, filters: Optional[SearchFilters] = None
+) -> List[Tuple[int, float]]:
+    """(entry_id, bm25) pairs, best match first. FTS5's bm25 is lower-is-better."""
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    clauses, params, expanding = _filter_clauses(filters)
+    join = f" JOIN journal_entries e ON e.id = {FTS_TABLE}.rowid" if clauses else ""
+    where = "".join(f" AND {clause}" for clause in clauses)
+    statement = text(
+        f"SELECT {FTS_TABLE}.rowid AS rowid, bm25({FTS_TABLE}) AS score FROM {FTS_TABLE}{join} "
+        f"WHERE {FTS_TABLE} MATCH :match{where} ORDER BY score LIMIT :limit"
+    )
+    if expanding:
+        statement = statement.bindparams(*[bindparam(name, expanding=True) for name in expanding])
+    rows = db.execute(statement, {"match": match, "limit": limit, **params})
+    return [(row.rowid, row.score) for row in rows]
@@ -1,5 +1,140 @@
-from .database import engine
-from .models import Base
+from sqlalchemy import inspect, text
+
+from .database import engine, SessionLocal
+from .models import Base, JournalEntry, EmbeddingOutbox, count_words, entry_tags
+from ..utils.hashing import content_hash
+from .crud import set_entry_tags
+from .fts import create_fts_index
+
+
+def _add_missing_columns():
+    """Lightweight migration: ALTER TABLE ADD COLUMN for columns new to the models."""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    col_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {col_type}'))
+                    print(f"[DB] Added column {table.name}.{column.name}")
+
+
+def _create_missing_indexes():
+    # create_all() skips indexes on tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def _backfill_word_counts(batch_size: int = 500):
+    with SessionLocal() as db:
+        while True:
+            rows = (
+                db.query(JournalEntry.id, JournalEntry.text)
+                .filter(JournalEntry.word_count.is_(None))
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            db.bulk_update_mappings(JournalEntry, [
+                {"id": row.id, "word_count": count_words(row.text)} for row in rows
+            ])
+            db.commit()
+
+
+def _drop_text_only_hash_index():
+    """Databases from before dedupe was per day have a unique index on content_hash alone."""
+    indexes = inspect(engine).get_indexes(JournalEntry.__tablename__)
+    if any(index["name"] == "ix_journal_entries_content_hash" and index["unique"] for index in indexes):
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_journal_entries_content_hash"))
+        print("[DB] Dropped unique index on content_hash; duplicates are now per (date, content_hash)")
+
+
+def _backfill_content_hashes(batch_size: int = 500):
+    """Hash existing entries before the (date, content_hash) unique index is built.
+
+    Later copies of the same text on the same day keep a NULL hash so the
+    index can be created; they are left in place rather than deleted.
+    """
+    last_id = 0
+    with SessionLocal() as db:
+        seen = {
+            (entry_date, h) for entry_date, h in
+            db.query(JournalEntry.date, JournalEntry.content_hash).filter(JournalEntry.content_hash.isnot(None))
+        }
+        while True:
+            rows = (
+                db.query(JournalEntry.id, JournalEntry.date, JournalEntry.text)
+                .filter(JournalEntry.id > last_id, JournalEntry.content_hash.is_(None))
+                .order_by(JournalEntry.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            updates = []
+            for row in rows:
+                key = (row.date, content_hash(row.text))
+                if key not in seen:
+                    seen.add(key)
+                    updates.append({"id": row.id, "content_hash": key[1]})
+            if updates:
+                db.bulk_update_mappings(JournalEntry, updates)
+                db.commit()
+            last_id = rows[-1].id
+
+
+def _backfill_entry_tags(batch_size: int = 500):
+    """Populate the normalized tag tables for entries written before they existed."""
+    last_id = 0
+    with SessionLocal() as db:
+        while True:
+            entries = (
+                db.query(JournalEntry)
+                .filter(JournalEntry.id > last_id)
+                .filter(JournalEntry.tags.isnot(None), JournalEntry.tags != "")
+                .filter(~JournalEntry.id.in_(db.query(entry_tags.c.entry_id)))
+                .order_by(JournalEntry.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not entries:
+                break
+            for entry in entries:
+                set_entry_tags(db, entry, entry.tags)
+            last_id = entries[-1].id
+            db.commit()
+
+
+def _backfill_outbox():
+    """Queue every existing entry once, when the outbox is first created.
+
+    Entries saved before the outbox existed (notably through /create_entry/)
+    were never embedded; this lets the indexer catch the vector store up. It
+    also rewrites older chunk points with the current payload (tags as a list,
+    so tag filters match them).
+    """
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO embedding_outbox (entry_id, op, attempts, created_at) "
+            "SELECT id, 'upsert', 0, CURRENT_TIMESTAMP FROM journal_entries ORDER BY id"
+        ))
+
 
 def init_db():
+    outbox_is_new = not inspect(engine).has_table(EmbeddingOutbox.__tablename__)
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    _drop_text_only_hash_index()
+    _backfill_content_hashes()
+    _create_missing_indexes()
+    create_fts_index(engine)
+    _backfill_word_counts()
+    _backfill_entry_tags()
+    if outbox_is_new:
+        _backfill_outbox()
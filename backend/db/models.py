@@ -1,14 +1,138 @@
-from sqlalchemy import Column, Integer, String, Text, Date
+import re
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Index, Table, event, inspect
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session, validates, relationship
+
+from ..utils.hashing import content_hash
 
 Base = declarative_base()
 
+
+def count_words(text: str) -> int:
+    return len(re.findall(r"\w+", text or ""))
+
+
+def parse_tags(tags: str) -> list:
+    """Split a comma-separated tag string into unique, lowercased names (order kept)."""
+    seen = []
+    for tag in (tags or "").split(","):
+        name = tag.strip().lower()
+        if name and name not in seen:
+            seen.append(name)
+    return seen
+
+
+entry_tags = Table(
+    "entry_tags",
+    Base.metadata,
+    Column("entry_id", Integer, ForeignKey("journal_entries.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    # The primary key covers entry -> tags; this covers tag -> entries for /filter
+    Index("ix_entry_tags_tag_id_entry_id", "tag_id", "entry_id"),
+)
+
+
+class Tag(Base):
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String, nullable=False, unique=True, index=True)
+
+
 class JournalEntry(Base):
     __tablename__ = "journal_entries"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    date = Column(Date, nullable=False)
+    date = Column(Date, nullable=False, index=True)
     text = Column(Text, nullable=False)
     source_type = Column(String, default="text")  # "text", "audio", "image"
     tags = Column(String, nullable=True)          
-    mood_label = Column(String, default="")
\ No newline at end of file
+    mood_label = Column(String, default="", index=True)
+    word_count = Column(Integer, default=0)       # precomputed for /insights/
+    content_hash = Column(String(64), nullable=True, index=True)  # normalized-text sha256
+    source_hash = Column(String(64), nullable=True, index=True)  # same hash of the upload text before LLM cleaning
+
+    # Normalized copy of `tags`; kept in sync by crud.set_entry_tags
+    tag_set = relationship("Tag", secondary=entry_tags)
+
+    __table_args__ = (
+        # The same text is a duplicate only on the same day. A unique index rather
+        # than a table constraint so init_db can add it to existing databases.
+        Index("uq_journal_entries_date_content_hash", "date", "content_hash", unique=True),
+    )
+
+    @validates("text")
+    def _set_derived_fields(self, key, value):
+        # Keep word_count and content_hash in step with text on every insert/update path
+        self.word_count = count_words(value)
+        self.content_hash = content_hash(value)
+        return value
+
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+
+    id = Column(String, primary_key=True)          # uuid4 hex
+    filename = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)
+    status = Column(String, default="queued")      # "queued", "running", "done", "failed"
+    stage = Column(String, default="queued")       # e.g. "transcribing", "enriching", "embedding"
+    entries_done = Column(Integer, default=0)
+    entries_total = Column(Integer, default=0)
+    stats = Column(Text, nullable=True)            # JSON from import_file
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class EmbeddingOutbox(Base):
+    """Entries whose vectors are out of date; written in the same transaction as the entry."""
+    __tablename__ = "embedding_outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entry_id = Column(Integer, nullable=False, index=True)  # no FK: delete rows outlive the entry
+    op = Column(String, nullable=False)            # "upsert" or "delete"
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# Fields copied into vector payloads; changing any of them needs a re-index
+INDEXED_FIELDS = ("text", "date", "tags", "mood_label", "source_type")
+
+
+@event.listens_for(Session, "after_flush")
+def _queue_embedding_updates(session, flush_context):
+    """Record inserted, changed and deleted entries in embedding_outbox.
+
+    Runs inside the flush, so the outbox rows commit or roll back together
+    with the entry itself. ORM bulk operations (query.delete/update) bypass it.
+    """
+    rows = []
+    for obj in session.new:
+        if isinstance(obj, JournalEntry):
+            rows.append({"entry_id": obj.id, "op": "upsert"})
+    for obj in session.dirty:
+        if isinstance(obj, JournalEntry) and any(
+            inspect(obj).attrs[field].history.has_changes() for field in INDEXED_FIELDS
+        ):
+            rows.append({"entry_id": obj.id, "op": "upsert"})
+    for obj in session.deleted:
+        if isinstance(obj, JournalEntry):
+            rows.append({"entry_id": obj.id, "op": "delete"})
+    if rows:
+        now = datetime.utcnow()
+        session.execute(
+            EmbeddingOutbox.__table__.insert(),
+            [{**row, "attempts": 0, "created_at": now} for row in rows],
+        )
+
+
+class UploadedFile(Base):
+    __tablename__ = "uploaded_files"
+
+    sha256 = Column(String(64), primary_key=True)  # hash of the uploaded bytes
+    filename = Column(String, nullable=False)
+    job_id = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
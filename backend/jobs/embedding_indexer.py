@@ -0,0 +1,194 @@
+import os
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from ..db.database import SessionLocal
+from ..db.models import JournalEntry
+from ..db.crud import (
+    get_outbox_batch,
+    delete_outbox_rows,
+    mark_outbox_failed,
+    requeue_dead_outbox_rows,
+    get_outbox_counts,
+)
+from ..utils.embedder import Embedder
+from ..vectorstore.factory import get_async_vector_store
+from ..vectorstore.indexer import sync_entries
+from ..vectorstore.reindex import mark_indexed_past_checkpoint, reindex_state
+
+INDEXER_BATCH_SIZE = int(os.getenv("INDEXER_BATCH_SIZE", 256))
+INDEXER_POLL_SECONDS = float(os.getenv("INDEXER_POLL_SECONDS", 2))
+INDEXER_MAX_BACKOFF_SECONDS = float(os.getenv("INDEXER_MAX_BACKOFF_SECONDS", 60))
+# Failures of an entry synced on its own before its rows are dead-lettered (kept, but skipped)
+INDEXER_MAX_ATTEMPTS = int(os.getenv("INDEXER_MAX_ATTEMPTS", 5))
+
+
+class EmbeddingIndexer:
+    """Drains embedding_outbox into the vector store.
+
+    Every entry insert, update and delete leaves an outbox row in the same
+    SQLite transaction, so nothing is lost if the process dies between the two
+    stores; the row is removed only after the vector store accepted the change.
+    A background task polls the outbox, and the importer calls drain() itself
+    so a job finishes with its entries searchable.
+
+    When a batch fails, its entries are retried one by one so a single entry
+    that cannot be indexed doesn't hold back the rest. Only entries that fail
+    while others succeed count an attempt; if none succeed the vector store is
+    taken to be down and the batch waits for the next round. After
+    INDEXER_MAX_ATTEMPTS the entry's rows are dead-lettered until requeue_dead().
+    """
+
+    def __init__(self, batch_size: int = INDEXER_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.indexed = 0
+        self.last_drained_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def notify(self):
+        """Wake the background task early; safe to call from threadpool routes."""
+        if self._loop and self._wake:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def drain(self) -> int:
+        """Process the outbox until it is empty; returns the number of entries synced."""
+        total = 0
+        while True:
+            synced = await self._drain_batch()
+            if not synced:
+                return total
+            total += synced
+
+    async def _drain_batch(self) -> int:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # One drainer at a time, so the importer and the background task never race on a row
+        async with self._lock:
+            # Writes now would land in the index being replaced; leave them queued for the new one
+            reindex = reindex_state()
+            if reindex == "running":
+                return 0
+            # Read what to sync, then let the session go: SQLite stays free while we embed and upsert
+            with SessionLocal() as db:
+                rows = get_outbox_batch(db, self.batch_size, INDEXER_MAX_ATTEMPTS)
+                if not rows:
+                    return 0
+                row_ids = defaultdict(list)
+                ops = {}
+                # Rows are in commit order, so the last op per entry is its current state
+                for row in rows:
+                    row_ids[row.entry_id].append(row.id)
+                    ops[row.entry_id] = row.op
+                upsert_ids = [entry_id for entry_id, op in ops.items() if op == "upsert"]
+                entries = db.query(JournalEntry).filter(JournalEntry.id.in_(upsert_ids)).all() if upsert_ids else []
+            found = {entry.id for entry in entries}
+            deleted_ids = [entry_id for entry_id in ops if entry_id not in found]
+
+            try:
+                await self._sync(entries, deleted_ids)
+                failed: Dict[int, str] = {}
+            except Exception as e:
+                if len(ops) == 1:
+                    failed = {next(iter(ops)): str(e)}
+                else:
+                    print(f"[Indexer] Batch of {len(ops)} entries failed, retrying one by one: {e}")
+                    failed = await self._sync_each(entries, deleted_ids)
+
+            synced = [entry_id for entry_id in ops if entry_id not in failed]
+            if synced and reindex == "stale":
+                # The dead run's partial index lacks these changes; make a resume start over
+                mark_indexed_past_checkpoint()
+            with SessionLocal() as db:
+                if synced:
+                    delete_outbox_rows(db, [row_id for entry_id in synced for row_id in row_ids[entry_id]])
+                for entry_id, error in failed.items():
+                    # Nothing went through: most likely an outage, which is no entry's fault
+                    mark_outbox_failed(db, row_ids[entry_id], error, count_attempt=bool(synced))
+
+            if failed:
+                self.last_error = next(iter(failed.values()))
+                if not synced:
+                    raise RuntimeError(self.last_error)
+                print(f"[Indexer] {len(failed)} entries failed to sync: {self.last_error}")
+            else:
+                self.last_error = None
+            self.indexed += len(synced)
+            self.last_drained_at = datetime.utcnow()
+            return len(synced)
+
+    async def _sync(self, entries: List[JournalEntry], deleted_ids: List[int]):
+        await sync_entries(entries, deleted_ids, Embedder(), get_async_vector_store())
+
+    async def _sync_each(self, entries: List[JournalEntry], deleted_ids: List[int]) -> Dict[int, str]:
+        """Sync entries one at a time; returns entry_id -> error for the ones that failed."""
+        failed = {}
+        for entry in entries:
+            try:
+                await self._sync([entry], [])
+            except Exception as e:
+                failed[entry.id] = str(e)
+        if deleted_ids:
+            try:
+                await self._sync([], deleted_ids)
+            except Exception as e:
+                failed.update({entry_id: str(e) for entry_id in deleted_ids})
+        return failed
+
+    def requeue_dead(self) -> int:
+        """Give dead-lettered entries another INDEXER_MAX_ATTEMPTS tries."""
+        with SessionLocal() as db:
+            count = requeue_dead_outbox_rows(db, INDEXER_MAX_ATTEMPTS)
+        self.notify()
+        return count
+
+    async def _run(self):
+        delay = INDEXER_POLL_SECONDS
+        while True:
+            try:
+                await self.drain()
+                delay = INDEXER_POLL_SECONDS
+            except Exception as e:
+                # Rows stay in the outbox; back off while the vector store is unreachable
+                print(f"[Indexer] Sync failed, retrying in {delay:.0f}s: {e}")
+                delay = min(delay * 2, INDEXER_MAX_BACKOFF_SECONDS)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def status(self) -> Dict[str, Any]:
+        with SessionLocal() as db:
+            counts = get_outbox_counts(db, INDEXER_MAX_ATTEMPTS)
+        oldest = counts["oldest_pending_at"]
+        reindex = reindex_state()
+        return {
+            **counts,
+            "lag_seconds": round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else 0.0,
+            "running": self._task is not None and not self._task.done(),
+            "paused_for_reindex": reindex == "running",
+            "reindex": reindex,  # None, "running", or "stale" (an abandoned run; see reindex --abort)
+            "indexed_since_start": self.indexed,
+            "last_drained_at": self.last_drained_at,
+            "last_error": self.last_error,
+        }
+
+
+embedding_indexer = EmbeddingIndexer()
@@ -0,0 +1,104 @@
+import os
+import json
+import uuid
+import asyncio
+import traceback
+from typing import List, Optional
+
+from ..db.database import SessionLocal
+from ..db.crud import create_job, update_job, get_unfinished_jobs
+from ..upload.processor import import_file
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 2))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 100))
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class IngestQueue:
+    """Bounded queue of upload jobs drained by a fixed pool of asyncio workers.
+
+    Job state lives in the ingest_jobs table so /jobs/{id} survives restarts;
+    jobs still queued or running when the process stopped are re-queued on start.
+    """
+
+    def __init__(self, workers: int = INGEST_WORKERS, maxsize: int = INGEST_QUEUE_SIZE):
+        self.workers = workers
+        self.maxsize = maxsize
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        with SessionLocal() as db:
+            for job in get_unfinished_jobs(db):
+                if self._queue.full():
+                    break
+                update_job(db, job.id, status="queued", stage="queued")
+                self._queue.put_nowait((job.id, job.file_path))
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, filename: str, file_path: str) -> str:
+        """Queue a file for import; called from threadpool routes, not the event loop."""
+        if self._queue is None:
+            raise RuntimeError("Ingest queue is not running.")
+        if self._queue.full():
+            raise QueueFullError("Too many uploads are waiting; try again shortly.")
+
+        job_id = uuid.uuid4().hex
+        with SessionLocal() as db:
+            create_job(db, job_id, filename, file_path)
+        try:
+            # asyncio.Queue isn't thread-safe; hand the put to the loop and wait for it
+            asyncio.run_coroutine_threadsafe(self._put((job_id, file_path)), self._loop).result()
+        except asyncio.QueueFull:
+            with SessionLocal() as db:
+                update_job(db, job_id, status="failed", stage="failed", error="Ingest queue was full.")
+            raise QueueFullError("Too many uploads are waiting; try again shortly.")
+        return job_id
+
+    async def _put(self, item):
+        self._queue.put_nowait(item)
+
+    async def _worker(self, index: int):
+        while True:
+            job_id, file_path = await self._queue.get()
+            try:
+                await self._run(job_id, file_path)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str, file_path: str):
+        with SessionLocal() as db:
+            update_job(db, job_id, status="running", stage="starting")
+
+            def progress(stage: str, done: int, total: int):
+                update_job(db, job_id, stage=stage, entries_done=done, entries_total=total)
+
+            try:
+                stats = await import_file(file_path, progress=progress)
+                update_job(
+                    db,
+                    job_id,
+                    status="done",
+                    stage="done",
+                    entries_done=stats["entries"],
+                    stats=json.dumps(stats),
+                )
+            except Exception as e:
+                traceback.print_exc()
+                db.rollback()
+                update_job(db, job_id, status="failed", stage="failed", error=str(e))
+
+
+ingest_queue = IngestQueue()
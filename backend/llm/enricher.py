@@ -0,0 +1,54 @@
+import os
+import json
+from typing import Optional, Tuple
+
+from .prompts import enrichment_prompt
+from .ollama_client import agenerate_response
+from .tagger import auto_generate_tags
+from .mood_labeler import detect_mood, extract_mood_label, MOOD_LABELS
+
+# "combined": one JSON call for tags + mood; "separate": the original two prompts
+ENRICHMENT_MODE = os.getenv("ENRICHMENT_MODE", "combined").lower()
+
+
+def parse_enrichment(raw: str) -> Tuple[Optional[str], Optional[str]]:
+    """Pull (tags, mood) out of the model's JSON; either is None when unusable."""
+    try:
+        data = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return None, None
+    if not isinstance(data, dict):
+        return None, None
+
+    tags = data.get("tags")
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    if isinstance(tags, list):
+        tags = [str(t).strip() for t in tags if str(t).strip()]
+    tags_str = ", ".join(tags) if tags else None
+
+    mood = data.get("mood")
+    mood = extract_mood_label(mood) if isinstance(mood, str) else None
+    if mood not in MOOD_LABELS:
+        mood = None
+
+    return tags_str, mood
+
+
+async def enrich_entry(text: str) -> Tuple[str, str]:
+    """Return (tags, mood) for an entry, using one LLM round trip when possible."""
+    if ENRICHMENT_MODE == "separate":
+        return await auto_generate_tags(text), await detect_mood(text)
+
+    try:
+        response = await agenerate_response(enrichment_prompt(text, MOOD_LABELS), format="json")
+        tags, mood = parse_enrichment(response)
+    except Exception:
+        tags, mood = None, None
+
+    # Only re-ask for the fields the combined call failed to deliver
+    if tags is None:
+        tags = await auto_generate_tags(text)
+    if mood is None:
+        mood = await detect_mood(text)
+    return tags, mood
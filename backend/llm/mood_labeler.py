@@ -1,6 +1,10 @@
 import re
-import asyncio
-from .ollama_client import generate_response as local_llm
+from .ollama_client import agenerate_response
+
+MOOD_LABELS = [
+    "joy", "happy", "excited", "calm", "reflective", "anxious",
+    "sad", "angry", "stress", "grateful", "motivated",
+]
 
 def extract_mood_label(raw: str) -> str:
     # Lowercase, remove surrounding whitespace
@@ -19,7 +23,7 @@ def extract_mood_label(raw: str) -> str:
 
 async def detect_mood(text: str) -> str:
     prompt = f"""Based on the journal entry below, label the overall emotional tone using one word.
-Examples: joy, anxious, reflective, sad, excited and also only from these joy,happy,excited,calm,reflective,anxious,sad,angry,stress,grateful,motivated
+Examples: joy, anxious, reflective, sad, excited and also only from these {",".join(MOOD_LABELS)}
 
 
 Entry:
@@ -28,7 +32,7 @@ Entry:
 Mood:"""
 
     try:
-        response = await asyncio.to_thread(local_llm, prompt)
+        response = await agenerate_response(prompt)
         clean = extract_mood_label(response)
         return clean
     except:
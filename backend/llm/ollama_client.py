@@ -1,20 +1,280 @@
-import requests
 import os
+import json
+import time
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+import httpx
 from dotenv import load_dotenv
 
+from .cache import llm_cache, cache_key, LLM_CACHE_ENABLED
+
 load_dotenv()
 
-OLLAMA_HOST = "http://localhost:11434"
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
 DEFAULT_MODEL = os.getenv("MODEL_NAME", "mistral")
 
-def generate_response(prompt: str, model: str = DEFAULT_MODEL) -> str:
-    response = requests.post(
-        f"{OLLAMA_HOST}/api/generate",
-        json={
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", 120))
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", 5))
+OLLAMA_MAX_RETRIES = int(os.getenv("OLLAMA_MAX_RETRIES", 2))
+OLLAMA_RETRY_BACKOFF = float(os.getenv("OLLAMA_RETRY_BACKOFF", 0.5))
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", 8))
+
+
+def _default_options() -> Dict[str, Any]:
+    """Ollama `options` taken from the environment (num_ctx, num_predict, temperature)."""
+    options: Dict[str, Any] = {}
+    if os.getenv("OLLAMA_NUM_CTX"):
+        options["num_ctx"] = int(os.environ["OLLAMA_NUM_CTX"])
+    if os.getenv("OLLAMA_NUM_PREDICT"):
+        options["num_predict"] = int(os.environ["OLLAMA_NUM_PREDICT"])
+    if os.getenv("OLLAMA_TEMPERATURE"):
+        options["temperature"] = float(os.environ["OLLAMA_TEMPERATURE"])
+    return options
+
+
+def _effective_options(options: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {**_default_options(), **(options or {})}
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return False
+
+
+class OllamaClient:
+    """Keep-alive HTTP client for Ollama's /api/generate, async first with a sync twin."""
+
+    def __init__(
+        self,
+        host: str = OLLAMA_HOST,
+        timeout: float = OLLAMA_TIMEOUT,
+        max_retries: int = OLLAMA_MAX_RETRIES,
+        backoff: float = OLLAMA_RETRY_BACKOFF,
+    ):
+        self.host = host.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limits = httpx.Limits(
+            max_connections=OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=OLLAMA_MAX_CONNECTIONS,
+        )
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._sync_client: Optional[httpx.Client] = None
+        self._sync_lock = threading.Lock()
+
+    def _timeout(self, timeout: Optional[float]) -> httpx.Timeout:
+        return httpx.Timeout(timeout or self.timeout, connect=OLLAMA_CONNECT_TIMEOUT)
+
+    def _payload(self, prompt: str, model: str, stream: bool, options: Optional[Dict[str, Any]], format: Optional[str]) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
             "model": model,
             "prompt": prompt,
-            "stream": False
+            "stream": stream
         }
-    )
-    response.raise_for_status()
-    return response.json()["response"].strip()
+        merged = _effective_options(options)
+        if merged:
+            payload["options"] = merged
+        if format:
+            payload["format"] = format
+        return payload
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(base_url=self.host, limits=self.limits, timeout=self._timeout(None))
+        return self._async_client
+
+    @property
+    def sync_client(self) -> httpx.Client:
+        if self._sync_client is None:
+            with self._sync_lock:
+                if self._sync_client is None:
+                    self._sync_client = httpx.Client(base_url=self.host, limits=self.limits, timeout=self._timeout(None))
+        return self._sync_client
+
+    # ===== ASYNC =====
+
+    async def agenerate(
+        self,
+        prompt: str,
+        model: str = DEFAULT_MODEL,
+        options: Optional[Dict[str, Any]] = None,
+        format: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        payload = self._payload(prompt, model, False, options, format)
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self.async_client.post("/api/generate", json=payload, timeout=self._timeout(timeout))
+                response.raise_for_status()
+                return response.json()["response"].strip()
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                await asyncio.sleep(self.backoff * (2 ** attempt))
+
+    async def astream(
+        self,
+        prompt: str,
+        model: str = DEFAULT_MODEL,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """Yield response tokens as Ollama produces them.
+
+        Retries only happen before the first token; once text has been
+        yielded a failure is raised to the caller.
+        """
+        payload = self._payload(prompt, model, True, options, None)
+        for attempt in range(self.max_retries + 1):
+            started = False
+            try:
+                async with self.async_client.stream("POST", "/api/generate", json=payload, timeout=self._timeout(timeout)) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("response"):
+                            started = True
+                            yield chunk["response"]
+                        if chunk.get("done"):
+                            return
+                return
+            except Exception as e:
+                if started or attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                await asyncio.sleep(self.backoff * (2 ** attempt))
+
+    # ===== SYNC =====
+
+    def generate(
+        self,
+        prompt: str,
+        model: str = DEFAULT_MODEL,
+        options: Optional[Dict[str, Any]] = None,
+        format: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        payload = self._payload(prompt, model, False, options, format)
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.sync_client.post("/api/generate", json=payload, timeout=self._timeout(timeout))
+                response.raise_for_status()
+                return response.json()["response"].strip()
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                time.sleep(self.backoff * (2 ** attempt))
+
+    def stream(
+        self,
+        prompt: str,
+        model: str = DEFAULT_MODEL,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[str]:
+        payload = self._payload(prompt, model, True, options, None)
+        with self.sync_client.stream("POST", "/api/generate", json=payload, timeout=self._timeout(timeout)) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+
+_client = OllamaClient()
+
+
+def get_ollama_client() -> OllamaClient:
+    return _client
+
+
+async def agenerate_response(
+    prompt: str,
+    model: str = DEFAULT_MODEL,
+    format: Optional[str] = None,
+    options: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None,
+    use_cache: bool = True,
+) -> str:
+    use_cache = use_cache and LLM_CACHE_ENABLED
+    key = cache_key(model, prompt, format, _effective_options(options))
+    if use_cache:
+        # The cache is SQLite: keep its reads and writes off the event loop
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            return cached
+
+    response = await _client.agenerate(prompt, model=model, options=options, format=format, timeout=timeout)
+    if use_cache and response:
+        await asyncio.to_thread(llm_cache.set, key, model, response)
+    return response
+
+
+async def stream_response(
+    prompt: str,
+    model: str = DEFAULT_MODEL,
+    options: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None,
+    use_cache: bool = True,
+) -> AsyncIterator[str]:
+    """Stream tokens; a cached answer is replayed as a single chunk."""
+    use_cache = use_cache and LLM_CACHE_ENABLED
+    key = cache_key(model, prompt, None, _effective_options(options))
+    if use_cache:
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            yield cached
+            return
+
+    tokens = []
+    async for token in _client.astream(prompt, model=model, options=options, timeout=timeout):
+        tokens.append(token)
+        yield token
+
+    response = "".join(tokens).strip()
+    if use_cache and response:
+        await asyncio.to_thread(llm_cache.set, key, model, response)
+
+
+def generate_response(
+    prompt: str,
+    model: str = DEFAULT_MODEL,
+    format: Optional[str] = None,
+    options: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None,
+    use_cache: bool = True,
+) -> str:
+    """Blocking wrapper kept for sync callers; `format="json"` constrains output to JSON.
+
+    Responses are served from the on-disk LLM cache unless `use_cache=False`.
+    """
+    use_cache = use_cache and LLM_CACHE_ENABLED
+    key = cache_key(model, prompt, format, _effective_options(options))
+    if use_cache:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return cached
+
+    response = _client.generate(prompt, model=model, options=options, format=format, timeout=timeout)
+    if use_cache and response:
+        llm_cache.set(key, model, response)
+    return response
@@ -29,4 +29,17 @@ Read the entry and generate 3 to 5 relevant, comma-separated tags (single-word i
 Journal Entry:
 \"\"\"{journal_text}\"\"\"
 
-Tags:"""
\ No newline at end of file
+Tags:"""
+
+
+def enrichment_prompt(journal_text: str, mood_labels: list) -> str:
+    return f"""You are a tagging assistant for journal entries.
+Read the entry and return a JSON object with exactly two keys:
+- "tags": a list of 3 to 5 relevant tags (single-word if possible)
+- "mood": the overall emotional tone, one of: {", ".join(mood_labels)}
+
+Respond with JSON only.
+
+Journal Entry:
+\"\"\"{journal_text}\"\"\"
+"""
@@ -1,12 +1,11 @@
 from .prompts import tagging_prompt
-from ..llm.ollama_client import generate_response as local_llm
-import asyncio
+from ..llm.ollama_client import agenerate_response
 
 async def auto_generate_tags(text: str) -> str:
     prompt = tagging_prompt(text)
 
     try:
-        response = await asyncio.to_thread(local_llm, prompt)
+        response = await agenerate_response(prompt)
     except Exception:
         raise ValueError("Error occurred while processing the request.")
     
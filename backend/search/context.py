@@ -0,0 +1,105 @@
+import os
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from .filters import SearchFilters
+from .hybrid import hybrid_search
+from .mmr import mmr_order, normalize_relevance
+from ..utils.embedder import Embedder
+from ..utils.tokens import count_tokens, truncate_to_tokens
+
+load_dotenv()
+
+# Tokens of retrieved text in an /ask/ prompt; keep well under OLLAMA_NUM_CTX
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1500))
+# Hits fetched before diversifying; more gives MMR more to choose from
+CONTEXT_CANDIDATES = int(os.getenv("CONTEXT_CANDIDATES", 12))
+CONTEXT_MAX_EXCERPTS = int(os.getenv("CONTEXT_MAX_EXCERPTS", 6))
+CONTEXT_EXCERPT_TOKENS = int(os.getenv("CONTEXT_EXCERPT_TOKENS", 400))   # cap per excerpt
+# 1.0 ranks by relevance only; lower values trade relevance for covering different entries
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", 0.7))
+
+# Leftover budget smaller than this isn't worth a truncated excerpt
+_MIN_EXCERPT_TOKENS = 40
+
+
+async def _result_vectors(results: List[Dict[str, Any]]) -> np.ndarray:
+    """Unit vectors for the results' passages; only full-text-only hits need embedding."""
+    missing = [i for i, result in enumerate(results) if result.get("vector") is None]
+    if missing:
+        embedded = await asyncio.to_thread(Embedder().embed_batch, [results[i]["passage"] for i in missing])
+        for i, vector in zip(missing, embedded):
+            results[i]["vector"] = vector
+    vectors = np.asarray([result["vector"] for result in results], dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+async def diversify(results: List[Dict[str, Any]], limit: int = CONTEXT_MAX_EXCERPTS) -> List[Dict[str, Any]]:
+    """Reorder hybrid results by MMR, using fused scores as relevance."""
+    if len(results) <= 1:
+        return results[:limit]
+    try:
+        vectors = await _result_vectors(results)
+    except Exception as e:
+        print(f"[Context] No vectors for diversification, keeping ranked order: {e}")
+        return results[:limit]
+    relevance = normalize_relevance([result["score"] for result in results])
+    return [results[i] for i in mmr_order(relevance, vectors, MMR_LAMBDA, limit=limit)]
+
+
+def excerpt_header(entry) -> str:
+    mood = f" | mood: {entry.mood_label}" if entry.mood_label else ""
+    return f"[Entry {entry.id} | {entry.date.isoformat()}{mood}]"
+
+
+def pack_excerpts(
+    results: List[Dict[str, Any]],
+    budget: int = CONTEXT_TOKEN_BUDGET,
+    excerpt_tokens: int = CONTEXT_EXCERPT_TOKENS,
+) -> List[Dict[str, Any]]:
+    """Fit results, in order, into `budget` tokens; the last one may be shortened to fit."""
+    packed, used = [], 0
+    for result in results:
+        remaining = budget - used
+        if remaining < _MIN_EXCERPT_TOKENS:
+            break
+        header = excerpt_header(result["entry"])
+        header_tokens = count_tokens(header) + 1
+        text = truncate_to_tokens(result["passage"], min(excerpt_tokens, remaining - header_tokens))
+        if not text:
+            continue
+        tokens = header_tokens + count_tokens(text)
+        packed.append({
+            "entry_id": result["entry"].id,
+            "date": result["entry"].date.isoformat(),
+            "text": f"{header}\n{text}",
+            "tokens": tokens,
+        })
+        used += tokens + 1  # blank line between excerpts
+    return packed
+
+
+async def build_context(
+    db: Session,
+    query: str,
+    filters: Optional[SearchFilters] = None,
+    budget: int = CONTEXT_TOKEN_BUDGET,
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """Prompt context for a question and the excerpts in it (entry_id, date, text, tokens).
+
+    Over-fetches hybrid results, drops near-duplicates with MMR and packs the
+    rest into the token budget, each excerpt headed by its entry id and date
+    so the answer can cite them.
+    """
+    results = await hybrid_search(db, query, top_k=CONTEXT_CANDIDATES, filters=filters, with_vectors=True)
+    if not results:
+        return "", []
+    results = await diversify(results)
+    # Tokenizing is CPU work (and may load the tokenizer on first use)
+    packed = await asyncio.to_thread(pack_excerpts, results, budget)
+    return "\n\n".join(excerpt["text"] for excerpt in packed), packed
@@ -0,0 +1,168 @@
+import re
+import calendar
+from datetime import MAXYEAR, MINYEAR, date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, field_validator
+
+from ..db.models import parse_tags
+
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+
+
+class SearchFilters(BaseModel):
+    """Restrictions shared by vector search (Qdrant payload) and full-text search (SQL)."""
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    moods: List[str] = []
+    tags: List[str] = []
+    sources: List[str] = []
+
+    @field_validator("moods", "sources")
+    @classmethod
+    def _lowercase(cls, values: List[str]) -> List[str]:
+        # Stored mood labels and source types are lowercase ("happy", "audio")
+        return list(dict.fromkeys(value.strip().lower() for value in values if value and value.strip()))
+
+    def is_empty(self) -> bool:
+        return not (self.date_from or self.date_to or self.moods or self.tags or self.sources)
+
+    def normalized_tags(self) -> List[str]:
+        return parse_tags(",".join(self.tags))
+
+    def matches(self, payload: Dict[str, Any]) -> bool:
+        """Same semantics as the Qdrant filter, for stores that filter payloads in Python."""
+        entry_date = payload.get("date")
+        if self.date_from and (not entry_date or entry_date < self.date_from.isoformat()):
+            return False
+        if self.date_to and (not entry_date or entry_date > self.date_to.isoformat()):
+            return False
+        if self.moods and (payload.get("mood") or "").lower() not in self.moods:
+            return False
+        if self.sources and (payload.get("source") or "").lower() not in self.sources:
+            return False
+        if self.tags:
+            entry_tags = payload.get("tags") or []
+            if isinstance(entry_tags, str):  # points indexed before tags became a list
+                entry_tags = parse_tags(entry_tags)
+            if not set(self.normalized_tags()) & set(entry_tags):
+                return False
+        return True
+
+
+def _shift_months(day: date, months: int) -> date:
+    """Same day `months` later (or earlier), clamped to date.min / date.max."""
+    month_index = day.year * 12 + day.month - 1 + months
+    if month_index < MINYEAR * 12:
+        return date.min
+    if month_index > MAXYEAR * 12 + 11:
+        return date.max
+    year, month = divmod(month_index, 12)
+    return date(year, month + 1, min(day.day, calendar.monthrange(year, month + 1)[1]))
+
+
+def _days_before(day: date, days: int) -> date:
+    # `days` comes from the question and may be far past date.min
+    return day - timedelta(days=min(days, (day - date.min).days))
+
+
+def _month_bounds(year: int, month: int) -> Tuple[date, date]:
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _relative_range(phrase: str, today: date) -> Optional[Tuple[date, date]]:
+    if phrase == "today":
+        return today, today
+    if phrase == "yesterday":
+        yesterday = today - timedelta(days=1)
+        return yesterday, yesterday
+    if phrase == "this week":
+        return today - timedelta(days=today.weekday()), today
+    if phrase == "last week":
+        monday = today - timedelta(days=today.weekday() + 7)
+        return monday, monday + timedelta(days=6)
+    if phrase == "this month":
+        return today.replace(day=1), today
+    if phrase == "last month":
+        previous = _shift_months(today.replace(day=1), -1)
+        return _month_bounds(previous.year, previous.month)
+    if phrase == "this year":
+        return date(today.year, 1, 1), today
+    if phrase == "last year":
+        return date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)
+    return None
+
+
+_RELATIVE = re.compile(r"\b(today|yesterday|(?:this|last) (?:week|month|year))\b", re.IGNORECASE)
+_LAST_N = re.compile(r"\b(?:in the |over the |during the )?(?:last|past) (\d+) (day|week|month|year)s?\b", re.IGNORECASE)
+_IN_MONTH = re.compile(
+    r"\b(?:in|during) (" + "|".join(MONTHS) + r")(?: (\d{4}))?\b", re.IGNORECASE
+)
+_IN_YEAR = re.compile(r"\b(?:in|during) (\d{4})\b", re.IGNORECASE)
+
+
+def parse_date_phrase(question: str, today: Optional[date] = None) -> Tuple[Optional[date], Optional[date], str]:
+    """Find a time phrase ("last month", "past 3 weeks", "in March", "in 2023").
+
+    Returns (date_from, date_to, question without the phrase); dates are None
+    when no phrase was found.
+    """
+    today = today or date.today()
+
+    match = _LAST_N.search(question)
+    if match:
+        count, unit = int(match.group(1)), match.group(2).lower()
+        if unit == "day":
+            start = _days_before(today, count)
+        elif unit == "week":
+            start = _days_before(today, 7 * count)
+        elif unit == "month":
+            start = _shift_months(today, -count)
+        else:
+            start = _shift_months(today, -12 * count)
+        return start, today, _strip(question, match)
+
+    match = _RELATIVE.search(question)
+    if match:
+        start, end = _relative_range(match.group(1).lower(), today)
+        return start, end, _strip(question, match)
+
+    match = _IN_MONTH.search(question)
+    if match:
+        month = MONTHS[match.group(1).lower()]
+        # "in March" means the most recent March that has started
+        year = int(match.group(2)) if match.group(2) else (today.year if month <= today.month else today.year - 1)
+        year = min(max(year, MINYEAR), MAXYEAR)  # "in March 0000"
+        start, end = _month_bounds(year, month)
+        return start, end, _strip(question, match)
+
+    match = _IN_YEAR.search(question)
+    if match and 1900 <= int(match.group(1)) <= today.year:
+        year = int(match.group(1))
+        return date(year, 1, 1), date(year, 12, 31), _strip(question, match)
+
+    return None, None, question
+
+
+def _strip(question: str, match: "re.Match") -> str:
+    remaining = re.sub(r"\s{2,}", " ", question[:match.start()] + question[match.end():])
+    return re.sub(r"\s+([?!.,])", r"\1", remaining).strip()
+
+
+def resolve_filters(question: str, filters: Optional[SearchFilters] = None) -> Tuple[SearchFilters, str]:
+    """Explicit filters win; a time phrase in the question only fills a missing date range."""
+    filters = filters.model_copy() if filters else SearchFilters()
+    if filters.date_from or filters.date_to:
+        return filters, question
+
+    try:
+        date_from, date_to, remaining = parse_date_phrase(question)
+    except (ValueError, OverflowError) as e:
+        # A phrase we cannot turn into dates must not fail the search; run it unfiltered
+        print(f"[Search] Ignoring time phrase in {question!r}: {e}")
+        return filters, question
+    if date_from is None:
+        return filters, question
+    filters.date_from, filters.date_to = date_from, date_to
+    # Keep the original wording if the phrase was the whole query
+    return filters, remaining or question
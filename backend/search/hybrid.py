@@ -0,0 +1,153 @@
+import os
+import asyncio
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from ..db.fts import search_fts
+from .filters import SearchFilters
+from ..db.models import JournalEntry
+from ..utils.embedder import Embedder
+from ..utils.hashing import content_hash
+from ..vectorstore.factory import get_async_vector_store
+
+load_dotenv()
+
+# Weight of each ranking in the fusion; 0 switches that source off
+HYBRID_VECTOR_WEIGHT = float(os.getenv("HYBRID_VECTOR_WEIGHT", 1.0))
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", 1.0))
+# Entries taken from each source before fusing
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", 20))
+# RRF damping constant; 60 is the value from the original paper
+RRF_K = int(os.getenv("RRF_K", 60))
+
+
+def reciprocal_rank_fusion(
+    rankings: Dict[str, List[int]],
+    weights: Optional[Dict[str, float]] = None,
+    k: int = RRF_K,
+) -> List[Tuple[int, float]]:
+    """Fuse ranked id lists: score(id) = sum of weight / (k + rank) over sources."""
+    weights = weights or {}
+    scores = defaultdict(float)
+    for source, ids in rankings.items():
+        weight = weights.get(source, 1.0)
+        if weight <= 0:
+            continue
+        for rank, entry_id in enumerate(ids, start=1):
+            scores[entry_id] += weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+async def vector_candidates(
+    db: Session, query: str, limit: int, filters: Optional[SearchFilters] = None, with_vectors: bool = False
+) -> List[Tuple[int, str, Optional[List[float]]]]:
+    """(entry_id, best matching chunk, its vector if requested) from Qdrant, best first."""
+    query_vector = await asyncio.to_thread(Embedder().embed_query, query)
+    points = await get_async_vector_store().search_entries(
+        query_vector, top_k=limit, filters=filters, with_vectors=with_vectors
+    )
+
+    # Points indexed before chunking carry no entry_id; match them by their text
+    legacy_hashes = {
+        content_hash(point.payload["text"])
+        for point in points
+        if point.payload and "entry_id" not in point.payload and point.payload.get("text")
+    }
+    ids_by_hash = {}
+    if legacy_hashes:
+        ids_by_hash = dict(await asyncio.to_thread(
+            lambda: db.query(JournalEntry.content_hash, JournalEntry.id)
+            .filter(JournalEntry.content_hash.in_(legacy_hashes))
+            .all()
+        ))
+
+    candidates, seen = [], set()
+    for point in points:
+        payload = point.payload or {}
+        entry_id = payload.get("entry_id") or ids_by_hash.get(content_hash(payload.get("text", "")))
+        # An entry can have both a legacy point and re-indexed chunks; rank it once
+        if entry_id is not None and entry_id not in seen:
+            seen.add(entry_id)
+            candidates.append((entry_id, payload.get("text", ""), point.vector if with_vectors else None))
+    return candidates
+
+
+async def hybrid_search(
+    db: Session,
+    query: str,
+    top_k: int = 3,
+    vector_weight: Optional[float] = None,
+    lexical_weight: Optional[float] = None,
+    candidates: int = HYBRID_CANDIDATES,
+    filters: Optional[SearchFilters] = None,
+    with_vectors: bool = False,
+) -> List[Dict[str, Any]]:
+    """Rank entries by fusing BM25 (SQLite FTS5) and vector similarity (Qdrant).
+
+    Each result has the entry, its fused score, its rank in each source
+    (None when that source missed it) and a passage: the best chunk for
+    vector hits, the whole entry otherwise. Filters apply to both sources.
+    With with_vectors, vector hits also carry the passage's embedding.
+    """
+    weights = {
+        "vector": HYBRID_VECTOR_WEIGHT if vector_weight is None else vector_weight,
+        "lexical": HYBRID_LEXICAL_WEIGHT if lexical_weight is None else lexical_weight,
+    }
+    limit = max(candidates, top_k)
+    rankings: Dict[str, List[int]] = {}
+    passages: Dict[int, str] = {}
+    vectors: Dict[int, List[float]] = {}
+
+    if weights["lexical"] > 0:
+        # SQLite calls block; run them in a thread like the embedding and vector search
+        lexical_hits = await asyncio.to_thread(search_fts, db, query, limit, filters)
+        rankings["lexical"] = [entry_id for entry_id, _ in lexical_hits]
+
+    if weights["vector"] > 0:
+        try:
+            vector_hits = await vector_candidates(db, query, limit, filters, with_vectors)
+        except Exception as e:
+            # Keyword search still answers while Qdrant or the model is unavailable
+            print(f"[Search] Vector search failed, using full-text results only: {e}")
+            vector_hits = []
+        rankings["vector"] = [entry_id for entry_id, _, _ in vector_hits]
+        for entry_id, passage, vector in vector_hits:
+            passages.setdefault(entry_id, passage)
+            if vector is not None:
+                vectors.setdefault(entry_id, vector)
+
+    fused = reciprocal_rank_fusion(rankings, weights)[:top_k]
+    if not fused:
+        return []
+
+    fused_ids = [entry_id for entry_id, _ in fused]
+    entries = {
+        entry.id: entry
+        for entry in await asyncio.to_thread(
+            lambda: db.query(JournalEntry).filter(JournalEntry.id.in_(fused_ids)).all()
+        )
+    }
+    ranks = {
+        source: {entry_id: rank for rank, entry_id in enumerate(ids, start=1)}
+        for source, ids in rankings.items()
+    }
+
+    results = []
+    for entry_id, score in fused:
+        entry = entries.get(entry_id)
+        if entry is None:  # vector point outlived its entry
+            continue
+        result = {
+            "entry": entry,
+            "score": score,
+            "vector_rank": ranks.get("vector", {}).get(entry_id),
+            "lexical_rank": ranks.get("lexical", {}).get(entry_id),
+            "passage": passages.get(entry_id) or entry.text,
+        }
+        if with_vectors:
+            result["vector"] = vectors.get(entry_id)
+        results.append(result)
+    return results
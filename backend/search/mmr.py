@@ -0,0 +1,37 @@
+from typing import List, Optional
+
+import numpy as np
+
+
+def normalize_relevance(scores: np.ndarray) -> np.ndarray:
+    """Min-max scale to [0, 1].
+
+    RRF scores of a candidate list sit in a narrow band (1/61 .. 1/72 for
+    twelve hits), so dividing by the maximum leaves them all near 1 and any
+    similarity penalty would outweigh rank. Spreading them over [0, 1] keeps
+    rank and redundancy on comparable scales.
+    """
+    scores = np.asarray(scores, dtype=np.float32)
+    spread = scores.max() - scores.min()
+    if spread <= 0:
+        return np.ones_like(scores)
+    return (scores - scores.min()) / spread
+
+
+def mmr_order(relevance: np.ndarray, vectors: np.ndarray, lambda_: float = 0.7, limit: Optional[int] = None) -> List[int]:
+    """Maximal marginal relevance: indices picked greedily by
+    lambda * relevance - (1 - lambda) * highest similarity to anything already picked.
+
+    `vectors` are unit-length rows, so similarity is a dot product.
+    """
+    limit = len(relevance) if limit is None else min(limit, len(relevance))
+    similarity = vectors @ vectors.T
+    redundancy = np.zeros(len(relevance), dtype=np.float32)
+    remaining = list(range(len(relevance)))
+    selected = []
+    while remaining and len(selected) < limit:
+        scores = lambda_ * relevance[remaining] - (1 - lambda_) * redundancy[remaining]
+        best = remaining.pop(int(np.argmax(scores)))
+        selected.append(best)
+        redundancy = np.maximum(redundancy, similarity[best])
+    return selected
@@ -1,7 +1,125 @@
-from PIL import Image
+import os
+import re
+import zipfile
+import tempfile
+import threading
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+from PIL import Image, ImageOps
 import pytesseract
+from dotenv import load_dotenv
+
+load_dotenv()
+
+VALID_IMAGE_TYPES = [".jpg", ".jpeg", ".png"]
+
+# Longest image side after downscaling; ~300 DPI for a notebook page
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", 2000))
+OCR_BINARIZE = os.getenv("OCR_BINARIZE", "true").lower() in ("1", "true", "yes")
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def otsu_threshold(image: Image.Image) -> int:
+    """Grey level that best separates ink from paper (Otsu's method on the histogram)."""
+    histogram = image.histogram()[:256]
+    total = sum(histogram)
+    sum_all = sum(i * count for i, count in enumerate(histogram))
+
+    sum_bg, weight_bg = 0.0, 0
+    best_threshold, best_variance = 127, 0.0
+    for level, count in enumerate(histogram):
+        weight_bg += count
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += level * count
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = level, variance
+    return best_threshold
+
+
+def preprocess_image(image: Image.Image) -> Image.Image:
+    """Upright, greyscale, downscale and binarize a photo before recognition."""
+    image = ImageOps.exif_transpose(image)
+    image = ImageOps.grayscale(image)
+
+    if max(image.size) > OCR_MAX_SIDE:
+        image.thumbnail((OCR_MAX_SIDE, OCR_MAX_SIDE), Image.LANCZOS)
+
+    if OCR_BINARIZE:
+        image = ImageOps.autocontrast(image)
+        threshold = otsu_threshold(image)
+        image = image.point(lambda p: 255 if p > threshold else 0, mode="1")
+    return image
+
 
 def extract_text_from_image(file_path: str) -> str:
-    image = Image.open(file_path)
-    text = pytesseract.image_to_string(image)
+    with Image.open(file_path) as image:
+        text = pytesseract.image_to_string(preprocess_image(image))
     return text
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: forking the API process would copy locks held by its other threads
+                _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def extract_text_from_images(file_paths: List[str]) -> str:
+    """OCR several pages in parallel and join them in the given order."""
+    if len(file_paths) == 1 or OCR_WORKERS <= 1:
+        pages = [extract_text_from_image(path) for path in file_paths]
+    else:
+        # map() returns results in submission order regardless of which page finishes first
+        pages = list(_get_pool().map(extract_text_from_image, file_paths))
+    return "\n\n".join(page.strip() for page in pages if page and page.strip())
+
+
+def _natural_key(name: str):
+    # "page2" sorts before "page10"
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+
+def extract_text_from_zip(zip_path: str) -> str:
+    """OCR every image inside a zip of scanned pages, in filename order."""
+    with tempfile.TemporaryDirectory() as tmp_dir, zipfile.ZipFile(zip_path) as archive:
+        members = [
+            name for name in archive.namelist()
+            if Path(name).suffix.lower() in VALID_IMAGE_TYPES
+            and not name.endswith("/")
+            and not Path(name).name.startswith(".")
+        ]
+        members.sort(key=_natural_key)
+
+        page_paths = []
+        for index, name in enumerate(members):
+            # Flatten names so entries like "../x.png" can't escape the temp dir
+            target = Path(tmp_dir) / f"{index:05d}{Path(name).suffix.lower()}"
+            with archive.open(name) as src, open(target, "wb") as dst:
+                dst.write(src.read())
+            page_paths.append(str(target))
+
+        if not page_paths:
+            return ""
+        return extract_text_from_images(page_paths)
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
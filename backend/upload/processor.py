@@ -1,21 +1,34 @@
 import os
 import json
+import time
+import asyncio
 from pathlib import Path
 from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
 import httpx
 
-from ..utils.embedder import Embedder
-from ..vectorstore.qdrant_client import QdrantVectorStore
+from ..utils.hashing import content_hash
+from ..jobs.embedding_indexer import embedding_indexer
 from ..db.database import SessionLocal
-from ..db.crud import add_entry
-from ..llm.ollama_client import generate_response as clean_text_with_ollama
-from ..llm.tagger import auto_generate_tags
-from ..llm.mood_labeler import detect_mood 
-from .whisper_transcriber import transcribe_audio 
-from .ocr_reader import extract_text_from_image
+from ..db.crud import add_entry, add_entries, find_duplicate, find_duplicate_source, record_source_hash
+from ..llm.ollama_client import agenerate_response as clean_text_with_ollama
+from ..llm.enricher import enrich_entry
+from .whisper_transcriber import transcribe_audio_with_stats
+from .ocr_reader import extract_text_from_image, extract_text_from_zip
 
 VALID_IMAGE_TYPES = [".jpg", ".jpeg", ".png"]
 VALID_AUDIO_TYPES = [".mp3", ".wav", ".m4a"]
+VALID_ARCHIVE_TYPES = [".zip"]  # zip of scanned pages
+
+# Entries per SQLite transaction / encode call / Qdrant upsert during JSON imports
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 64))
+
+# progress(stage, entries_done, entries_total)
+ProgressCallback = Callable[[str, int, int], None]
+
+
+def _no_progress(stage: str, done: int, total: int):
+    pass
 
 def is_online() -> bool:
     try:
@@ -24,17 +37,19 @@ def is_online() -> bool:
     except httpx.RequestError:
         return False
 
-async def import_file(file_path: str):
-    embedder = Embedder()
-    vector_store = QdrantVectorStore()
+async def import_file(file_path: str, progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """Import one uploaded file and return throughput stats for the run."""
+    report = progress or _no_progress
     path = Path(file_path)
+    stats = {"entries": 0, "duplicates": 0, "seconds": 0.0, "entries_per_sec": 0.0}
 
     if not path.exists():
         print(f"File not found: {file_path}")
-        return
+        return stats
 
     ext = path.suffix.lower()
-    online = is_online()
+    online = await asyncio.to_thread(is_online)
+    started = time.perf_counter()
 
     with SessionLocal() as db:
 
@@ -43,7 +58,12 @@ async def import_file(file_path: str):
             with open(file_path, "r", encoding="utf-8") as f:
                 entries = json.load(f)
 
-            for entry in entries:
+            total = len(entries)
+            report("enriching", 0, total)
+            batch: List[Dict[str, Any]] = []
+            seen_keys = set()  # (date, content hash) already in this file
+            seen_sources = set()  # raw hashes of malformed objects already in this file
+            for index, entry in enumerate(entries):
                 raw_date = entry.get("date")
                 text = entry.get("text")
 
@@ -54,82 +74,141 @@ async def import_file(file_path: str):
                     date = datetime.today().date()
 
                 if date and text and text.strip():
-                    tags = await auto_generate_tags(text.strip())
-                    mood = await detect_mood(text.strip())
-                    db_entry = add_entry(db, text=text.strip(), date=date, tags=tags, mood_label=mood)
-
-                    vector = embedder.embed(text)
-                    vector_store.add_entry(
-                        vector,
-                        {
-                            "date": db_entry.date.isoformat(),
-                            "tags": tags,
-                            "mood": mood,
-                            "text": text.strip()
-                        }
-                    )
-                    print(f"Imported JSON entry with date: {date}, tags: {tags}, mood: {mood}")
+                    text = text.strip()
+                    # Skip known text before paying for enrichment
+                    key = (date, content_hash(text))
+                    if key in seen_keys or find_duplicate(db, text, date):
+                        stats["duplicates"] += 1
+                        report("enriching", index + 1, total)
+                        continue
+                    seen_keys.add(key)
+                    tags, mood = await enrich_entry(text)
+                    batch.append({"text": text, "date": date, "tags": tags, "mood_label": mood})
                 else:
                     raw_text = json.dumps(entry)
+                    source_hash = content_hash(raw_text)
+                    # Same short-circuit as handle_raw_entry: don't pay for cleaning an object seen before
+                    if source_hash in seen_sources or find_duplicate_source(db, raw_text):
+                        stats["duplicates"] += 1
+                        report("enriching", index + 1, total)
+                        continue
+                    seen_sources.add(source_hash)
                     fallback_date = raw_date or datetime.today().strftime("%Y-%m-%d")
                     prompt = f"Clean this journal entry and add context if needed. Date: {fallback_date}\n\n{raw_text}"
-                    cleaned = clean_text_with_ollama(prompt)
-
-                    if cleaned:
-                        tags = await auto_generate_tags(cleaned)
-                        mood = await detect_mood(cleaned)
-                        db_entry = add_entry(db, text=cleaned, date=datetime.today().date(), tags=tags, mood_label=mood)
-
-                        vector = embedder.embed(cleaned)
-                        vector_store.add_entry(
-                            vector,
-                            {
-                                "date": db_entry.date.isoformat(),
-                                "tags": tags,
-                                "mood": mood,
-                                "text": cleaned
-                            }
-                        )
-                        print(f"Cleaned malformed JSON entry via Ollama: {db_entry.date}, tags: {tags}, mood: {mood}")
+                    cleaned = await clean_text_with_ollama(prompt)
+
+                    existing = find_duplicate(db, cleaned, datetime.today().date()) if cleaned else None
+                    if existing:
+                        record_source_hash(db, existing, raw_text)
+                        stats["duplicates"] += 1
+                    elif cleaned:
+                        tags, mood = await enrich_entry(cleaned)
+                        batch.append({
+                            "text": cleaned, "date": datetime.today().date(), "tags": tags, "mood_label": mood,
+                            "source_hash": source_hash,
+                        })
+                        print(f"Cleaned malformed JSON entry via Ollama, tags: {tags}, mood: {mood}")
                     else:
                         print("Skipped invalid JSON object.")
 
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    report("embedding", index + 1, total)
+                    stats["entries"] += await flush_batch(batch, db)
+                    batch = []
+                report("enriching", index + 1, total)
+
+            if batch:
+                report("embedding", total, total)
+                stats["entries"] += await flush_batch(batch, db)
+
         # === Audio ===
         elif ext in VALID_AUDIO_TYPES:
             print("Transcribing audio...")
-            raw_text = transcribe_audio(str(path))
-            await handle_raw_entry(raw_text, db, embedder, vector_store, source="audio", file_path=str(path), online=online)
+            report("transcribing", 0, 1)
+            raw_text, stats["transcription"] = await asyncio.to_thread(transcribe_audio_with_stats, str(path))
+            stats["entries"] += await handle_raw_entry(raw_text, db, source="audio", file_path=str(path), online=online, progress=report)
 
         # === Image ===
         elif ext in VALID_IMAGE_TYPES:
             print("Extracting text from image...")
-            raw_text = extract_text_from_image(str(path))
-            await handle_raw_entry(raw_text, db, embedder, vector_store, source="image", file_path=str(path), online=online)
+            report("ocr", 0, 1)
+            raw_text = await asyncio.to_thread(extract_text_from_image, str(path))
+            stats["entries"] += await handle_raw_entry(raw_text, db, source="image", file_path=str(path), online=online, progress=report)
+
+        # === Batch of scanned pages ===
+        elif ext in VALID_ARCHIVE_TYPES:
+            print("Extracting text from scanned pages...")
+            report("ocr", 0, 1)
+            raw_text = await asyncio.to_thread(extract_text_from_zip, str(path))
+            stats["entries"] += await handle_raw_entry(raw_text, db, source="image", file_path=str(path), online=online, progress=report)
 
         # === Plain text ===
         else:
             print("Importing raw text...")
             with open(file_path, "r", encoding="utf-8") as f:
                 raw_text = f.read().strip()
-            await handle_raw_entry(raw_text, db, embedder, vector_store, source="text", file_path=str(path), online=online)
+            stats["entries"] += await handle_raw_entry(raw_text, db, source="text", file_path=str(path), online=online, progress=report)
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    if stats["seconds"]:
+        stats["entries_per_sec"] = round(stats["entries"] / stats["seconds"], 2)
+    print(f"Imported {stats['entries']} entries in {stats['seconds']}s ({stats['entries_per_sec']} entries/sec)")
+    return stats
+
 
-async def handle_raw_entry(raw_text, db, embedder, vector_store, source="text", file_path=None, online=True):
+async def flush_batch(batch, db) -> int:
+    """Write one batch: a single SQLite transaction, then one encode call and one bulk upsert."""
+    db_entries = add_entries(db, batch)
+    if not db_entries:
+        return 0
+    await sync_vectors()
+    print(f"Imported batch of {len(db_entries)} JSON entries")
+    return len(db_entries)
+
+
+async def sync_vectors():
+    """Embed what the last commit put in the outbox, so imported entries are searchable when the job ends."""
+    try:
+        await embedding_indexer.drain()
+    except Exception as e:
+        # Entries are safe in SQLite; the background indexer retries the outbox
+        print(f"Vector sync deferred: {e}")
+
+
+async def handle_raw_entry(raw_text, db, source="text", file_path=None, online=True, progress=None):
+    report = progress or _no_progress
     if not raw_text or not raw_text.strip():
         print("No content to process.")
-        return
+        return 0
 
-    today = datetime.today().strftime("%Y-%m-%d")
+    # Cleaning is a paid, non-deterministic LLM call whose prompt carries today's date,
+    # so re-uploads are recognized by their raw text before it runs
+    existing = find_duplicate_source(db, raw_text)
+    if existing:
+        print(f"Skipped {source} entry: already imported as entry {existing.id}")
+        return 0
+
+    entry_date = datetime.today().date()
+    today = entry_date.isoformat()
     cleaned = None
-    
+
+    report("cleaning", 0, 1)
     prompt = f"Clean this journal entry and output a readable reflection with date {today}:\n\n{raw_text.strip()}"
-    cleaned = clean_text_with_ollama(prompt)
+    cleaned = await clean_text_with_ollama(prompt)
 
     if not cleaned:
         print("Cleaning failed.")
-        return
+        return 0
 
-    tags = await auto_generate_tags(cleaned)
-    mood = await detect_mood(cleaned)
+    existing = find_duplicate(db, cleaned, entry_date)
+    if existing:
+        # Record where it came from anyway, so the next upload of this text skips cleaning
+        record_source_hash(db, existing, raw_text)
+        print(f"Skipped {source} entry: duplicate of entry {existing.id}")
+        return 0
+
+    report("enriching", 0, 1)
+    tags, mood = await enrich_entry(cleaned)
 
     db_entry = add_entry(
         db,
@@ -137,19 +216,12 @@ async def handle_raw_entry(raw_text, db, embedder, vector_store, source="text",
         date=today,
         source_type=source,
         tags=tags,
-        mood_label=mood
+        mood_label=mood,
+        source_hash=content_hash(raw_text)
     )
 
-    vector = embedder.embed(cleaned)
-    vector_store.add_entry(
-        vector,
-        {
-            "date": db_entry.date.isoformat(),
-            "source": source,
-            "tags": tags,
-            "mood": mood,
-            "text": cleaned
-        }
-    )
+    report("embedding", 0, 1)
+    await sync_vectors()
 
     print(f"Imported {source} entry for {today} with tags: {tags}, mood: {mood}")
+    return 1
@@ -1,9 +1,132 @@
-from faster_whisper import WhisperModel
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
 
 # Use "base", "small", "medium", "large-v2" etc.
-model = WhisperModel("base",device="cpu", compute_type="int8")
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", 5))
+
+# Recordings longer than this are split on silence and transcribed in parallel
+WHISPER_PARALLEL_MIN_SECONDS = float(os.getenv("WHISPER_PARALLEL_MIN_SECONDS", 300))
+WHISPER_CHUNK_SECONDS = float(os.getenv("WHISPER_CHUNK_SECONDS", 120))
+WHISPER_WORKERS = int(os.getenv("WHISPER_WORKERS", max(1, min(4, (os.cpu_count() or 2) // 2))))
+
+SAMPLE_RATE = 16000
+
+_model = None
+_model_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_whisper_model(cpu_threads: int = 0):
+    """Load the Whisper model on first use instead of at import time."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from faster_whisper import WhisperModel
+                _model = WhisperModel(
+                    WHISPER_MODEL_SIZE,
+                    device=WHISPER_DEVICE,
+                    compute_type=WHISPER_COMPUTE_TYPE,
+                    cpu_threads=cpu_threads,
+                )
+    return _model
+
+
+def _init_worker(cpu_threads: int):
+    # Each worker process owns its own model copy
+    get_whisper_model(cpu_threads=cpu_threads)
+
+
+def _transcribe_chunk(audio) -> str:
+    segments, _ = get_whisper_model().transcribe(audio, beam_size=WHISPER_BEAM_SIZE)
+    return " ".join(segment.text for segment in segments).strip()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                threads_per_worker = max(1, (os.cpu_count() or 1) // WHISPER_WORKERS)
+                # spawn: forking the API process would copy its threads' locks and a loaded model
+                _pool = ProcessPoolExecutor(
+                    max_workers=WHISPER_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(threads_per_worker,),
+                )
+    return _pool
+
+
+def split_on_speech(audio, max_chunk_seconds: float = WHISPER_CHUNK_SECONDS) -> List[Tuple[int, int]]:
+    """Group VAD speech regions into (start, end) sample ranges of at most max_chunk_seconds.
+
+    Cuts only fall in silence, so no word is split across two chunks.
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    speech = get_speech_timestamps(audio, VadOptions())
+    max_samples = int(max_chunk_seconds * SAMPLE_RATE)
+
+    chunks: List[Tuple[int, int]] = []
+    for region in speech:
+        if chunks and region["end"] - chunks[-1][0] <= max_samples:
+            chunks[-1] = (chunks[-1][0], region["end"])
+        else:
+            chunks.append((region["start"], region["end"]))
+    return chunks
+
+
+def transcribe_audio_with_stats(file_path: str) -> Tuple[str, Dict[str, Any]]:
+    """Transcribe a file and report its real-time factor (processing time / audio length)."""
+    from faster_whisper import decode_audio
+
+    started = time.perf_counter()
+    audio = decode_audio(file_path, sampling_rate=SAMPLE_RATE)
+    duration = len(audio) / SAMPLE_RATE
+
+    if duration >= WHISPER_PARALLEL_MIN_SECONDS and WHISPER_WORKERS > 1:
+        ranges = split_on_speech(audio)
+        # map() keeps results in submission order, so the transcript stays in sequence
+        parts = list(_get_pool().map(_transcribe_chunk, [audio[start:end] for start, end in ranges]))
+        transcript = " ".join(part for part in parts if part)
+        mode = "parallel"
+    else:
+        ranges = [(0, len(audio))]
+        transcript = _transcribe_chunk(audio)
+        mode = "single"
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "audio_seconds": round(duration, 2),
+        "processing_seconds": round(elapsed, 2),
+        "real_time_factor": round(elapsed / duration, 3) if duration else 0.0,
+        "chunks": len(ranges),
+        "mode": mode,
+        "model": WHISPER_MODEL_SIZE,
+    }
+    print(f"[Whisper] {file_path}: {duration:.1f}s audio in {elapsed:.1f}s (RTF {stats['real_time_factor']}, {mode})")
+    return transcript.strip(), stats
+
 
 def transcribe_audio(file_path: str) -> str:
-    segments, _ = model.transcribe(file_path, beam_size=5)
-    transcript = " ".join([segment.text for segment in segments])
-    return transcript.strip()
+    transcript, _ = transcribe_audio_with_stats(file_path)
+    return transcript
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
@@ -1,8 +1,45 @@
-from sentence_transformers import SentenceTransformer
+import os
+from typing import List, Optional
+
+from .model_registry import EMBEDDING_BACKEND, get_model
+from .query_cache import query_embedding_cache
+
+DEFAULT_EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+
 
 class Embedder:
-    def __init__(self, model_name="all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
+    """Thin handle over the shared model; cheap to construct per request."""
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL, backend: Optional[str] = None, threads: Optional[int] = None):
+        self.model_name = model_name
+        self.backend = (backend or EMBEDDING_BACKEND).lower()
+        self.model = get_model(model_name, backend=backend, threads=threads)
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
 
     def embed(self, text: str):
+        # SentenceTransformer.encode is safe to call from several threads for inference
         return self.model.encode(text).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """embed() for search queries: repeat and near-repeat questions come from the LRU cache."""
+        return query_embedding_cache.get_or_compute(self.model_name, self.backend, text, self.embed)
+
+    def embed_batch(self, texts: List[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> List[List[float]]:
+        """Encode many texts in one call so the model can batch them internally."""
+        if not texts:
+            return []
+        return self.model.encode(texts, batch_size=batch_size).tolist()
+
+
+def embedding_dimension(model_name: str = DEFAULT_EMBEDDING_MODEL) -> int:
+    """Vector size of the configured model; what the vector stores are created and checked with."""
+    return Embedder(model_name).dimension
+
+
+def warm_up(model_name: str = DEFAULT_EMBEDDING_MODEL):
+    """Load the model and run one encode so the first request doesn't pay for it."""
+    Embedder(model_name).embed("warm up")
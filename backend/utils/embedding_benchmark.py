@@ -0,0 +1,138 @@
+"""Compare embedding throughput across backends, batch sizes and thread counts.
+
+Encodes the same synthetic journal sentences with each combination and
+reports sentences/sec. For non-torch backends it also reports the mean
+cosine similarity to the torch vectors, which shows what int8 costs in
+accuracy.
+
+    python -m backend.utils.embedding_benchmark
+    python -m backend.utils.embedding_benchmark --backends torch,onnx-int8 --batch-sizes 16,64 --threads 2,4
+
+Pick the winner with EMBEDDING_BACKEND, EMBEDDING_BATCH_SIZE and EMBEDDING_THREADS.
+"""
+import sys
+import random
+import argparse
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .embedder import DEFAULT_EMBEDDING_MODEL
+from .model_registry import EMBEDDING_BACKENDS, get_model
+
+_OPENINGS = [
+    "Today I woke up feeling", "This morning felt", "After work I was", "Tonight I keep thinking about how I felt",
+    "I had coffee with Sam and came home", "The walk by the river left me", "During the meeting I was",
+]
+_FEELINGS = ["anxious", "calm", "grateful", "tired", "restless", "hopeful", "overwhelmed", "content", "lonely"]
+_DETAILS = [
+    "because the deadline is coming up faster than I expected.",
+    "and I noticed my shoulders were tense the whole afternoon.",
+    "even though nothing in particular went wrong.",
+    "so I called my sister and we talked for an hour about our parents.",
+    "and I want to remember to sleep earlier this week.",
+    "which reminded me of the summer we spent by the lake.",
+    "but writing this down already helps a little.",
+]
+
+
+def journal_sentences(count: int, seed: int = 3) -> List[str]:
+    """Short to paragraph-length texts, roughly like the chunks the indexer embeds."""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        sentences = [
+            f"{rng.choice(_OPENINGS)} {rng.choice(_FEELINGS)} {rng.choice(_DETAILS)}"
+            for _ in range(rng.choice([1, 1, 2, 3, 6]))
+        ]
+        texts.append(" ".join(sentences))
+    return texts
+
+
+@contextmanager
+def _torch_threads(threads: int):
+    """torch.set_num_threads is process-wide: apply it for one row only, then restore."""
+    try:
+        import torch
+    except ImportError:
+        yield
+        return
+    previous = torch.get_num_threads()
+    try:
+        if threads:
+            torch.set_num_threads(threads)
+        yield
+    finally:
+        torch.set_num_threads(previous)
+
+
+def bench_backend(model_name: str, backend: str, threads: int, batch_size: int, texts: List[str]) -> Dict[str, Any]:
+    # Loading a torch model with threads set changes the process-wide count too, so it goes inside
+    with _torch_threads(threads if backend == "torch" else 0):
+        started = time.perf_counter()
+        model = get_model(model_name, backend=backend, threads=threads)
+        load_seconds = time.perf_counter() - started
+
+        model.encode(texts[:batch_size], batch_size=batch_size)  # warm-up: lazy init, allocator, caches
+        started = time.perf_counter()
+        vectors = model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+        seconds = time.perf_counter() - started
+    return {
+        "backend": backend,
+        "threads": threads or "default",
+        "batch": batch_size,
+        "sentences_per_s": round(len(texts) / seconds, 1),
+        "load_s": round(load_seconds, 2),
+        "vectors": vectors,
+    }
+
+
+def print_table(rows: List[Dict[str, Any]]):
+    columns = [col for col in dict.fromkeys(key for row in rows for key in row) if col != "vectors"]
+    widths = {col: max(len(col), *(len(str(row.get(col, ""))) for row in rows)) for col in columns}
+    print("  ".join(col.ljust(widths[col]) for col in columns))
+    for row in rows:
+        print("  ".join(str(row.get(col, "")).ljust(widths[col]) for col in columns))
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL)
+    parser.add_argument("--backends", default=",".join(EMBEDDING_BACKENDS), help="comma-separated: torch, onnx, onnx-int8")
+    parser.add_argument("--batch-sizes", type=_int_list, default=[16, 32, 64])
+    parser.add_argument("--threads", type=_int_list, default=[0], help="comma-separated; 0 = library default")
+    parser.add_argument("--sentences", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    texts = journal_sentences(args.sentences)
+    print(f"Model '{args.model}', {len(texts)} texts")
+
+    rows, reference = [], None
+    for backend in [name.strip() for name in args.backends.split(",") if name.strip()]:
+        for threads in args.threads:
+            for batch_size in args.batch_sizes:
+                try:
+                    row = bench_backend(args.model, backend, threads, batch_size, texts)
+                except Exception as e:
+                    print(f"Skipping {backend}: {e}")
+                    break
+                if backend == "torch" and reference is None:
+                    reference = row["vectors"]
+                if reference is not None and backend != "torch":
+                    row["cosine_vs_torch"] = round(float(np.mean(np.sum(row["vectors"] * reference, axis=1))), 4)
+                rows.append(row)
+                print(f"  {backend} threads={threads or 'default'} batch={batch_size}: {row['sentences_per_s']} sentences/s")
+
+    if rows:
+        print_table(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+import re
+import hashlib
+import unicodedata
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for duplicate detection: NFKC, case-folded, single spaces."""
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", " ", text.casefold()).strip()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
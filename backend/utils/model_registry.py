@@ -0,0 +1,134 @@
+import os
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+load_dotenv()
+
+# "torch", "onnx" (ONNX Runtime) or "onnx-int8" (dynamically quantized ONNX weights)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 0))  # 0 = library default (all cores)
+# ONNX files inside the model repo/dir; sentence-transformers models on the Hub ship these prebuilt
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model.onnx")
+EMBEDDING_ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+_models: Dict[Tuple[str, str, int], "SentenceTransformer"] = {}
+_stats: Dict[Tuple[str, str, int], Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def _rss_mb() -> float:
+    """Current resident set size of this process in MB (0.0 where unsupported)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        # Second field is resident pages (Linux)
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return 0.0
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (0.0 where unsupported)."""
+    if resource is None:
+        return 0.0
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _onnx_kwargs(file_name: str, threads: int) -> Dict[str, Any]:
+    import onnxruntime
+
+    session_options = onnxruntime.SessionOptions()
+    if threads:
+        session_options.intra_op_num_threads = threads
+        session_options.inter_op_num_threads = 1
+    return {"file_name": file_name, "provider": "CPUExecutionProvider", "session_options": session_options}
+
+
+def _load(model_name: str, backend: str, threads: int) -> "SentenceTransformer":
+    # Imported here so modules that only touch the registry (indexer, search) load without torch
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        if threads:
+            import torch
+            torch.set_num_threads(threads)  # process-wide, like the torch default it replaces
+        return SentenceTransformer(model_name, device="cpu")
+    if backend == "onnx":
+        return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=_onnx_kwargs(EMBEDDING_ONNX_FILE, threads))
+    if backend == "onnx-int8":
+        try:
+            return SentenceTransformer(
+                model_name, device="cpu", backend="onnx", model_kwargs=_onnx_kwargs(EMBEDDING_ONNX_INT8_FILE, threads)
+            )
+        except Exception as e:
+            raise RuntimeError(
+                f"No quantized ONNX file '{EMBEDDING_ONNX_INT8_FILE}' for '{model_name}': {e}. "
+                "Create one with sentence_transformers.export_dynamic_quantized_onnx_model "
+                "and point EMBEDDING_MODEL / EMBEDDING_ONNX_INT8_FILE at it."
+            ) from e
+    raise ValueError(f"Unknown embedding backend '{backend}'; use one of {', '.join(EMBEDDING_BACKENDS)}")
+
+
+def get_model(model_name: str, backend: Optional[str] = None, threads: Optional[int] = None) -> "SentenceTransformer":
+    """Return the process-wide SentenceTransformer for `model_name`, loading it once per backend."""
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    threads = EMBEDDING_THREADS if threads is None else threads
+    key = (model_name, backend, threads)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        # Another thread may have finished loading while we waited
+        model = _models.get(key)
+        if model is not None:
+            return model
+
+        rss_before = _rss_mb()
+        started = time.perf_counter()
+        model = _load(model_name, backend, threads)
+        load_seconds = time.perf_counter() - started
+
+        _models[key] = model
+        _stats[key] = {
+            "model": model_name,
+            "backend": backend,
+            "threads": threads or None,
+            "dimension": model.get_sentence_embedding_dimension(),
+            "load_seconds": round(load_seconds, 3),
+            "rss_delta_mb": round(_rss_mb() - rss_before, 1),
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        print(f"[Embedder] Loaded '{model_name}' ({backend}) in {load_seconds:.2f}s")
+        return model
+
+
+def model_status() -> Dict[str, Any]:
+    return {
+        "loaded_models": list(_stats.values()),
+        "process_rss_mb": round(_rss_mb(), 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
@@ -0,0 +1,80 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .hashing import normalize_text
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 1024))  # 0 disables the cache
+
+
+def normalize_query(text: str) -> str:
+    """Duplicate-detection normal form, minus trailing punctuation ("why?" == "Why")."""
+    return re.sub(r"[\s?!.,;:]+$", "", normalize_text(text))
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU of query vectors keyed on (model name, embedding backend, normalized query).
+
+    The backend is part of the key because torch, ONNX and quantized ONNX
+    weights give slightly different vectors for the same model.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._vectors: "OrderedDict[Tuple[str, str, str], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model_name: str, backend: str, query: str) -> Optional[List[float]]:
+        key = (model_name, backend, normalize_query(query))
+        with self._lock:
+            vector = self._vectors.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._vectors.move_to_end(key)
+            self.hits += 1
+            return list(vector)
+
+    def set(self, model_name: str, backend: str, query: str, vector: List[float]):
+        if self.max_entries <= 0:
+            return
+        key = (model_name, backend, normalize_query(query))
+        with self._lock:
+            self._vectors[key] = list(vector)
+            self._vectors.move_to_end(key)
+            while len(self._vectors) > self.max_entries:
+                self._vectors.popitem(last=False)
+
+    def get_or_compute(
+        self, model_name: str, backend: str, query: str, compute: Callable[[str], List[float]]
+    ) -> List[float]:
+        """Cached vector for the query, or compute(query) outside the lock and remember it."""
+        vector = self.get(model_name, backend, query)
+        if vector is None:
+            vector = compute(query)
+            self.set(model_name, backend, query, vector)
+        return vector
+
+    def clear(self):
+        with self._lock:
+            self._vectors.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._vectors),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+query_embedding_cache = QueryEmbeddingCache()
@@ -1,4 +1,10 @@
-from typing import List
+from typing import List, Tuple
+
+def estimate_tokens(word: str) -> int:
+    """Token count of one word without a tokenizer: about four characters per
+    token plus one, which errs high for English in WordPiece and BPE vocabularies alike."""
+    return int(len(word) / 4) + 1
+
 
 def split_text_into_chunks(text: str, max_tokens: int = 1024) -> List[str]:
     words = text.split()
@@ -7,8 +13,7 @@ def split_text_into_chunks(text: str, max_tokens: int = 1024) -> List[str]:
     current_length = 0
 
     for word in words:
-        # Conservative estimate: 1 word ≈ 1.33 tokens
-        word_token_length = int(len(word) / 4) + 1
+        word_token_length = estimate_tokens(word)
         if current_length + word_token_length > max_tokens:
             chunks.append(' '.join(current_chunk))
             current_chunk = [word]
@@ -21,3 +26,46 @@ def split_text_into_chunks(text: str, max_tokens: int = 1024) -> List[str]:
         chunks.append(' '.join(current_chunk))
 
     return chunks
+
+
+def split_text_with_offsets(text: str, max_tokens: int = 200, overlap_tokens: int = 40) -> List[Tuple[int, str]]:
+    """Split into overlapping chunks, returning (character offset, chunk text) pairs.
+
+    Consecutive chunks share roughly `overlap_tokens` of trailing words so a
+    sentence cut at a boundary is still embedded whole in one of them.
+    """
+    words = []  # (offset, word)
+    position = 0
+    for word in text.split():
+        position = text.index(word, position)
+        words.append((position, word))
+        position += len(word)
+
+    if not words:
+        return []
+
+    chunks = []
+    start = 0
+    while start < len(words):
+        end = start
+        length = 0
+        while end < len(words) and (end == start or length + estimate_tokens(words[end][1]) <= max_tokens):
+            length += estimate_tokens(words[end][1])
+            end += 1
+
+        chunk_start = words[start][0]
+        chunk_end = words[end - 1][0] + len(words[end - 1][1])
+        chunks.append((chunk_start, text[chunk_start:chunk_end]))
+
+        if end >= len(words):
+            break
+
+        # Step back over the overlap, always moving forward at least one word
+        overlap = 0
+        next_start = end
+        while next_start - 1 > start and overlap + estimate_tokens(words[next_start - 1][1]) <= overlap_tokens:
+            next_start -= 1
+            overlap += estimate_tokens(words[next_start][1])
+        start = next_start
+
+    return chunks
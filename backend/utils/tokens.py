@@ -0,0 +1,77 @@
+import os
+import re
+import threading
+
+from dotenv import load_dotenv
+
+from .splitter import estimate_tokens
+
+load_dotenv()
+
+# Hugging Face tokenizer of the chat model (e.g. mistralai/Mistral-7B-Instruct-v0.2) for exact counts.
+# Empty estimates from word lengths; the embedding model's WordPiece vocabulary is not the chat model's.
+CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "")
+
+_tokenizer = None
+_tokenizer_loaded = False
+_tokenizer_lock = threading.Lock()
+
+
+def _load_tokenizer():
+    if not CONTEXT_TOKENIZER:
+        return None
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(CONTEXT_TOKENIZER)
+        print(f"[Tokens] Counting with '{CONTEXT_TOKENIZER}'")
+        return tokenizer
+    except Exception as e:
+        print(f"[Tokens] Could not load '{CONTEXT_TOKENIZER}', estimating from word lengths: {e}")
+        return None
+
+
+def get_tokenizer():
+    """The chat model's tokenizer for prompt budgets; None when counts are estimated."""
+    global _tokenizer, _tokenizer_loaded
+    if not _tokenizer_loaded:
+        with _tokenizer_lock:
+            if not _tokenizer_loaded:
+                _tokenizer = _load_tokenizer()
+                _tokenizer_loaded = True
+    return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return sum(estimate_tokens(word) for word in text.split())
+    # verbose=False: texts longer than the tokenizer's model window are fine for counting
+    return len(tokenizer.encode(text, add_special_tokens=False, verbose=False))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of `text` within max_tokens, cut at a word boundary."""
+    if max_tokens <= 0:
+        return ""
+    tokenizer = get_tokenizer()
+
+    if tokenizer is None or not getattr(tokenizer, "is_fast", False):
+        # No character offsets to cut at: add whole words until the budget is spent
+        kept, used = [], 0
+        for match in re.finditer(r"\S+", text):
+            used += estimate_tokens(match.group()) if tokenizer is None else count_tokens(" " + match.group())
+            if used > max_tokens:
+                return text[:kept[-1]] if kept else ""
+            kept.append(match.end())
+        return text
+
+    offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)["offset_mapping"]
+    if len(offsets) <= max_tokens:
+        return text
+    end = offsets[max_tokens - 1][1]
+    cut = text[:end]
+    if not text[end].isspace():
+        # The last kept token is part of a word that continues; drop the partial word
+        boundary = max(cut.rfind(" "), cut.rfind("\n"))
+        cut = cut[:boundary] if boundary > 0 else cut
+    return cut.rstrip()
@@ -0,0 +1,220 @@
+"""Compare Qdrant storage settings on a synthetic journal corpus.
+
+Builds a corpus of unit vectors clustered around topics (journal entries
+revisit the same themes), loads it into one throwaway collection per
+setting, and reports for each:
+
+  ram_mb_per_1m   estimated resident memory per million vectors
+  p50_ms / p99_ms search latency over the query set
+  recall@k        overlap with exact (brute-force) top-k
+
+The in-process exact search used as ground truth is reported as "numpy",
+which is also what VECTOR_BACKEND=numpy does.
+
+    python -m backend.vectorstore.benchmark --vectors 200000 --settings none,int8,binary
+    python -m backend.vectorstore.benchmark --on-disk --m 32 --ef-construct 200 --ef 128
+
+Needs a Qdrant server (QDRANT_HOST / QDRANT_PORT); embedded mode ignores
+quantization and HNSW and would only measure a flat scan.
+"""
+import os
+import sys
+import math
+import time
+import argparse
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from .qdrant_client import (
+    QDRANT_PREFER_GRPC,
+    QDRANT_HNSW_M,
+    QDRANT_HNSW_EF_CONSTRUCT,
+    QDRANT_SEARCH_EF,
+    collection_config,
+    search_params,
+    _client_kwargs,
+)
+
+DEFAULT_DIM = 384  # all-MiniLM-L6-v2
+QUANTIZED_BYTES = {"none": 0, "int8": 1.0, "binary": 1 / 8}   # per dimension
+
+
+def synthetic_corpus(count: int, dim: int = DEFAULT_DIM, topics: int = 64, seed: int = 7) -> np.ndarray:
+    """Unit vectors scattered around `topics` random centres."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((topics, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, topics, count)] + 0.9 * rng.standard_normal((count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def synthetic_queries(corpus: np.ndarray, count: int, seed: int = 11) -> np.ndarray:
+    """Perturbed corpus vectors: questions near, but not on, existing entries."""
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal((count, corpus.shape[1])).astype(np.float32) * (0.5 / math.sqrt(corpus.shape[1]))
+    queries = corpus[rng.integers(0, len(corpus), count)] + noise
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int, block: int = 100_000) -> np.ndarray:
+    """Brute-force cosine top-k ids per query, in corpus blocks to bound memory."""
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), k), dtype=np.int64)
+    for start in range(0, len(corpus), block):
+        scores = queries @ corpus[start:start + block].T
+        ids = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_ids = np.concatenate([best_ids, ids], axis=1)
+        top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(merged_scores, top, axis=1)
+        best_ids = np.take_along_axis(merged_ids, top, axis=1)
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best_ids, order, axis=1)
+
+
+def estimated_ram_mb_per_million(dim: int, quantization: str, on_disk: bool, hnsw_m: int) -> float:
+    """Full vectors (unless on disk) + quantized copy + HNSW level-0 links (2*m ids of 4 bytes)."""
+    per_vector = (0 if on_disk else dim * 4) + dim * QUANTIZED_BYTES[quantization] + 2 * hnsw_m * 4
+    return round(per_vector * 1_000_000 / 2 ** 20, 1)
+
+
+def _percentile_ms(latencies: List[float], percentile: float) -> float:
+    return round(float(np.percentile(latencies, percentile)) * 1000, 2)
+
+
+def _recall(found: List[List[int]], truth: np.ndarray, k: int) -> float:
+    hits = sum(len(set(ids) & set(truth_row[:k].tolist())) for ids, truth_row in zip(found, truth))
+    return round(hits / (len(found) * k), 4)
+
+
+def bench_numpy(corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int) -> Dict[str, Any]:
+    latencies, found = [], []
+    for query in queries:
+        started = time.perf_counter()
+        scores = corpus @ query
+        top = np.argpartition(-scores, k - 1)[:k]
+        found.append(top[np.argsort(-scores[top])].tolist())
+        latencies.append(time.perf_counter() - started)
+    return {
+        "setting": "numpy",
+        "ram_mb_per_1m": round(corpus.shape[1] * 4 * 1_000_000 / 2 ** 20, 1),
+        "p50_ms": _percentile_ms(latencies, 50),
+        "p99_ms": _percentile_ms(latencies, 99),
+        f"recall@{k}": _recall(found, truth, k),
+    }
+
+
+def _wait_until_indexed(client, name: str, timeout: float = 1800):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if str(client.get_collection(name).status).lower().endswith("green"):
+            return
+        time.sleep(1)
+    raise TimeoutError(f"Collection {name} still optimizing after {timeout}s")
+
+
+def bench_qdrant(
+    client,
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    k: int,
+    quantization: str,
+    on_disk: bool,
+    hnsw_m: int,
+    hnsw_ef_construct: int,
+    hnsw_ef: Optional[int],
+    keep: bool = False,
+) -> Dict[str, Any]:
+    name = f"benchmark_{quantization}_{'disk' if on_disk else 'ram'}_m{hnsw_m}"
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(
+        collection_name=name,
+        **collection_config(
+            corpus.shape[1], quantization=quantization, on_disk=on_disk,
+            hnsw_m=hnsw_m, hnsw_ef_construct=hnsw_ef_construct,
+        ),
+    )
+
+    started = time.perf_counter()
+    client.upload_collection(collection_name=name, vectors=corpus, ids=range(len(corpus)), batch_size=1024, wait=True)
+    _wait_until_indexed(client, name)
+    build_seconds = time.perf_counter() - started
+
+    params = search_params(quantization=quantization, hnsw_ef=hnsw_ef)
+    latencies, found = [], []
+    for query in queries:
+        started = time.perf_counter()
+        points = client.query_points(
+            collection_name=name, query=query.tolist(), limit=k, search_params=params, with_payload=False
+        ).points
+        latencies.append(time.perf_counter() - started)
+        found.append([point.id for point in points])
+
+    if not keep:
+        client.delete_collection(name)
+    return {
+        "setting": f"{quantization}{' on_disk' if on_disk else ''}",
+        "ram_mb_per_1m": estimated_ram_mb_per_million(corpus.shape[1], quantization, on_disk, hnsw_m),
+        "p50_ms": _percentile_ms(latencies, 50),
+        "p99_ms": _percentile_ms(latencies, 99),
+        f"recall@{k}": _recall(found, truth, k),
+        "build_s": round(build_seconds, 1),
+    }
+
+
+def print_table(rows: List[Dict[str, Any]]):
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    widths = {col: max(len(col), *(len(str(row.get(col, ""))) for row in rows)) for col in columns}
+    print("  ".join(col.ljust(widths[col]) for col in columns))
+    for row in rows:
+        print("  ".join(str(row.get(col, "")).ljust(widths[col]) for col in columns))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM, help="vector size of the embedding model")
+    parser.add_argument("--settings", default="none,int8,binary", help="comma-separated quantization modes")
+    parser.add_argument("--on-disk", action="store_true", help="keep full vectors on disk")
+    parser.add_argument("--m", type=int, default=QDRANT_HNSW_M, help="HNSW m")
+    parser.add_argument("--ef-construct", type=int, default=QDRANT_HNSW_EF_CONSTRUCT, help="HNSW ef_construct")
+    parser.add_argument("--ef", type=int, default=QDRANT_SEARCH_EF or None, help="HNSW ef at search time")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark collections")
+    args = parser.parse_args(argv)
+
+    print(f"Corpus: {args.vectors} x {args.dim}, {args.queries} queries, k={args.k}")
+    corpus = synthetic_corpus(args.vectors, args.dim)
+    queries = synthetic_queries(corpus, args.queries)
+    truth = exact_top_k(corpus, queries, args.k)
+
+    rows = [bench_numpy(corpus, queries, truth, args.k)]
+    # A plain client: the app's store would load the embedding model and set up journal_entries
+    client = QdrantClient(**_client_kwargs(
+        os.getenv("QDRANT_HOST", "localhost"), int(os.getenv("QDRANT_PORT", 6333)), QDRANT_PREFER_GRPC
+    ))
+    try:
+        client.get_collections()
+    except Exception as e:
+        print_table(rows)
+        print(f"Qdrant unreachable, only the numpy baseline was measured: {e}")
+        return 1
+    for quantization in [mode.strip() for mode in args.settings.split(",") if mode.strip()]:
+        print(f"Building '{quantization}'...")
+        rows.append(bench_qdrant(
+            client, corpus, queries, truth, args.k, quantization,
+            on_disk=args.on_disk, hnsw_m=args.m, hnsw_ef_construct=args.ef_construct,
+            hnsw_ef=args.ef, keep=args.keep,
+        ))
+    print_table(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
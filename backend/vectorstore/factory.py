@@ -0,0 +1,47 @@
+import os
+import threading
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from ..utils.embedder import embedding_dimension
+from . import qdrant_client
+from .numpy_store import NumpyVectorStore, AsyncNumpyVectorStore
+
+load_dotenv()
+
+# "qdrant" (server, default) or "numpy" (in-process index under NUMPY_INDEX_DIR)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant").lower()
+
+_numpy_store: Optional[NumpyVectorStore] = None
+_numpy_lock = threading.Lock()
+
+
+def _get_numpy_store() -> NumpyVectorStore:
+    global _numpy_store
+    if _numpy_store is None:
+        with _numpy_lock:
+            if _numpy_store is None:
+                _numpy_store = NumpyVectorStore(dim=embedding_dimension())
+    return _numpy_store
+
+
+def get_vector_store():
+    """Process-wide sync store for the configured backend."""
+    if VECTOR_BACKEND == "numpy":
+        return _get_numpy_store()
+    return qdrant_client.get_vector_store()
+
+
+def get_async_vector_store():
+    if VECTOR_BACKEND == "numpy":
+        return AsyncNumpyVectorStore(_get_numpy_store())
+    return qdrant_client.get_async_vector_store()
+
+
+async def close_vector_stores():
+    global _numpy_store
+    if _numpy_store is not None:
+        _numpy_store.close()
+        _numpy_store = None
+    await qdrant_client.close_vector_stores()
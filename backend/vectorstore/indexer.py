@@ -0,0 +1,82 @@
+import os
+import uuid
+import asyncio
+from typing import Any, Dict, List
+
+from ..utils.splitter import split_text_with_offsets
+from ..db.models import parse_tags
+
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", 200))   # MiniLM truncates at 256 word pieces
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", 40))
+# Chunks fetched per requested entry before grouping hits back to entries
+CHUNK_OVERFETCH = int(os.getenv("CHUNK_OVERFETCH", 4))
+
+# Fixed namespace so a chunk's point id is stable across runs and processes
+POINT_NAMESPACE = uuid.UUID("6f1c3a52-7d0e-4b8e-9a57-2b1f0c9d4e11")
+
+
+def chunk_point_id(entry_id: int, chunk_index: int) -> str:
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{entry_id}:{chunk_index}"))
+
+
+def chunk_entry(entry) -> List[Dict[str, Any]]:
+    """Split one JournalEntry into chunk records ready to embed."""
+    return [
+        {
+            "id": chunk_point_id(entry.id, index),
+            "text": chunk_text,
+            "payload": {
+                "entry_id": entry.id,
+                "chunk_index": index,
+                "offset": offset,
+                "date": entry.date.isoformat(),
+                # Lowercase like SearchFilters, so filters match "Happy" as "happy"
+                "source": (entry.source_type or "").strip().lower(),
+                "tags": parse_tags(entry.tags),
+                "mood": (entry.mood_label or "").strip().lower(),
+                "text": chunk_text,
+            },
+        }
+        for index, (offset, chunk_text) in enumerate(
+            split_text_with_offsets(entry.text, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS)
+        )
+    ]
+
+
+async def sync_entries(entries, deleted_ids, embedder, vector_store) -> int:
+    """Bring the vector store in line with SQLite for these entries.
+
+    Current chunks are upserted under their deterministic ids, then chunks
+    left over from a longer earlier version, and every chunk of a deleted
+    entry, are removed.
+    """
+    chunks = [chunk for entry in entries for chunk in chunk_entry(entry)]
+    if chunks:
+        vectors = await asyncio.to_thread(embedder.embed_batch, [chunk["text"] for chunk in chunks])
+        await vector_store.batch_add_entries([
+            {"id": chunk["id"], "vector": vector, "payload": chunk["payload"]}
+            for chunk, vector in zip(chunks, vectors)
+        ])
+
+    keep = {entry_id: 0 for entry_id in list(deleted_ids) + [entry.id for entry in entries]}
+    for chunk in chunks:
+        entry_id = chunk["payload"]["entry_id"]
+        keep[entry_id] = max(keep.get(entry_id, 0), chunk["payload"]["chunk_index"] + 1)
+    await vector_store.delete_stale_chunks(keep)
+    return len(chunks)
+
+
+def group_hits_by_entry(points, top_k: int) -> List[Any]:
+    """Collapse chunk hits to the best-scoring chunk per entry, keeping rank order.
+
+    Points written before chunking have no entry_id and stand on their own.
+    """
+    best = {}
+    for point in points:
+        payload = point.payload or {}
+        key = payload.get("entry_id", f"point:{point.id}")
+        if key not in best:
+            best[key] = point
+            if len(best) >= top_k:
+                break
+    return list(best.values())
@@ -0,0 +1,429 @@
+import os
+import json
+import uuid
+import asyncio
+import threading
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Union
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .indexer import CHUNK_OVERFETCH, group_hits_by_entry
+from ..search.filters import SearchFilters
+from ..db.models import parse_tags
+
+load_dotenv()
+
+NUMPY_INDEX_DIR = os.getenv("NUMPY_INDEX_DIR", "./data/vectors")
+NUMPY_INDEX_DTYPE = os.getenv("NUMPY_INDEX_DTYPE", "float32")  # "float32" or "float16" (half the disk and RAM)
+
+_INITIAL_CAPACITY = 1024
+# Rewrite the files without deleted rows once they are this share of all rows (and at least _INITIAL_CAPACITY)
+_COMPACT_DEAD_FRACTION = 0.25
+
+# On-disk layout, all inside NUMPY_INDEX_DIR:
+#   vectors*.npy     (capacity, dim) matrix of unit-length rows, memory-mapped
+#   payloads*.jsonl  append-only {"row", "id", "payload"} records; the last record for a row wins,
+#                    a null payload marks a deleted row
+#   meta.json        dim, dtype, capacity, number of rows in use and the names of the two files above;
+#                    compaction writes new files and switches to them by replacing meta.json
+
+
+class ScoredHit(NamedTuple):
+    """Same shape as the Qdrant ScoredPoint fields the rest of the app reads."""
+    id: str
+    score: float
+    payload: Dict[str, Any]
+    vector: Optional[List[float]] = None
+
+
+class NumpyVectorStore:
+    """In-process vector index: exact cosine search over a memory-mapped matrix.
+
+    Drop-in for QdrantVectorStore where no Qdrant server is available. Rows are
+    normalized on insert so cosine similarity is a single matrix-vector product.
+    The filtered payload fields are mirrored in arrays (date ordinal, mood and
+    source codes, rows per tag), so filter masks are array operations too.
+    """
+
+    def __init__(self, path: Optional[str] = None, dim: Optional[int] = None, dtype: Optional[str] = None):
+        self.path = Path(path or NUMPY_INDEX_DIR)
+        self.dim = dim
+        self.dtype = np.dtype(dtype or NUMPY_INDEX_DTYPE)
+        self._lock = threading.RLock()
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    # ----- storage -----
+
+    @property
+    def _matrix_path(self) -> Path:
+        return self.path / self._matrix_name
+
+    @property
+    def _payload_path(self) -> Path:
+        return self.path / self._payload_name
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.path / "meta.json"
+
+    def _load(self):
+        self._ids: List[str] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._count = 0
+        self._matrix_name, self._payload_name = "vectors.npy", "payloads.jsonl"
+
+        # Identity of the directory we loaded; a re-index swaps in a new one under the same name
+        self._dir_inode = self.path.stat().st_ino
+        if not self._meta_path.exists():
+            self._create(_INITIAL_CAPACITY)
+            return
+
+        meta = json.loads(self._meta_path.read_text())
+        if self.dim and meta["dim"] != self.dim:
+            raise ValueError(
+                f"Index at '{self.path}' stores {meta['dim']}-dimensional vectors, expected {self.dim}; "
+                "rebuild it with python -m backend.vectorstore.reindex"
+            )
+        self.dim = meta["dim"]
+        self.dtype = np.dtype(meta["dtype"])
+        self._count = meta["count"]
+        self._matrix_name = meta.get("matrix", self._matrix_name)
+        self._payload_name = meta.get("payloads", self._payload_name)
+        self._matrix = np.load(self._matrix_path, mmap_mode="r+")
+
+        self._ids = [""] * self._count
+        self._payloads = [{}] * self._count
+        records = 0
+        if self._payload_path.exists():
+            with open(self._payload_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    records += 1
+                    if record["row"] < self._count:
+                        self._ids[record["row"]] = record["id"]
+                        self._payloads[record["row"]] = record["payload"]
+        self._rows = {
+            point_id: row for row, point_id in enumerate(self._ids) if self._payloads[row] is not None
+        }
+        self._build_fields()
+
+        if self._maybe_compact():
+            return
+        # Overwrites only ever append; drop the superseded records once they dominate
+        if records > 2 * self._count + _INITIAL_CAPACITY:
+            self._compact_payloads()
+
+    def _compact_payloads(self):
+        tmp_path = self._payload_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for row, (point_id, payload) in enumerate(zip(self._ids, self._payloads)):
+                f.write(json.dumps({"row": row, "id": point_id, "payload": payload}) + "\n")
+        os.replace(tmp_path, self._payload_path)
+
+    def _create(self, capacity: int):
+        if not self.dim:
+            from ..utils.embedder import embedding_dimension
+            self.dim = embedding_dimension()
+        self._matrix = np.lib.format.open_memmap(
+            self._matrix_path, mode="w+", dtype=self.dtype, shape=(capacity, self.dim)
+        )
+        self._payload_path.write_text("")
+        self._build_fields()
+        self._write_meta()
+
+    def _write_meta(self):
+        tmp_path = self._meta_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({
+            "dim": self.dim,
+            "dtype": self.dtype.name,
+            "capacity": self._matrix.shape[0],
+            "count": self._count,
+            "matrix": self._matrix_name,
+            "payloads": self._payload_name,
+        }))
+        os.replace(tmp_path, self._meta_path)
+
+    # ----- filter fields -----
+
+    def _build_fields(self):
+        capacity = self._matrix.shape[0]
+        self._live = np.zeros(capacity, dtype=bool)
+        self._day = np.zeros(capacity, dtype=np.int32)          # date.toordinal(); 0 = no date
+        self._mood = np.full(capacity, -1, dtype=np.int32)      # index into _codes["mood"]; -1 = none
+        self._source = np.full(capacity, -1, dtype=np.int32)
+        self._codes: Dict[str, Dict[str, int]] = {"mood": {}, "source": {}}
+        self._tag_rows: Dict[str, Set[int]] = defaultdict(set)
+        for row, payload in enumerate(self._payloads):
+            self._index_fields(row, payload)
+
+    def _grow_fields(self, capacity: int):
+        extra = capacity - len(self._live)
+        self._live = np.concatenate([self._live, np.zeros(extra, dtype=bool)])
+        self._day = np.concatenate([self._day, np.zeros(extra, dtype=np.int32)])
+        self._mood = np.concatenate([self._mood, np.full(extra, -1, dtype=np.int32)])
+        self._source = np.concatenate([self._source, np.full(extra, -1, dtype=np.int32)])
+
+    def _code(self, field: str, value: Optional[str]) -> int:
+        if not value:
+            return -1
+        codes = self._codes[field]
+        return codes.setdefault(value.lower(), len(codes))
+
+    def _index_fields(self, row: int, payload: Optional[Dict[str, Any]]):
+        self._live[row] = payload is not None
+        if payload is None:
+            return
+        try:
+            self._day[row] = date.fromisoformat(payload.get("date") or "").toordinal()
+        except ValueError:
+            self._day[row] = 0
+        self._mood[row] = self._code("mood", payload.get("mood"))
+        self._source[row] = self._code("source", payload.get("source"))
+        tags = payload.get("tags") or []
+        if isinstance(tags, str):  # points indexed before tags became a list
+            tags = parse_tags(tags)
+        for tag in tags:
+            self._tag_rows[tag].add(row)
+
+    def _unindex_fields(self, row: int, payload: Optional[Dict[str, Any]]):
+        self._live[row] = False
+        tags = (payload or {}).get("tags") or []
+        if isinstance(tags, str):
+            tags = parse_tags(tags)
+        for tag in tags:
+            self._tag_rows[tag].discard(row)
+
+    def _grow(self, needed: int):
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        tmp_path = self.path / "vectors.tmp.npy"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=self.dtype, shape=(capacity, self.dim))
+        grown[:self._matrix.shape[0]] = self._matrix
+        grown.flush()
+        del grown
+        del self._matrix  # release the old mapping before replacing its file
+        os.replace(tmp_path, self._matrix_path)
+        self._matrix = np.load(self._matrix_path, mmap_mode="r+")
+        self._grow_fields(capacity)
+
+    def _maybe_compact(self) -> bool:
+        dead = self._count - int(self._live[:self._count].sum())
+        if dead < _INITIAL_CAPACITY or dead <= _COMPACT_DEAD_FRACTION * self._count:
+            return False
+        self._compact()
+        return True
+
+    def _compact(self):
+        """Rewrite the matrix and payloads with live rows only, renumbering them.
+
+        New files are written under fresh names and meta.json is replaced last,
+        so a crash midway leaves the previous files in use.
+        """
+        live_rows = np.flatnonzero(self._live[:self._count])
+        capacity = _INITIAL_CAPACITY
+        while capacity < len(live_rows):
+            capacity *= 2
+        suffix = uuid.uuid4().hex[:8]
+        matrix_name, payload_name = f"vectors.{suffix}.npy", f"payloads.{suffix}.jsonl"
+
+        matrix = np.lib.format.open_memmap(
+            self.path / matrix_name, mode="w+", dtype=self.dtype, shape=(capacity, self.dim)
+        )
+        for start in range(0, len(live_rows), 65536):
+            block = live_rows[start:start + 65536]
+            matrix[start:start + len(block)] = self._matrix[block]
+        matrix.flush()
+        ids = [self._ids[row] for row in live_rows]
+        payloads = [self._payloads[row] for row in live_rows]
+        with open(self.path / payload_name, "w", encoding="utf-8") as f:
+            for row, (point_id, payload) in enumerate(zip(ids, payloads)):
+                f.write(json.dumps({"row": row, "id": point_id, "payload": payload}) + "\n")
+
+        old_files = [self._matrix_path, self._payload_path]
+        dropped = self._count - len(live_rows)
+        del self._matrix
+        self._matrix, self._matrix_name, self._payload_name = matrix, matrix_name, payload_name
+        self._ids, self._payloads, self._count = ids, payloads, len(ids)
+        self._rows = {point_id: row for row, point_id in enumerate(ids)}
+        self._build_fields()
+        self._write_meta()
+        for old_file in old_files:
+            old_file.unlink(missing_ok=True)
+        print(f"[NumpyStore] Compacted '{self.path}': dropped {dropped} deleted rows, {self._count} remain")
+
+    # ----- QdrantVectorStore interface -----
+
+    def reset(self):
+        """Deletes all vectors and payloads"""
+        with self._lock:
+            del self._matrix
+            self._ids, self._payloads, self._rows, self._count = [], [], {}, 0
+            self._dir_inode = self.path.stat().st_ino
+            self._create(_INITIAL_CAPACITY)
+        print(f"[NumpyStore] Reset index at '{self.path}'")
+
+    def _check_not_replaced(self):
+        # Writing now would mix this index's row numbers into the new index's files
+        if self.path.stat().st_ino != self._dir_inode:
+            raise RuntimeError(f"Index at '{self.path}' was replaced by a re-index; restart the API to load it")
+
+    def add_entry(self, vector: List[float], payload: Dict[str, Any], point_id: Optional[str] = None):
+        self.batch_add_entries([{"id": point_id or str(uuid.uuid4()), "vector": vector, "payload": payload}])
+
+    def batch_add_entries(self, entries: List[Dict[str, Any]]):
+        """entries: list of {'vector': [...], 'payload': {...}, 'id': Optional[str]}; same id overwrites"""
+        if not entries:
+            return
+        vectors = np.asarray([entry["vector"] for entry in entries], dtype=np.float32)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            self._check_not_replaced()
+            rows = []
+            for entry in entries:
+                point_id = str(entry.get("id") or uuid.uuid4())
+                row = self._rows.get(point_id)
+                if row is None:
+                    row = self._count
+                    self._count += 1
+                    self._rows[point_id] = row
+                    self._ids.append(point_id)
+                    self._payloads.append(entry["payload"])
+                else:
+                    self._unindex_fields(row, self._payloads[row])
+                    self._payloads[row] = entry["payload"]
+                rows.append((row, point_id, entry["payload"]))
+
+            self._grow(self._count)
+            for row, _, payload in rows:
+                self._index_fields(row, payload)
+            self._matrix[[row for row, _, _ in rows]] = vectors.astype(self.dtype)
+            self._matrix.flush()
+            with open(self._payload_path, "a", encoding="utf-8") as f:
+                for row, point_id, payload in rows:
+                    f.write(json.dumps({"row": row, "id": point_id, "payload": payload}) + "\n")
+            self._write_meta()
+
+    def delete_stale_chunks(self, keep: Dict[int, int]):
+        """keep: entry_id -> number of chunks still current (0 removes the entry)"""
+        if not keep:
+            return
+        with self._lock:
+            self._check_not_replaced()
+            stale = [
+                row for row, payload in enumerate(self._payloads)
+                if payload is not None
+                and payload.get("entry_id") in keep
+                and payload.get("chunk_index", 0) >= keep[payload["entry_id"]]
+            ]
+            if not stale:
+                return
+            with open(self._payload_path, "a", encoding="utf-8") as f:
+                for row in stale:
+                    self._rows.pop(self._ids[row], None)
+                    self._unindex_fields(row, self._payloads[row])
+                    self._payloads[row] = None
+                    f.write(json.dumps({"row": row, "id": self._ids[row], "payload": None}) + "\n")
+            self._maybe_compact()
+
+    def _codes_mask(self, field: str, column: np.ndarray, values: List[str]) -> np.ndarray:
+        codes = [self._codes[field][value] for value in values if value in self._codes[field]]
+        return np.isin(column[:self._count], codes)
+
+    def _filter_mask(self, filters: Union[SearchFilters, Dict[str, Any], None]) -> np.ndarray:
+        """Same semantics as SearchFilters.matches, evaluated on the field arrays."""
+        mask = self._live[:self._count].copy()
+        if isinstance(filters, SearchFilters):
+            day = self._day[:self._count]
+            if filters.date_from:
+                mask &= day >= filters.date_from.toordinal()
+            if filters.date_to:
+                mask &= (day > 0) & (day <= filters.date_to.toordinal())
+            if filters.moods:
+                mask &= self._codes_mask("mood", self._mood, filters.moods)
+            if filters.sources:
+                mask &= self._codes_mask("source", self._source, filters.sources)
+            if filters.tags:
+                tagged = np.zeros(self._count, dtype=bool)
+                for tag in filters.normalized_tags():
+                    rows = self._tag_rows.get(tag)
+                    if rows:
+                        tagged[np.fromiter(rows, dtype=np.int64, count=len(rows))] = True
+                mask &= tagged
+        elif filters:
+            # Arbitrary payload equality; only old callers pass dicts
+            for row in np.flatnonzero(mask):
+                payload = self._payloads[row]
+                mask[row] = all(payload.get(key) == value for key, value in filters.items())
+        return mask
+
+    def search(self, query_vector: List[float], top_k: int = 3, filters: Union[SearchFilters, Dict[str, str], None] = None, with_vectors: bool = False):
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        with self._lock:
+            if not self._count:
+                return []
+            scores = np.asarray(self._matrix[:self._count], dtype=np.float32) @ query
+            scores = np.where(self._filter_mask(filters), scores, -np.inf)
+
+            k = min(top_k, self._count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [
+                ScoredHit(
+                    id=self._ids[row],
+                    score=float(scores[row]),
+                    payload=self._payloads[row],
+                    vector=self._matrix[row].astype(np.float32).tolist() if with_vectors else None,
+                )
+                for row in top
+                if scores[row] != -np.inf
+            ]
+
+    def search_entries(self, query_vector: List[float], top_k: int = 3, filters: Union[SearchFilters, Dict[str, str], None] = None, with_vectors: bool = False):
+        points = self.search(query_vector, top_k=top_k * CHUNK_OVERFETCH, filters=filters, with_vectors=with_vectors)
+        return group_hits_by_entry(points, top_k)
+
+    def close(self):
+        with self._lock:
+            self._matrix.flush()
+
+
+class AsyncNumpyVectorStore:
+    """Async face of a NumpyVectorStore, matching AsyncQdrantVectorStore."""
+
+    def __init__(self, store: NumpyVectorStore):
+        self.store = store
+
+    async def add_entry(self, vector: List[float], payload: Dict[str, Any], point_id: Optional[str] = None):
+        await asyncio.to_thread(self.store.add_entry, vector, payload, point_id)
+
+    async def batch_add_entries(self, entries: List[Dict[str, Any]]):
+        await asyncio.to_thread(self.store.batch_add_entries, entries)
+
+    async def delete_stale_chunks(self, keep: Dict[int, int]):
+        await asyncio.to_thread(self.store.delete_stale_chunks, keep)
+
+    async def search(self, query_vector: List[float], top_k: int = 3, filters: Union[SearchFilters, Dict[str, str], None] = None, with_vectors: bool = False):
+        return await asyncio.to_thread(self.store.search, query_vector, top_k, filters, with_vectors)
+
+    async def search_entries(self, query_vector: List[float], top_k: int = 3, filters: Union[SearchFilters, Dict[str, str], None] = None, with_vectors: bool = False):
+        return await asyncio.to_thread(self.store.search_entries, query_vector, top_k, filters, with_vectors)
+
+    async def close(self):
+        self.store.close()
@@ -1,43 +1,254 @@
 import uuid
-from typing import Optional, List, Dict, Any
-from qdrant_client import QdrantClient
+import asyncio
+import threading
+from datetime import datetime, time
+from typing import Optional, List, Dict, Any, Union
+from qdrant_client import QdrantClient, AsyncQdrantClient
 from qdrant_client.models import (
     VectorParams,
     Distance,
     PointStruct,
     Filter,
     FieldCondition,
-    MatchValue
+    MatchValue,
+    MatchAny,
+    DatetimeRange,
+    Range,
+    FilterSelector,
+    PayloadSchemaType,
+    DeleteAliasOperation,
+    DeleteAlias,
+    HnswConfigDiff,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    QuantizationSearchParams,
+    SearchParams
 )
 import os
 from dotenv import load_dotenv
 
+from .indexer import CHUNK_OVERFETCH, group_hits_by_entry
+from ..search.filters import SearchFilters
+
 load_dotenv()
 
+# Either a real collection or, after a re-index, an alias to the current one
 COLLECTION_NAME = "journal_entries"
 
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() in ("1", "true", "yes")
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", 6334))
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", 10))
+
+# Storage layout for new collections (reset or re-index); existing ones keep theirs.
+# Compare settings with: python -m backend.vectorstore.benchmark
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none").lower()   # "none", "int8" or "binary"
+QDRANT_ON_DISK = os.getenv("QDRANT_ON_DISK", "false").lower() in ("1", "true", "yes")  # full vectors on disk
+QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M", 16))
+QDRANT_HNSW_EF_CONSTRUCT = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", 100))
+QDRANT_SEARCH_EF = int(os.getenv("QDRANT_SEARCH_EF", 0))                  # 0 = server default
+QDRANT_OVERSAMPLING = float(os.getenv("QDRANT_OVERSAMPLING", 2.0))        # quantized candidates rescored per hit
+
+# Payload fields that search filters on; indexed so filtered search is not a scan
+PAYLOAD_INDEXES = {
+    "date": PayloadSchemaType.DATETIME,
+    "mood": PayloadSchemaType.KEYWORD,
+    "tags": PayloadSchemaType.KEYWORD,
+    "source": PayloadSchemaType.KEYWORD,
+    "entry_id": PayloadSchemaType.INTEGER,
+}
+
+# Collections already verified by this process, keyed by (host, port, collection)
+_ensured_collections = set()
+
+
+def _client_kwargs(host: str, port: int, prefer_grpc: bool) -> Dict[str, Any]:
+    return {
+        "host": host,
+        "port": port,
+        "grpc_port": QDRANT_GRPC_PORT,
+        "prefer_grpc": prefer_grpc,
+        "timeout": QDRANT_TIMEOUT,
+    }
+
+
+def _build_filter(filters: Union[SearchFilters, Dict[str, str], None]) -> Optional[Filter]:
+    if not filters:
+        return None
+    if isinstance(filters, dict):
+        return Filter(
+            must=[
+                FieldCondition(key=key, match=MatchValue(value=value))
+                for key, value in filters.items()
+            ]
+        )
+    if filters.is_empty():
+        return None
+
+    conditions = []
+    if filters.date_from or filters.date_to:
+        conditions.append(FieldCondition(key="date", range=DatetimeRange(
+            gte=datetime.combine(filters.date_from, time.min) if filters.date_from else None,
+            lte=datetime.combine(filters.date_to, time.max) if filters.date_to else None,
+        )))
+    if filters.moods:
+        conditions.append(FieldCondition(key="mood", match=MatchAny(any=filters.moods)))
+    if filters.tags:
+        conditions.append(FieldCondition(key="tags", match=MatchAny(any=filters.normalized_tags())))
+    if filters.sources:
+        conditions.append(FieldCondition(key="source", match=MatchAny(any=filters.sources)))
+    return Filter(must=conditions)
+
+
+def _stale_chunks_filter(keep: Dict[int, int]) -> Filter:
+    """Points of the given entries whose chunk_index is at or past the count to keep."""
+    conditions = []
+    for entry_id, count in keep.items():
+        entry_condition = FieldCondition(key="entry_id", match=MatchValue(value=entry_id))
+        if count:
+            conditions.append(Filter(must=[entry_condition, FieldCondition(key="chunk_index", range=Range(gte=count))]))
+        else:
+            conditions.append(entry_condition)
+    return Filter(should=conditions)
+
+
+def _missing_payload_indexes(payload_schema: Dict[str, Any]) -> Dict[str, PayloadSchemaType]:
+    return {field: schema for field, schema in PAYLOAD_INDEXES.items() if field not in payload_schema}
+
+
+def _alias_target(aliases_response, alias: str) -> Optional[str]:
+    for alias_description in aliases_response.aliases:
+        if alias_description.alias_name == alias:
+            return alias_description.collection_name
+    return None
+
+
+def resolve_alias(client: QdrantClient, alias: str = COLLECTION_NAME) -> Optional[str]:
+    """Collection the alias points to, or None when `alias` is not an alias."""
+    return _alias_target(client.get_aliases(), alias)
+
+
+def vector_size() -> int:
+    """Dimension of the configured embedding model (loads it if needed)."""
+    from ..utils.embedder import embedding_dimension
+    return embedding_dimension()
+
+
+def check_vector_size(collection_info, collection_name: str = COLLECTION_NAME):
+    """Refuse to write a model's vectors into a collection built for another dimension."""
+    params = collection_info.config.params.vectors
+    actual = params.size if isinstance(params, VectorParams) else None
+    expected = vector_size()
+    if actual is not None and actual != expected:
+        raise ValueError(
+            f"Collection '{collection_name}' stores {actual}-dimensional vectors but the embedding model "
+            f"produces {expected}; rebuild it with python -m backend.vectorstore.reindex"
+        )
+
+
+def ensure_payload_indexes(client: QdrantClient, collection_name: str):
+    payload_schema = client.get_collection(collection_name).payload_schema or {}
+    for field, schema in _missing_payload_indexes(payload_schema).items():
+        client.create_payload_index(collection_name, field_name=field, field_schema=schema)
+
+
+def collection_config(
+    size: Optional[int] = None,
+    quantization: Optional[str] = None,
+    on_disk: Optional[bool] = None,
+    hnsw_m: Optional[int] = None,
+    hnsw_ef_construct: Optional[int] = None,
+) -> Dict[str, Any]:
+    """create_collection() arguments; unset options come from the QDRANT_* settings."""
+    quantization = (quantization or QDRANT_QUANTIZATION).lower()
+    on_disk = QDRANT_ON_DISK if on_disk is None else on_disk
+
+    # Quantized copies stay in RAM so only the rescoring step touches full vectors
+    if quantization == "int8":
+        quantization_config = ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    elif quantization == "binary":
+        quantization_config = BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    elif quantization == "none":
+        quantization_config = None
+    else:
+        raise ValueError(f"Unknown quantization '{quantization}'; use none, int8 or binary")
+
+    return {
+        "vectors_config": VectorParams(size=size or vector_size(), distance=Distance.COSINE, on_disk=on_disk),
+        "hnsw_config": HnswConfigDiff(
+            m=hnsw_m or QDRANT_HNSW_M,
+            ef_construct=hnsw_ef_construct or QDRANT_HNSW_EF_CONSTRUCT,
+        ),
+        "quantization_config": quantization_config,
+    }
+
+
+def search_params(quantization: Optional[str] = None, hnsw_ef: Optional[int] = None) -> Optional[SearchParams]:
+    """Query-time HNSW ef and quantized rescoring; None when the server defaults apply."""
+    quantization = (quantization or QDRANT_QUANTIZATION).lower()
+    hnsw_ef = hnsw_ef or QDRANT_SEARCH_EF or None
+    if quantization == "none" and hnsw_ef is None:
+        return None
+    return SearchParams(
+        hnsw_ef=hnsw_ef,
+        quantization=QuantizationSearchParams(rescore=True, oversampling=QDRANT_OVERSAMPLING)
+        if quantization != "none" else None,
+    )
+
+
+def create_collection(client: QdrantClient, collection_name: str, size: Optional[int] = None, **config):
+    """Create a collection with the app's vector settings and payload indexes."""
+    client.create_collection(collection_name=collection_name, **collection_config(size, **config))
+    ensure_payload_indexes(client, collection_name)
+
+
+def _build_points(entries: List[Dict[str, Any]]) -> List[PointStruct]:
+    return [
+        PointStruct(
+            id=entry.get("id", str(uuid.uuid4())),
+            vector=entry["vector"],
+            payload=entry["payload"]
+        )
+        for entry in entries
+    ]
+
+
 class QdrantVectorStore:
-    def __init__(self, host: Optional[str] = None, port: Optional[int] = None):
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None, prefer_grpc: Optional[bool] = None):
         self.host = host or os.getenv("QDRANT_HOST", "localhost")
         self.port = int(port or os.getenv("QDRANT_PORT", 6333))
-        self.client = QdrantClient(host=self.host, port=self.port)
+        self.prefer_grpc = QDRANT_PREFER_GRPC if prefer_grpc is None else prefer_grpc
+        self.client = QdrantClient(**_client_kwargs(self.host, self.port, self.prefer_grpc))
         self._ensure_collection()
 
     def _ensure_collection(self):
-        existing = [col.name for col in self.client.get_collections().collections]
-        if COLLECTION_NAME not in existing:
-            self.client.recreate_collection(
-                collection_name=COLLECTION_NAME,
-                vectors_config=VectorParams(size=384, distance=Distance.COSINE)
-            )
+        key = (self.host, self.port, COLLECTION_NAME)
+        if key in _ensured_collections:
+            return
+        if self.client.collection_exists(COLLECTION_NAME) or resolve_alias(self.client):
+            check_vector_size(self.client.get_collection(COLLECTION_NAME))
+            ensure_payload_indexes(self.client, COLLECTION_NAME)
+        else:
+            create_collection(self.client, COLLECTION_NAME)
+        _ensured_collections.add(key)
 
     def reset(self):
         """Deletes and recreates the collection"""
-        self.client.delete_collection(collection_name=COLLECTION_NAME)
-        self.client.recreate_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=384, distance=Distance.COSINE)
-        )
+        target = resolve_alias(self.client)
+        if target:
+            # Left by a re-index: drop the alias and the collection behind it
+            self.client.update_collection_aliases(
+                change_aliases_operations=[DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=COLLECTION_NAME))]
+            )
+            self.client.delete_collection(collection_name=target)
+        else:
+            self.client.delete_collection(collection_name=COLLECTION_NAME)
+        create_collection(self.client, COLLECTION_NAME)
+        _ensured_collections.add((self.host, self.port, COLLECTION_NAME))
         print(f"[Qdrant] Reset collection '{COLLECTION_NAME}'")
 
     def add_entry(self, vector: List[float], payload: Dict[str, Any], point_id: Optional[str] = None):
@@ -49,28 +260,126 @@ class QdrantVectorStore:
 
     def batch_add_entries(self, entries: List[Dict[str, Any]]):
         """entries: list of {'vector': [...], 'payload': {...}, 'id': Optional[str]}"""
-        points = [
-            PointStruct(
-                id=entry.get("id", str(uuid.uuid4())),
-                vector=entry["vector"],
-                payload=entry["payload"]
-            )
-            for entry in entries
-        ]
-        self.client.upsert(collection_name=COLLECTION_NAME, points=points)
-
-    def search(self, query_vector: List[float], top_k: int = 3, filters: Optional[Dict[str, str]] = None):
-        qdrant_filter = None
-        if filters:
-            qdrant_filter = Filter(
-                must=[
-                    FieldCondition(key=key, match=MatchValue(value=value))
-                    for key, value in filters.items()
-                ]
-            )
-        return self.client.search(
+        self.client.upsert(collection_name=COLLECTION_NAME, points=_build_points(entries))
+
+    def delete_stale_chunks(self, keep: Dict[int, int]):
+        """keep: entry_id -> number of chunks still current (0 removes the entry)"""
+        if keep:
+            self.client.delete(COLLECTION_NAME, points_selector=FilterSelector(filter=_stale_chunks_filter(keep)))
+
+    def search(self, query_vector: List[float], top_k: int = 3, filters: Union[SearchFilters, Dict[str, str], None] = None, with_vectors: bool = False):
+        return self.client.query_points(
+            collection_name=COLLECTION_NAME,
+            query=query_vector,
+            limit=top_k,
+            query_filter=_build_filter(filters),
+            search_params=search_params(),
+            with_payload=True,
+            with_vectors=with_vectors
+        ).points
+
+    def search_entries(self, query_vector: List[float], top_k: int = 3, filters: Union[SearchFilters, Dict[str, str], None] = None, with_vectors: bool = False):
+        """Top entries rather than top chunks: best chunk per entry, best first."""
+        points = self.search(query_vector, top_k=top_k * CHUNK_OVERFETCH, filters=filters, with_vectors=with_vectors)
+        return group_hits_by_entry(points, top_k)
+
+    def close(self):
+        self.client.close()
+
+
+class AsyncQdrantVectorStore:
+    """Async twin of QdrantVectorStore for use inside FastAPI handlers."""
+
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None, prefer_grpc: Optional[bool] = None):
+        self.host = host or os.getenv("QDRANT_HOST", "localhost")
+        self.port = int(port or os.getenv("QDRANT_PORT", 6333))
+        self.prefer_grpc = QDRANT_PREFER_GRPC if prefer_grpc is None else prefer_grpc
+        self.client = AsyncQdrantClient(**_client_kwargs(self.host, self.port, self.prefer_grpc))
+        self._ensure_lock = asyncio.Lock()
+
+    async def _ensure_collection(self):
+        key = (self.host, self.port, COLLECTION_NAME)
+        if key in _ensured_collections:
+            return
+        async with self._ensure_lock:
+            if key in _ensured_collections:
+                return
+            exists = await self.client.collection_exists(COLLECTION_NAME)
+            if not exists and not _alias_target(await self.client.get_aliases(), COLLECTION_NAME):
+                await self.client.create_collection(collection_name=COLLECTION_NAME, **collection_config())
+            collection = await self.client.get_collection(COLLECTION_NAME)
+            check_vector_size(collection)
+            for field, schema in _missing_payload_indexes(collection.payload_schema or {}).items():
+                await self.client.create_payload_index(COLLECTION_NAME, field_name=field, field_schema=schema)
+            _ensured_collections.add(key)
+
+    async def add_entry(self, vector: List[float], payload: Dict[str, Any], point_id: Optional[str] = None):
+        await self._ensure_collection()
+        point_id = point_id or str(uuid.uuid4())
+        await self.client.upsert(
+            collection_name=COLLECTION_NAME,
+            points=[PointStruct(id=point_id, vector=vector, payload=payload)]
+        )
+
+    async def batch_add_entries(self, entries: List[Dict[str, Any]]):
+        await self._ensure_collection()
+        await self.client.upsert(collection_name=COLLECTION_NAME, points=_build_points(entries))
+
+    async def delete_stale_chunks(self, keep: Dict[int, int]):
+        if keep:
+            await self._ensure_collection()
+            await self.client.delete(COLLECTION_NAME, points_selector=FilterSelector(filter=_stale_chunks_filter(keep)))
+
+    async def search(self, query_vector: List[float], top_k: int = 3, filters: Union[SearchFilters, Dict[str, str], None] = None, with_vectors: bool = False):
+        await self._ensure_collection()
+        response = await self.client.query_points(
             collection_name=COLLECTION_NAME,
-            query_vector=query_vector,
+            query=query_vector,
             limit=top_k,
-            query_filter=qdrant_filter
+            query_filter=_build_filter(filters),
+            search_params=search_params(),
+            with_payload=True,
+            with_vectors=with_vectors
         )
+        return response.points
+
+    async def search_entries(self, query_vector: List[float], top_k: int = 3, filters: Union[SearchFilters, Dict[str, str], None] = None, with_vectors: bool = False):
+        points = await self.search(query_vector, top_k=top_k * CHUNK_OVERFETCH, filters=filters, with_vectors=with_vectors)
+        return group_hits_by_entry(points, top_k)
+
+    async def close(self):
+        await self.client.close()
+
+
+# ===== SHARED INSTANCES =====
+
+_store: Optional[QdrantVectorStore] = None
+_async_store: Optional[AsyncQdrantVectorStore] = None
+_store_lock = threading.Lock()
+
+
+def get_vector_store() -> QdrantVectorStore:
+    """Process-wide sync store; the underlying client keeps its connection pool alive."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = QdrantVectorStore()
+    return _store
+
+
+def get_async_vector_store() -> AsyncQdrantVectorStore:
+    global _async_store
+    if _async_store is None:
+        _async_store = AsyncQdrantVectorStore()
+    return _async_store
+
+
+async def close_vector_stores():
+    global _store, _async_store
+    if _async_store is not None:
+        await _async_store.close()
+        _async_store = None
+    if _store is not None:
+        _store.close()
+        _store = None
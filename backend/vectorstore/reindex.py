@@ -0,0 +1,438 @@
+"""Rebuild the vector index from SQLite, without re-running any LLM call.
+
+Streams journal_entries in id order, embeds their chunks across a process
+pool and writes them into a fresh collection. When every entry is in, the
+`journal_entries` alias is switched to the new collection in one step and
+the previous collection is dropped. Progress is checkpointed after every
+batch, so running the command again after an interruption resumes where it
+stopped.
+
+    python -m backend.vectorstore.reindex [--workers 4] [--batch-size 256] [--restart] [--keep-old]
+    python -m backend.vectorstore.reindex --abort
+
+Entries added while it runs are picked up by a final catch-up pass. The
+API's outbox indexer pauses while the run holds its lease (a heartbeat in
+the checkpoint file), so edits and deletes made during the run stay queued
+and are applied to the new index once it is published. If the run dies,
+the lease goes stale after REINDEX_LEASE_SECONDS and indexing resumes into
+the current index; a later resume then starts over, since the partial index
+missed those edits. --abort drops the checkpoint and the partial index.
+
+With VECTOR_BACKEND=numpy the new index is built next to NUMPY_INDEX_DIR and
+moved into place at the end; restart the API to load it.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from qdrant_client import QdrantClient
+from qdrant_client.models import CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation
+
+from ..db.database import DB_PATH, SessionLocal
+from ..db.models import JournalEntry
+from ..utils.embedder import Embedder, DEFAULT_EMBEDDING_MODEL
+from .factory import VECTOR_BACKEND
+from .indexer import chunk_entry
+from .numpy_store import NumpyVectorStore, NUMPY_INDEX_DIR
+from .qdrant_client import (
+    COLLECTION_NAME,
+    QDRANT_PREFER_GRPC,
+    create_collection,
+    resolve_alias,
+    _build_points,
+    _client_kwargs,
+)
+
+load_dotenv()
+
+REINDEX_BATCH_SIZE = int(os.getenv("REINDEX_BATCH_SIZE", 256))     # entries per embedding task
+REINDEX_WORKERS = int(os.getenv("REINDEX_WORKERS", max(1, min(4, (os.cpu_count() or 2) // 2))))
+# Relative paths are taken from the database's directory, so the API and the CLI
+# find the same file whatever directory they were started from
+REINDEX_CHECKPOINT = str(Path(DB_PATH).resolve().parent / os.getenv("REINDEX_CHECKPOINT", "reindex_checkpoint.json"))
+# A run refreshes its heartbeat every third of this; older than this, it is presumed dead
+REINDEX_LEASE_SECONDS = int(os.getenv("REINDEX_LEASE_SECONDS", 300))
+
+_worker_embedder: Optional[Embedder] = None
+
+
+def _init_worker(model_name: str, cpu_threads: int):
+    # Each worker process owns its own model copy and a fair share of the cores
+    global _worker_embedder
+    _worker_embedder = Embedder(model_name, threads=cpu_threads)
+
+
+def _embed_texts(texts: List[str]) -> List[List[float]]:
+    return _worker_embedder.embed_batch(texts)
+
+
+# ===== TARGETS =====
+
+# Temporary alias for the new collection while the original is deleted on a first re-index
+PENDING_ALIAS = f"{COLLECTION_NAME}_pending"
+
+
+class QdrantTarget:
+    """A new physical collection, published by moving the COLLECTION_NAME alias onto it."""
+
+    def __init__(self, name: str, model_name: str):
+        self.name = name
+        self.model_name = model_name
+        # A plain client: the shared store would refuse to open a collection of another dimension,
+        # which is exactly what a re-index for a new model replaces
+        self.client = QdrantClient(**_client_kwargs(
+            os.getenv("QDRANT_HOST", "localhost"), int(os.getenv("QDRANT_PORT", 6333)), QDRANT_PREFER_GRPC
+        ))
+
+    def exists(self) -> bool:
+        return self.client.collection_exists(self.name)
+
+    def discard(self):
+        if self.exists():
+            self.client.delete_collection(self.name)
+            print(f"Deleted partial collection '{self.name}'")
+
+    def write(self, points: List[Dict[str, Any]]):
+        if not self.exists():
+            create_collection(self.client, self.name, size=len(points[0]["vector"]))
+        self.client.upsert(collection_name=self.name, points=_build_points(points), wait=True)
+
+    def publish(self, keep_old: bool, expected_points: int = 0):
+        if not self.exists():  # nothing to index: publish an empty collection
+            create_collection(self.client, self.name, size=Embedder(self.model_name).dimension)
+
+        previous = resolve_alias(self.client, COLLECTION_NAME)
+        operations = []
+        if previous:
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=COLLECTION_NAME)))
+        elif self.client.collection_exists(COLLECTION_NAME):
+            # First re-index: the name still belongs to a real collection, which
+            # has to go before an alias can take it. Later swaps are atomic.
+            self._drop_original_collection(expected_points)
+        if resolve_alias(self.client, PENDING_ALIAS):
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=PENDING_ALIAS)))
+        operations.append(CreateAliasOperation(
+            create_alias=CreateAlias(collection_name=self.name, alias_name=COLLECTION_NAME)
+        ))
+        # The alias operations apply together, so searches never see a missing collection
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+        print(f"Alias '{COLLECTION_NAME}' now points to '{self.name}'")
+
+        if previous and previous != self.name and not keep_old:
+            self.client.delete_collection(previous)
+            print(f"Deleted previous collection '{previous}'")
+
+    def _drop_original_collection(self, expected_points: int):
+        """Make way for the alias, but only once the new collection is complete and reachable by alias."""
+        points = self.client.count(collection_name=self.name, exact=True).count
+        if points < expected_points:
+            raise RuntimeError(
+                f"'{self.name}' holds {points} points, expected {expected_points}; "
+                f"keeping '{COLLECTION_NAME}'. Run again to resume."
+            )
+        # Proves alias updates work before anything is deleted, and keeps the new index
+        # findable by name should the final swap fail
+        operations = []
+        if resolve_alias(self.client, PENDING_ALIAS):  # left by an earlier publish that failed halfway
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=PENDING_ALIAS)))
+        operations.append(CreateAliasOperation(
+            create_alias=CreateAlias(collection_name=self.name, alias_name=PENDING_ALIAS)
+        ))
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+        print(
+            f"Warning: deleting the original collection '{COLLECTION_NAME}' so the alias can take its name; "
+            f"searches fail until the alias is created. The new index stays reachable as '{PENDING_ALIAS}'."
+        )
+        self.client.delete_collection(COLLECTION_NAME)
+
+
+class NumpyTarget:
+    """A new index directory, moved over NUMPY_INDEX_DIR when complete."""
+
+    def __init__(self, name: str, model_name: str):
+        self.name = name
+        self.model_name = model_name
+        self.path = Path(f"{NUMPY_INDEX_DIR}.{name}")
+        self._store: Optional[NumpyVectorStore] = None
+
+    def exists(self) -> bool:
+        return (self.path / "meta.json").exists()
+
+    def discard(self):
+        if self.path.exists():
+            shutil.rmtree(self.path)
+            print(f"Deleted partial index '{self.path}'")
+
+    def write(self, points: List[Dict[str, Any]]):
+        if self._store is None:
+            self._store = NumpyVectorStore(path=str(self.path), dim=len(points[0]["vector"]))
+        self._store.batch_add_entries(points)
+
+    def publish(self, keep_old: bool, expected_points: int = 0):
+        if self._store is None:
+            self._store = NumpyVectorStore(path=str(self.path), dim=Embedder(self.model_name).dimension)
+        self._store.close()
+        current, previous = Path(NUMPY_INDEX_DIR), Path(f"{NUMPY_INDEX_DIR}.previous")
+        shutil.rmtree(previous, ignore_errors=True)
+        if current.exists():
+            current.rename(previous)
+        self.path.rename(current)
+        if not keep_old:
+            shutil.rmtree(previous, ignore_errors=True)
+        print(f"Index at '{current}' replaced; restart the API to load it")
+
+
+# ===== CHECKPOINT =====
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by someone else
+    return True
+
+
+def lease_is_live(checkpoint: Dict[str, Any]) -> bool:
+    """The run that wrote the checkpoint is still going: recent heartbeat and, on this host, a live pid."""
+    if time.time() - checkpoint.get("heartbeat", 0) > REINDEX_LEASE_SECONDS:
+        return False
+    if checkpoint.get("host") == socket.gethostname() and checkpoint.get("pid"):
+        return _pid_alive(checkpoint["pid"])
+    return True
+
+
+def reindex_state(path: str = REINDEX_CHECKPOINT) -> Optional[str]:
+    """None without a checkpoint, "running" while its run holds the lease, "stale" once it has died."""
+    try:
+        checkpoint = load_checkpoint(path)
+    except (OSError, ValueError):
+        return None  # unreadable: do not hold indexing up on it
+    if checkpoint is None:
+        return None
+    return "running" if lease_is_live(checkpoint) else "stale"
+
+
+def reindex_in_progress(path: str = REINDEX_CHECKPOINT) -> bool:
+    """True from the start of a run until it publishes, as long as it keeps its lease."""
+    return reindex_state(path) == "running"
+
+
+def mark_indexed_past_checkpoint(path: str = REINDEX_CHECKPOINT):
+    """Record that the current index took writes the stale run's partial index lacks."""
+    checkpoint = load_checkpoint(path)
+    if checkpoint and not checkpoint.get("indexed_while_stale"):
+        checkpoint["indexed_while_stale"] = True
+        save_checkpoint(path, checkpoint)
+
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    if not Path(path).exists():
+        return None
+    return json.loads(Path(path).read_text())
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = Path(f"{path}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(checkpoint, indent=2))
+    os.replace(tmp_path, path)
+
+
+class _Lease:
+    """Owns the checkpoint file for one run: every save stamps it, and a thread keeps it fresh."""
+
+    def __init__(self, path: str, checkpoint: Dict[str, Any]):
+        self.path = path
+        self.checkpoint = checkpoint
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name="reindex-lease", daemon=True)
+
+    def save(self):
+        with self._lock:
+            self.checkpoint.update(pid=os.getpid(), host=socket.gethostname(), heartbeat=time.time())
+            save_checkpoint(self.path, self.checkpoint)
+
+    def _beat(self):
+        # Model loading or a slow publish can outlast a batch; the lease must not lapse meanwhile
+        while not self._stop.wait(REINDEX_LEASE_SECONDS / 3):
+            self.save()
+
+    def __enter__(self):
+        self.save()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+# ===== RUN =====
+
+def stream_entry_batches(db, after_id: int, batch_size: int) -> Iterator[List[JournalEntry]]:
+    """Entries with id > after_id in id order, fetched from the cursor batch_size rows at a time."""
+    result = db.execute(
+        select(JournalEntry)
+        .where(JournalEntry.id > after_id)
+        .order_by(JournalEntry.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for partition in result.scalars().partitions():
+        yield list(partition)
+
+
+def _index_pass(db, pool, target, lease: _Lease, batch_size: int, max_in_flight: int) -> int:
+    """One sweep over entries past the checkpoint; returns how many were indexed."""
+    checkpoint = lease.checkpoint
+    started = time.perf_counter()
+    indexed = 0
+    in_flight = deque()
+
+    def finish_oldest():
+        nonlocal indexed
+        last_id, entry_count, chunks, future = in_flight.popleft()
+        vectors = future.result()
+        if chunks:
+            target.write([
+                {"id": chunk["id"], "vector": vector, "payload": chunk["payload"]}
+                for chunk, vector in zip(chunks, vectors)
+            ])
+        # Batches complete in submission order, so last_entry_id only moves forward
+        checkpoint["last_entry_id"] = last_id
+        checkpoint["entries"] += entry_count
+        checkpoint["chunks"] += len(chunks)
+        lease.save()
+        indexed += entry_count
+        rate = indexed / max(time.perf_counter() - started, 1e-9)
+        print(f"  {checkpoint['entries']} entries, {checkpoint['chunks']} chunks (up to id {last_id}, {rate:.0f} entries/s)")
+
+    for entries in stream_entry_batches(db, checkpoint["last_entry_id"], batch_size):
+        chunks = [chunk for entry in entries for chunk in chunk_entry(entry)]
+        future = pool.submit(_embed_texts, [chunk["text"] for chunk in chunks])
+        in_flight.append((entries[-1].id, len(entries), chunks, future))
+        # Bound memory: never hold more than a few batches of vectors at once
+        if len(in_flight) >= max_in_flight:
+            finish_oldest()
+    while in_flight:
+        finish_oldest()
+    return indexed
+
+
+def run_reindex(
+    batch_size: int = REINDEX_BATCH_SIZE,
+    workers: int = REINDEX_WORKERS,
+    restart: bool = False,
+    keep_old: bool = False,
+    checkpoint_path: str = REINDEX_CHECKPOINT,
+    model_name: str = DEFAULT_EMBEDDING_MODEL,
+) -> Dict[str, Any]:
+    checkpoint = None if restart else load_checkpoint(checkpoint_path)
+    if checkpoint and lease_is_live(checkpoint):
+        raise RuntimeError(
+            f"Another re-index (pid {checkpoint.get('pid')} on {checkpoint.get('host')}) holds '{checkpoint_path}'"
+        )
+    if checkpoint and (checkpoint["backend"] != VECTOR_BACKEND or checkpoint["model"] != model_name):
+        print("Checkpoint was written for a different backend or model; starting over")
+        _target_for(checkpoint).discard()
+        checkpoint = None
+    if checkpoint and checkpoint.get("indexed_while_stale"):
+        # Edits made after the run died went to the old index only; the partial one can't catch up on them
+        print("The index was updated while this run was stopped; starting over")
+        _target_for(checkpoint).discard()
+        checkpoint = None
+
+    if checkpoint:
+        print(f"Resuming into '{checkpoint['target']}' after entry {checkpoint['last_entry_id']}")
+    else:
+        checkpoint = {
+            "backend": VECTOR_BACKEND,
+            "model": model_name,
+            "target": f"{COLLECTION_NAME}_{time.strftime('%Y%m%dT%H%M%S')}",
+            "last_entry_id": 0,
+            "entries": 0,
+            "chunks": 0,
+        }
+        print(f"Re-indexing into '{checkpoint['target']}' with {workers} worker(s)")
+
+    target = _target_for(checkpoint)
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    started = time.perf_counter()
+
+    with _Lease(checkpoint_path, checkpoint) as lease:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(model_name, threads_per_worker)
+        ) as pool, SessionLocal() as db:
+            # Repeat until a pass finds nothing new, catching entries added meanwhile
+            while _index_pass(db, pool, target, lease, batch_size, max_in_flight=workers * 2):
+                db.rollback()  # end the read transaction so the next pass sees new commits
+
+        target.publish(keep_old, expected_points=checkpoint["chunks"])
+    # Resumes the API's indexer, which applies edits queued during the run to the new index
+    Path(checkpoint_path).unlink(missing_ok=True)
+
+    seconds = round(time.perf_counter() - started, 1)
+    print(f"Done: {checkpoint['entries']} entries, {checkpoint['chunks']} chunks in {seconds}s")
+    return {**checkpoint, "seconds": seconds}
+
+
+def _target_for(checkpoint: Dict[str, Any]):
+    target_class = NumpyTarget if checkpoint["backend"] == "numpy" else QdrantTarget
+    return target_class(checkpoint["target"], checkpoint["model"])
+
+
+def abort_reindex(checkpoint_path: str = REINDEX_CHECKPOINT) -> bool:
+    """Drop an unfinished run's checkpoint and partial index; False if there was none."""
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint is None:
+        print(f"No re-index checkpoint at '{checkpoint_path}'")
+        return False
+    if lease_is_live(checkpoint):
+        print(f"Warning: pid {checkpoint.get('pid')} on {checkpoint.get('host')} still holds the lease; stop it first")
+        return False
+    _target_for(checkpoint).discard()
+    Path(checkpoint_path).unlink(missing_ok=True)
+    print(f"Removed '{checkpoint_path}'; the API's indexer resumes on its next poll")
+    return True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=REINDEX_BATCH_SIZE, help="entries per embedding task")
+    parser.add_argument("--workers", type=int, default=REINDEX_WORKERS, help="embedding processes")
+    parser.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL, help="sentence-transformers model name")
+    parser.add_argument("--checkpoint", default=REINDEX_CHECKPOINT, help="progress file used to resume")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--keep-old", action="store_true", help="keep the previous collection after the swap")
+    parser.add_argument("--abort", action="store_true", help="drop an unfinished run's checkpoint and partial index")
+    args = parser.parse_args(argv)
+
+    if args.abort:
+        return 0 if abort_reindex(args.checkpoint) else 1
+
+    run_reindex(
+        batch_size=args.batch_size,
+        workers=max(1, args.workers),
+        restart=args.restart,
+        keep_old=args.keep_old,
+        checkpoint_path=args.checkpoint,
+        model_name=args.model,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
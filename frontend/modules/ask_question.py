@@ -4,6 +4,8 @@ from datetime import datetime
 import os
 import json
 
+from modules.sse import stream_tokens
+
 API_BASE = "http://127.0.0.1:8000"
 qa_file = "data/qa_history.json"
 
@@ -28,6 +30,7 @@ def show_ask_question():
     st.subheader("💬 Ask About Your Journal")
 
     question_input = st.text_input("What would you like to know?", key="qa_input")
+    live_answer = st.empty()
 
     col1, col2 = st.columns([1, 1])
 
@@ -35,28 +38,30 @@ def show_ask_question():
         if st.button("Ask"):
             if question_input.strip():
                 try:
-                    res = requests.post(f"{API_BASE}/ask/", json={"question": question_input})
-                    if res.status_code == 200:
-                        answer = res.json().get("answer", "")
-
-                        latest = {
-                            "question": question_input,
-                            "answer": answer
-                        }
-
-                        st.session_state.qa_history.insert(0, latest)
-                        with open(qa_file, "w", encoding="utf-8") as f:
-                            json.dump(st.session_state.qa_history, f, indent=2, ensure_ascii=False)
-
-                        st.session_state.latest_qa = latest
-                        st.session_state.qa_submitted = True
-
-                        if "qa_input" in st.session_state:
-                            del st.session_state["qa_input"]
-
-                        st.rerun()
-                    else:
-                        st.error("❌ Question failed.")
+                    # ⚡ Render tokens as they arrive
+                    answer = ""
+                    for token in stream_tokens(f"{API_BASE}/ask/stream", {"question": question_input}):
+                        answer += token
+                        live_answer.markdown(f"💡 {answer}▌")
+
+                    latest = {
+                        "question": question_input,
+                        "answer": answer.strip()
+                    }
+
+                    st.session_state.qa_history.insert(0, latest)
+                    with open(qa_file, "w", encoding="utf-8") as f:
+                        json.dump(st.session_state.qa_history, f, indent=2, ensure_ascii=False)
+
+                    st.session_state.latest_qa = latest
+                    st.session_state.qa_submitted = True
+
+                    if "qa_input" in st.session_state:
+                        del st.session_state["qa_input"]
+
+                    st.rerun()
+                except requests.HTTPError:
+                    st.error("❌ Question failed.")
                 except Exception as e:
                     st.error(f"⚠️ Error: {e}")
             else:
@@ -12,25 +12,25 @@ def show_entries_by_date():
     st.subheader("📅 Browse Entries by Date")
 
     try:
-        res = requests.get(f"{API_BASE}/entries/")
-        if res.status_code == 200:
-            raw_entries = res.json()
-
-            # ✅ Group entries by date
-            entries_by_date = defaultdict(list)
-            for entry in raw_entries:
-                entries_by_date[entry["date"]].append(entry)
+        # 🗓 Default to the most recent day with an entry (one summary row)
+        latest = requests.get(f"{API_BASE}/entries/", params={"order": "desc", "limit": 1, "fields": "summary"})
+        if latest.status_code != 200:
+            st.error("❌ Failed to fetch entries from backend.")
+            st.markdown("</div>", unsafe_allow_html=True)
+            return
+        latest_entries = latest.json()["entries"]
+        default_date = datetime.strptime(latest_entries[0]["date"], "%Y-%m-%d") if latest_entries else datetime.today()
+        date_choice = st.date_input("Pick a date", default_date)
+        date_str = date_choice.strftime("%Y-%m-%d")
 
-            # 🗓 Show calendar picker
-            all_dates = sorted(entries_by_date.keys(), reverse=True)
-            default_date = datetime.strptime(all_dates[0], "%Y-%m-%d") if all_dates else datetime.today()
-            date_choice = st.date_input("Pick a date", default_date)
-            date_str = date_choice.strftime("%Y-%m-%d")
+        res = requests.get(f"{API_BASE}/entries/", params={"date": date_str, "limit": 500})
+        if res.status_code == 200:
+            day_entries = res.json()["entries"]
 
             # 📘 Show entries for selected date
-            if date_str in entries_by_date:
+            if day_entries:
                 st.write(f"📝 Entries for {date_str}:")
-                for entry in entries_by_date[date_str]:
+                for entry in day_entries:
                     st.markdown(f"""
                         <div style="background: rgba(255,255,255,0.05); padding: 1rem;
                                     border-radius: 10px; border: 1px solid rgba(255,255,255,0.1);
@@ -15,9 +15,11 @@ def show_filter_by_tag():
         tags_res = requests.get(f"{API_BASE}/tags")
         if tags_res.status_code == 200:
             tags = tags_res.json()
-            selected_tag = st.selectbox("Select a tag", tags)
-            if selected_tag:
-                filter_res = requests.get(f"{API_BASE}/filter", params={"tag": selected_tag})
+            selected_tags = st.multiselect("Select tags", tags)
+            mode = st.radio("Match", ["any", "all"], horizontal=True,
+                            format_func=lambda m: "Any selected tag" if m == "any" else "All selected tags")
+            if selected_tags:
+                filter_res = requests.get(f"{API_BASE}/filter", params={"tag": selected_tags, "mode": mode})
                 if filter_res.status_code == 200:
                     entries = filter_res.json()
                     for entry in entries:
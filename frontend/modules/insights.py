@@ -12,10 +12,19 @@ def show_insights():
     st.markdown("<div class='glass'>", unsafe_allow_html=True)
     st.subheader("📊 Insights")
 
+    params = {}
+    if st.checkbox("Limit to a date range"):
+        date_range = st.date_input("Date range", value=(datetime.today().replace(day=1), datetime.today()))
+        if len(date_range) == 2:
+            params = {"from": date_range[0].strftime("%Y-%m-%d"), "to": date_range[1].strftime("%Y-%m-%d")}
+
     try:
-        res = requests.get(f"{API_BASE}/insights/")
+        res = requests.get(f"{API_BASE}/insights/", params=params)
         if res.status_code == 200:
             data = res.json()
+            if "total_entries" not in data:
+                st.info(data.get("message", "No journal entries found."))
+                st.stop()
             st.metric("📝 Total Entries", data["total_entries"])
             st.metric("✍️ Avg Word Count", data["average_word_count"])
 
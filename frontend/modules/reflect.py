@@ -5,7 +5,28 @@ from collections import defaultdict
 import os
 import json
 
+from modules.sse import stream_tokens
+
 API_BASE = "http://127.0.0.1:8000"  # 🔧 Change if hosted elsewhere
+PAGE_SIZE = 50
+
+
+def load_summary_page(cursor):
+    """One page of entry summaries, newest first; older pages are kept in session_state across reruns."""
+    cached = st.session_state.get("reflect_page")
+    # The first page is always refetched so newly added entries show up
+    if cursor and cached and cached["cursor"] == cursor:
+        return cached
+    params = {"fields": "summary", "order": "desc", "limit": PAGE_SIZE}
+    if cursor:
+        params["cursor"] = cursor
+    entries_res = requests.get(f"{API_BASE}/entries/", params=params)
+    if entries_res.status_code != 200:
+        return None
+    page = {"cursor": cursor, **entries_res.json()}
+    st.session_state.reflect_page = page
+    return page
+
 
 def show_reflect():
     st.markdown("<div class='glass'>", unsafe_allow_html=True)
@@ -15,30 +36,39 @@ def show_reflect():
     if "reflections" not in st.session_state:
         st.session_state.reflections = {}
 
+    # 📄 Cursors of the pages walked so far; the last one is on screen
+    if "reflect_cursors" not in st.session_state:
+        st.session_state.reflect_cursors = [None]
+
     try:
-        entries_res = requests.get(f"{API_BASE}/entries/")
-        if entries_res.status_code == 200:
-            raw_entries = entries_res.json()
-
-            # ✅ Normalize entries
-            if isinstance(raw_entries, dict):
-                all_entries = []
-                for entry_list in raw_entries.values():
-                    all_entries.extend(entry_list)
-            else:
-                all_entries = raw_entries
-
-            # 🧾 Build dropdown
+        # 🧾 Build dropdown from lightweight summaries (id / date / preview), one page at a time
+        page = load_summary_page(st.session_state.reflect_cursors[-1])
+
+        if page is not None:
+            col1, col2 = st.columns([1, 1])
+            with col1:
+                if len(st.session_state.reflect_cursors) > 1 and st.button("⬅ Newer entries"):
+                    st.session_state.reflect_cursors.pop()
+                    st.rerun()
+            with col2:
+                if page["next_cursor"] and st.button("Older entries ➡"):
+                    st.session_state.reflect_cursors.append(page["next_cursor"])
+                    st.rerun()
+
             entry_map = {
-                f"{entry['id']} | {entry['date']} | {entry['text'][:40].replace('\n', ' ')}...": entry
-                for entry in all_entries
+                f"{entry['id']} | {entry['date']} | {entry['preview'][:40].replace('\n', ' ')}...": entry["id"]
+                for entry in page["entries"]
             }
 
             selected = st.selectbox("Choose an entry", list(entry_map.keys()))
 
             if selected:
-                entry = entry_map[selected]
-                eid = entry["id"]
+                eid = entry_map[selected]
+                entry_res = requests.get(f"{API_BASE}/entry/{eid}")
+                if entry_res.status_code != 200:
+                    st.error("⚠️ Failed to fetch entry.")
+                    st.stop()
+                entry = entry_res.json()
 
                 # ✍️ Show full journal text
                 st.markdown("### 📓 Full Journal Entry")
@@ -50,21 +80,27 @@ def show_reflect():
                     </div>
                 """, unsafe_allow_html=True)
 
-                # 🧠 Reflect if not already done
+                # 🧠 Reflect if not already done, streaming tokens as they arrive
+                st.markdown("### 🧠 LLM Reflection")
                 if eid in st.session_state.reflections:
                     reflection = st.session_state.reflections[eid]
                 else:
-                    reflect_res = requests.post(f"{API_BASE}/reflect/", json={"entry_id": eid})
-                    if reflect_res.status_code == 200:
-                        reflection = reflect_res.json().get("reflection", "No reflection found.")
+                    live_reflection = st.empty()
+                    reflection = ""
+                    try:
+                        for token in stream_tokens(f"{API_BASE}/reflect/stream", {"entry_id": eid}):
+                            reflection += token
+                            live_reflection.markdown(f"{reflection}▌")
+                        reflection = reflection.strip() or "No reflection found."
                         st.session_state.reflections[eid] = reflection
-                    else:
+                        live_reflection.empty()
+                    except Exception:
+                        live_reflection.empty()
                         st.error("❌ Failed to generate reflection.")
                         reflection = None
 
                 # 💬 Show reflection
                 if reflection:
-                    st.markdown("### 🧠 LLM Reflection")
                     st.markdown(f"""
                         <div style="background: rgba(255,255,255,0.05); padding: 1rem;
                                     border-radius: 10px; border: 1px solid rgba(255,255,255,0.2);
@@ -0,0 +1,22 @@
+import json
+import requests
+
+
+def stream_tokens(url: str, payload: dict, timeout: int = 300):
+    """Yield tokens from one of the backend's server-sent-event endpoints."""
+    with requests.post(url, json=payload, stream=True, timeout=timeout) as res:
+        res.raise_for_status()
+        event = None
+        for line in res.iter_lines(decode_unicode=True):
+            if not line:
+                event = None
+                continue
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[len("data:"):].strip() or "{}")
+                if event == "error":
+                    raise RuntimeError(data.get("message", "Streaming failed."))
+                if event == "done":
+                    return
+                yield data.get("token", "")
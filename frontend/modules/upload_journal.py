@@ -1,3 +1,4 @@
+import time
 import streamlit as st
 import requests
 
@@ -6,16 +7,58 @@ API_BASE = "http://127.0.0.1:8000"  # 🔧 Change if hosted elsewhere
 def show_upload_journal():
     st.markdown("<div class='glass'>", unsafe_allow_html=True)
     st.subheader("📂 Upload Journal File")
-    uploaded_file = st.file_uploader("Choose a file", type=["txt", "json", "jpg", "png", "mp3", "wav", "m4a"])
+    uploaded_file = st.file_uploader("Choose a file", type=["txt", "json", "jpg", "jpeg", "png", "zip", "mp3", "wav", "m4a"])
+
+    if "upload_jobs" not in st.session_state:
+        st.session_state.upload_jobs = {}
 
     if uploaded_file is not None:
-        files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
+        # Streamlit reruns the page on every interaction; only submit each file once
+        upload_key = f"{uploaded_file.name}:{uploaded_file.size}"
+        job_id = st.session_state.upload_jobs.get(upload_key)
+
+        if job_id is None:
+            files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
+            try:
+                res = requests.post(f"{API_BASE}/upload/", files=files)
+                if res.status_code == 200:
+                    job_id = res.json()["job_id"]
+                    st.session_state.upload_jobs[upload_key] = job_id
+                    st.info(res.json()["message"])
+                else:
+                    st.error("❌ Upload failed.")
+            except Exception as e:
+                st.error(f"⚠️ Error: {e}")
+
+        if job_id:
+            show_job_progress(job_id)
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+def show_job_progress(job_id: str):
+    """Poll /jobs/{id} and render a progress bar until the import finishes."""
+    progress_bar = st.progress(0.0, text="Queued...")
+    while True:
         try:
-            res = requests.post(f"{API_BASE}/upload/", files=files)
-            if res.status_code == 200:
-                st.success(res.json()["message"])
-            else:
-                st.error("❌ Upload failed.")
+            job = requests.get(f"{API_BASE}/jobs/{job_id}").json()
         except Exception as e:
             st.error(f"⚠️ Error: {e}")
-    st.markdown("</div>", unsafe_allow_html=True)
\ No newline at end of file
+            return
+
+        total = job.get("entries_total") or 0
+        done = job.get("entries_done") or 0
+        fraction = min(done / total, 1.0) if total else 0.0
+        progress_bar.progress(fraction, text=f"{job['stage'].capitalize()} — {done}/{total} entries")
+
+        if job["status"] == "done":
+            progress_bar.progress(1.0, text="Done")
+            stats = job.get("stats") or {}
+            st.success(
+                f"✅ Imported {stats.get('entries', done)} entries "
+                f"({stats.get('entries_per_sec', 0)} entries/sec)."
+            )
+            return
+        if job["status"] == "failed":
+            st.error(f"❌ Import failed: {job.get('error')}")
+            return
+        time.sleep(1)
@@ -3,28 +3,34 @@ import requests
 from collections import defaultdict
 
 API_BASE = "http://127.0.0.1:8000"  # 🔧 Change if hosted elsewhere
+PAGE_SIZE = 50
 
 def show_view_entries():
     st.markdown("<div class='glass'>", unsafe_allow_html=True)
     st.subheader("📘 Your Journal Entries")
 
+    # 📄 Pages already loaded on this visit (newest first)
+    if "view_entries_pages" not in st.session_state:
+        st.session_state.view_entries_pages = {"entries": [], "next_cursor": None, "loaded": False}
+    pages = st.session_state.view_entries_pages
+
     try:
-        # ✅ Access your FastAPI backend running locally
-        res = requests.get("http://127.0.0.1:8000/entries/")
+        if not pages["loaded"]:
+            res = requests.get(f"{API_BASE}/entries/", params={"order": "desc", "limit": PAGE_SIZE})
+        else:
+            res = None
 
-        if res.status_code == 200:
-            raw_entries = res.json()
+        if res is None or res.status_code == 200:
+            if res is not None:
+                data = res.json()
+                pages["entries"] = data["entries"]
+                pages["next_cursor"] = data["next_cursor"]
+                pages["loaded"] = True
 
-            # 📅 Group by date if flat list
-            if isinstance(raw_entries, list):
-                entries_by_date = defaultdict(list)
-                for entry in raw_entries:
-                    entries_by_date[entry["date"]].append(entry)
-            elif isinstance(raw_entries, dict):
-                entries_by_date = raw_entries
-            else:
-                st.error("❌ Unknown format from backend.")
-                st.stop()
+            # 📅 Group by date
+            entries_by_date = defaultdict(list)
+            for entry in pages["entries"]:
+                entries_by_date[entry["date"]].append(entry)
 
             # 🎨 Mood → Color/Emoji
             mood_map = {
@@ -75,6 +81,26 @@ def show_view_entries():
                             </div>
                         </div>
                     """, unsafe_allow_html=True)
+
+            # ⏬ Next page
+            col1, col2 = st.columns([1, 1])
+            with col1:
+                if pages["next_cursor"] and st.button("Load more"):
+                    more = requests.get(
+                        f"{API_BASE}/entries/",
+                        params={"order": "desc", "limit": PAGE_SIZE, "cursor": pages["next_cursor"]}
+                    )
+                    if more.status_code == 200:
+                        data = more.json()
+                        pages["entries"].extend(data["entries"])
+                        pages["next_cursor"] = data["next_cursor"]
+                        st.rerun()
+                    else:
+                        st.error("❌ Could not load more entries.")
+            with col2:
+                if st.button("🔄 Refresh"):
+                    del st.session_state["view_entries_pages"]
+                    st.rerun()
         else:
             st.error("❌ Could not load entries from API.")
 
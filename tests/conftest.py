@@ -0,0 +1,24 @@
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+# Tests import the app as the `backend` package, like uvicorn backend.api.main:app does
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.db.database import create_sqlite_engine  # noqa: E402
+from backend.db.fts import create_fts_index  # noqa: E402
+from backend.db.models import Base  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Session on a fresh, fully initialized SQLite file (tables, FTS index, triggers)."""
+    engine = create_sqlite_engine(str(tmp_path / "journal.db"))
+    Base.metadata.create_all(bind=engine)
+    create_fts_index(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as session:
+        yield session
+    engine.dispose()
@@ -0,0 +1,64 @@
+from datetime import date
+
+import pytest
+
+from backend.search import filters as filters_module
+from backend.search.filters import SearchFilters, parse_date_phrase, resolve_filters
+
+TODAY = date(2024, 5, 15)  # a Wednesday
+
+
+@pytest.mark.parametrize("question, expected_from, expected_to, remaining", [
+    ("How did I feel today?", TODAY, TODAY, "How did I feel?"),
+    ("what happened yesterday", date(2024, 5, 14), date(2024, 5, 14), "what happened"),
+    ("sleep this week", date(2024, 5, 13), TODAY, "sleep"),
+    ("sleep last week", date(2024, 5, 6), date(2024, 5, 12), "sleep"),
+    ("work last month", date(2024, 4, 1), date(2024, 4, 30), "work"),
+    ("work this year", date(2024, 1, 1), TODAY, "work"),
+    ("work last year", date(2023, 1, 1), date(2023, 12, 31), "work"),
+    ("runs in the past 10 days", date(2024, 5, 5), TODAY, "runs"),
+    ("runs over the last 3 weeks", date(2024, 4, 24), TODAY, "runs"),
+    ("runs in the last 2 months", date(2024, 3, 15), TODAY, "runs"),
+    ("runs in the past 1 year", date(2023, 5, 15), TODAY, "runs"),
+    ("trips in March", date(2024, 3, 1), date(2024, 3, 31), "trips"),
+    ("trips in June", date(2023, 6, 1), date(2023, 6, 30), "trips"),   # June 2024 hasn't started
+    ("trips in June 2022", date(2022, 6, 1), date(2022, 6, 30), "trips"),
+    ("trips in 2023", date(2023, 1, 1), date(2023, 12, 31), "trips"),
+])
+def test_phrases(question, expected_from, expected_to, remaining):
+    assert parse_date_phrase(question, today=TODAY) == (expected_from, expected_to, remaining)
+
+
+def test_no_phrase():
+    assert parse_date_phrase("why am I tired", today=TODAY) == (None, None, "why am I tired")
+    # Years in the future or before 1900 read as numbers, not dates
+    assert parse_date_phrase("in 2999 steps", today=TODAY)[0] is None
+
+
+@pytest.mark.parametrize("question, expected_from, expected_to", [
+    ("past 3000 years", date.min, TODAY),
+    ("last 999999 days", date.min, TODAY),
+    ("last 99999999999 weeks", date.min, TODAY),
+    ("past 99999999999 months", date.min, TODAY),
+    ("in March 0000", date(1, 3, 1), date(1, 3, 31)),
+])
+def test_out_of_range_phrases_are_clamped(question, expected_from, expected_to):
+    date_from, date_to, _ = parse_date_phrase(question, today=TODAY)
+    assert (date_from, date_to) == (expected_from, expected_to)
+
+
+def test_resolve_filters_falls_back_to_no_date_filter(monkeypatch):
+    def broken(question, today=None):
+        raise OverflowError("date value out of range")
+
+    monkeypatch.setattr(filters_module, "parse_date_phrase", broken)
+    filters, query = resolve_filters("what happened in the past 3000 years")
+    assert filters.date_from is None and filters.date_to is None
+    assert query == "what happened in the past 3000 years"
+
+
+def test_explicit_dates_win_over_the_question():
+    explicit = SearchFilters(date_from=date(2020, 1, 1))
+    filters, query = resolve_filters("what happened last month", explicit)
+    assert filters.date_from == date(2020, 1, 1) and filters.date_to is None
+    assert query == "what happened last month"
@@ -0,0 +1,63 @@
+from datetime import date
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from backend.db.crud import (
+    DuplicateEntryError, add_entries, add_entry, find_duplicate, find_duplicate_source, record_source_hash,
+)
+from backend.db.models import JournalEntry
+
+
+def test_same_text_on_another_day_is_kept(db):
+    first = add_entry(db, "a new one", "2024-03-01")
+    second = add_entry(db, "A new   ONE", "2024-03-02")
+
+    assert first.id != second.id
+    assert first.content_hash == second.content_hash
+    assert find_duplicate(db, "a new one", date(2024, 3, 2)).id == second.id
+    assert find_duplicate(db, "a new one", date(2024, 3, 3)) is None
+
+
+def test_same_text_on_the_same_day_is_a_duplicate(db):
+    first = add_entry(db, "a new one", "2024-03-01")
+
+    with pytest.raises(DuplicateEntryError) as error:
+        add_entry(db, "A new ONE", "2024-03-01")
+    assert error.value.entry_id == first.id
+
+
+def test_add_entries_skips_per_day(db):
+    add_entry(db, "walked to the lake", "2024-03-01")
+
+    inserted = add_entries(db, [
+        {"text": "Walked to the lake", "date": "2024-03-01"},   # already stored
+        {"text": "walked to the lake", "date": "2024-03-02"},   # new day
+        {"text": "walked to the lake ", "date": "2024-03-02"},  # repeated within the batch
+    ])
+
+    assert [entry.date for entry in inserted] == [date(2024, 3, 2)]
+    assert db.query(JournalEntry).count() == 2
+
+
+def test_unique_index_is_on_date_and_hash(db):
+    db.add(JournalEntry(date=date(2024, 3, 1), text="same words"))
+    db.add(JournalEntry(date=date(2024, 3, 2), text="same words"))
+    db.commit()
+
+    db.add(JournalEntry(date=date(2024, 3, 1), text="Same  words"))
+    with pytest.raises(IntegrityError):
+        db.commit()
+
+
+def test_source_hash_short_circuits_reuploads(db):
+    add_entry(db, "cleaned from json", "2024-03-01")
+    cleaned = add_entries(db, [{"text": "cleaned text", "date": "2024-03-01", "source_hash": "f" * 64}])[0]
+    assert cleaned.source_hash == "f" * 64
+
+    # Raw text whose cleaned version was a duplicate is still remembered, once
+    existing = find_duplicate(db, "cleaned from json", date(2024, 3, 1))
+    record_source_hash(db, existing, '{"txt": "raw object"}')
+    record_source_hash(db, existing, "another raw text")
+    assert find_duplicate_source(db, '{"txt": "raw object"}').id == existing.id
+    assert find_duplicate_source(db, "another raw text") is None
@@ -0,0 +1,52 @@
+from datetime import date
+
+from backend.db.fts import build_match_query, search_fts
+from backend.db.models import JournalEntry
+from backend.search.filters import SearchFilters
+from backend.search.hybrid import reciprocal_rank_fusion
+
+
+def _add(db, text, mood="", source="text", day=date(2024, 3, 1)):
+    entry = JournalEntry(date=day, text=text, mood_label=mood, source_type=source)
+    db.add(entry)
+    db.commit()
+    return entry.id
+
+
+def test_mood_and_source_filters_ignore_case(db):
+    happy = _add(db, "picnic in the park", mood="Happy", source="Audio")
+    _add(db, "picnic in the rain", mood="sad")
+
+    filters = SearchFilters(moods=["HAPPY "], sources=["audio"])
+    assert [entry_id for entry_id, _ in search_fts(db, "picnic", filters=filters)] == [happy]
+    assert SearchFilters(moods=["happy"]).matches({"mood": "Happy"})
+
+
+def test_match_query_quotes_each_word_once():
+    assert build_match_query("Walked the dog, the DOG walked!") == '"walked" OR "the" OR "dog"'
+    assert build_match_query('NEAR(a b) OR text:"x"') == '"near" OR "a" OR "b" OR "or" OR "text" OR "x"'
+    assert build_match_query("?!") == ""
+
+
+def test_fts_ranks_more_matching_entries_first(db):
+    both = _add(db, "long walk with the dog by the lake")
+    one = _add(db, "quiet evening by the lake")
+    _add(db, "nothing relevant here")
+
+    assert [entry_id for entry_id, _ in search_fts(db, "dog lake")] == [both, one]
+    assert search_fts(db, "AND") == []  # an operator word is just a word once quoted
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = reciprocal_rank_fusion({"vector": [1, 2, 3], "lexical": [3, 4, 1]}, k=60)
+
+    assert [entry_id for entry_id, _ in fused] == [1, 3, 2, 4]
+    assert fused[0][1] == 1 / 61 + 1 / 63
+
+
+def test_rrf_weights_and_ties():
+    # Equal scores fall back to the lower id
+    assert [entry_id for entry_id, _ in reciprocal_rank_fusion({"a": [5], "b": [2]})] == [2, 5]
+    # A zero weight switches a ranking off
+    fused = reciprocal_rank_fusion({"vector": [1, 2], "lexical": [2]}, weights={"lexical": 0})
+    assert [entry_id for entry_id, _ in fused] == [1, 2]
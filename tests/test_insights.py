@@ -0,0 +1,30 @@
+from datetime import date
+
+from backend.db.crud import add_entry, get_insight_counts
+
+
+def test_weeks_follow_iso_calendar(db):
+    # 2024-12-30 and 2025-01-01 are both in ISO week 2025-W01; 2024-12-29 is in 2024-W52
+    for i, day in enumerate(["2024-12-29", "2024-12-30", "2025-01-01", "2025-01-01", "2025-01-06"]):
+        add_entry(db, f"entry number {i}", day)
+
+    counts = get_insight_counts(db)
+
+    assert counts["weekly"] == {"2024-W52": 1, "2025-W01": 3, "2025-W02": 1}
+    assert counts["daily"][2] == (date(2025, 1, 1), 2)
+    assert counts["total_entries"] == 5
+
+
+def test_counts_respect_the_date_range(db):
+    add_entry(db, "before", "2024-03-01", mood_label="Happy", tags="work")
+    add_entry(db, "inside one", "2024-03-05", mood_label="happy ", tags="work, family")
+    add_entry(db, "inside two", "2024-03-06", mood_label="sad", tags="work")
+
+    counts = get_insight_counts(db, date_from=date(2024, 3, 2), date_to=date(2024, 3, 31))
+
+    assert counts["total_entries"] == 2
+    assert counts["total_words"] == 4
+    assert counts["weekly"] == {"2024-W10": 2}
+    assert sorted(counts["moods"]) == [("happy", 1), ("sad", 1)]
+    assert counts["tags"][0] == ("work", 2)
+
@@ -0,0 +1,43 @@
+import numpy as np
+
+from backend.search.mmr import mmr_order, normalize_relevance
+
+RRF_K = 60
+
+
+def _unit(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _candidates():
+    """Twelve RRF-ranked hits: 0-4 on the question's topic, 2 a near-copy of 0, 5-11 unrelated outliers."""
+    dim = 16
+    basis = np.eye(dim, dtype=np.float32)
+    vectors = [basis[0]]
+    for i in range(1, 5):
+        vectors.append(0.6 * basis[0] + 0.8 * basis[i])    # moderately similar to hit 0
+    vectors[2] = 0.98 * basis[0] + 0.2 * basis[2]         # near-duplicate of hit 0
+    for i in range(5, 12):
+        vectors.append(basis[i])                          # orthogonal to everything
+    scores = [1 / (RRF_K + rank + 1) for rank in range(12)]
+    return np.asarray(scores), _unit(vectors)
+
+
+def test_normalize_relevance_spans_unit_interval():
+    relevance = normalize_relevance([1 / 61, 1 / 65, 1 / 72])
+    assert relevance[0] == 1.0 and relevance[-1] == 0.0
+    assert np.all(normalize_relevance([0.5, 0.5]) == 1.0)
+
+
+def test_high_rank_similar_hit_stays_above_low_rank_outliers():
+    scores, vectors = _candidates()
+    order = mmr_order(normalize_relevance(scores), vectors, lambda_=0.7, limit=6)
+    assert order[0] == 0
+    assert order.index(1) < min(order.index(i) for i in range(5, 12) if i in order)
+
+
+def test_near_duplicate_is_pushed_down():
+    scores, vectors = _candidates()
+    order = mmr_order(normalize_relevance(scores), vectors, lambda_=0.7)
+    assert order.index(2) > order.index(5)
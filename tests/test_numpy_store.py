@@ -0,0 +1,115 @@
+from datetime import date
+
+import numpy as np
+
+from backend.search.filters import SearchFilters
+from backend.vectorstore import numpy_store
+from backend.vectorstore.numpy_store import NumpyVectorStore
+
+DIM = 8
+
+
+def _vector(i):
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[i % DIM] = 1.0
+    return vector.tolist()
+
+
+def _point(entry_id, chunk_index=0, **payload):
+    payload = {
+        "entry_id": entry_id,
+        "chunk_index": chunk_index,
+        "date": "2024-03-01",
+        "mood": "happy",
+        "source": "text",
+        "tags": [],
+        **payload,
+    }
+    return {"id": f"{entry_id}:{chunk_index}", "vector": _vector(entry_id), "payload": payload}
+
+
+def _ids(hits):
+    return sorted(hit.payload["entry_id"] for hit in hits)
+
+
+def test_add_and_search(tmp_path):
+    store = NumpyVectorStore(str(tmp_path), dim=DIM)
+    store.batch_add_entries([_point(i) for i in range(4)])
+
+    hits = store.search(_vector(2), top_k=1)
+    assert hits[0].payload["entry_id"] == 2
+    assert hits[0].score > 0.99
+
+
+def test_same_id_overwrites(tmp_path):
+    store = NumpyVectorStore(str(tmp_path), dim=DIM)
+    store.batch_add_entries([_point(1, mood="sad")])
+    store.batch_add_entries([_point(1, mood="happy")])
+
+    assert store._count == 1
+    assert _ids(store.search(_vector(1), top_k=5, filters=SearchFilters(moods=["happy"]))) == [1]
+    assert store.search(_vector(1), top_k=5, filters=SearchFilters(moods=["sad"])) == []
+
+
+def test_delete_stale_chunks(tmp_path):
+    store = NumpyVectorStore(str(tmp_path), dim=DIM)
+    store.batch_add_entries([_point(1, 0), _point(1, 1), _point(2, 0)])
+
+    store.delete_stale_chunks({1: 1, 2: 0})
+
+    hits = store.search(_vector(1), top_k=10)
+    assert sorted(hit.id for hit in hits) == ["1:0"]
+
+
+def test_filters_match_search_filters_semantics(tmp_path):
+    store = NumpyVectorStore(str(tmp_path), dim=DIM)
+    points = [
+        _point(1, date="2024-01-10", mood="happy", source="text", tags=["work"]),
+        _point(2, date="2024-02-10", mood="sad", source="audio", tags=["family", "work"]),
+        _point(3, date="2024-03-10", mood="calm", source="image", tags="travel, family"),
+        _point(4, date="", mood="", source="", tags=[]),
+    ]
+    store.batch_add_entries(points)
+    filter_sets = [
+        SearchFilters(date_from=date(2024, 2, 1)),
+        SearchFilters(date_to=date(2024, 2, 10)),
+        SearchFilters(moods=["Happy", "CALM"]),
+        SearchFilters(sources=["audio"]),
+        SearchFilters(tags=["Family"]),
+        SearchFilters(tags=["work"], date_from=date(2024, 2, 1)),
+        SearchFilters(moods=["unknown"]),
+    ]
+
+    for filters in filter_sets:
+        expected = sorted(p["payload"]["entry_id"] for p in points if filters.matches(p["payload"]))
+        assert _ids(store.search(_vector(0), top_k=10, filters=filters)) == expected, filters
+
+
+def test_reload_from_disk(tmp_path):
+    store = NumpyVectorStore(str(tmp_path), dim=DIM)
+    store.batch_add_entries([_point(1, tags=["work"]), _point(2), _point(3)])
+    store.batch_add_entries([_point(2, mood="sad")])
+    store.delete_stale_chunks({3: 0})
+    store.close()
+
+    reloaded = NumpyVectorStore(str(tmp_path), dim=DIM)
+    assert _ids(reloaded.search(_vector(0), top_k=10)) == [1, 2]
+    assert _ids(reloaded.search(_vector(0), top_k=10, filters=SearchFilters(moods=["sad"]))) == [2]
+    assert _ids(reloaded.search(_vector(0), top_k=10, filters=SearchFilters(tags=["work"]))) == [1]
+
+
+def test_deleted_rows_are_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr(numpy_store, "_INITIAL_CAPACITY", 4)
+    store = NumpyVectorStore(str(tmp_path), dim=DIM)
+    store.batch_add_entries([_point(i, tags=["t"]) for i in range(10)])
+
+    store.delete_stale_chunks({i: 0 for i in range(6)})
+
+    assert store._count == 4
+    assert _ids(store.search(_vector(0), top_k=10, filters=SearchFilters(tags=["t"]))) == [6, 7, 8, 9]
+    assert sorted(path.name for path in tmp_path.glob("vectors*.npy")) == [store._matrix_path.name]
+
+    store.batch_add_entries([_point(20)])
+    reloaded = NumpyVectorStore(str(tmp_path), dim=DIM)
+    assert reloaded._count == 5
+    assert _ids(reloaded.search(_vector(0), top_k=10)) == [6, 7, 8, 9, 20]
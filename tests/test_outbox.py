@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from backend.db.crud import add_entry
+from backend.db.models import EmbeddingOutbox
+from backend.jobs import embedding_indexer as indexer_module
+from backend.jobs.embedding_indexer import INDEXER_MAX_ATTEMPTS, EmbeddingIndexer
+
+
+class FakeIndexer(EmbeddingIndexer):
+    """Records what would be sent to the vector store; entries in `broken` always fail."""
+
+    def __init__(self, broken=(), down=False):
+        super().__init__(batch_size=10)
+        self.broken, self.down = set(broken), down
+        self.upserted, self.deleted = [], []
+
+    async def _sync(self, entries, deleted_ids):
+        if self.down or any(entry.id in self.broken for entry in entries):
+            raise RuntimeError("vector store said no")
+        self.upserted += [entry.id for entry in entries]
+        self.deleted += list(deleted_ids)
+
+
+@pytest.fixture
+def outbox_db(db, monkeypatch):
+    monkeypatch.setattr(indexer_module, "SessionLocal", sessionmaker(bind=db.get_bind(), autoflush=False))
+    monkeypatch.setattr(indexer_module, "reindex_state", lambda: None)
+    return db
+
+
+def _outbox(db):
+    db.expire_all()
+    return {row.entry_id: row.attempts for row in db.query(EmbeddingOutbox).all()}
+
+
+def test_drain_syncs_latest_state_and_empties_outbox(outbox_db):
+    kept = add_entry(outbox_db, "kept entry", "2024-03-01")
+    gone = add_entry(outbox_db, "deleted entry", "2024-03-02")
+    gone_id = gone.id
+    outbox_db.delete(gone)
+    outbox_db.commit()
+    indexer = FakeIndexer()
+
+    assert asyncio.run(indexer.drain()) == 2
+    assert indexer.upserted == [kept.id]
+    assert indexer.deleted == [gone_id]
+    assert _outbox(outbox_db) == {}
+
+
+def test_failing_entry_is_dead_lettered_after_max_attempts(outbox_db):
+    good = add_entry(outbox_db, "fine entry", "2024-03-01")
+    bad = add_entry(outbox_db, "poison entry", "2024-03-02")
+    indexer = FakeIndexer(broken={bad.id})
+
+    assert asyncio.run(indexer._drain_batch()) == 1
+    assert indexer.upserted == [good.id]
+    assert _outbox(outbox_db) == {bad.id: 1}
+
+    # Alone in the batch nothing else succeeds, which the indexer reads as an outage: no attempt counted
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            asyncio.run(indexer._drain_batch())
+    assert _outbox(outbox_db) == {bad.id: 1}
+
+    for i in range(INDEXER_MAX_ATTEMPTS - 1):
+        add_entry(outbox_db, f"another fine entry {i}", "2024-03-03")
+        assert asyncio.run(indexer._drain_batch()) == 1
+    assert _outbox(outbox_db) == {bad.id: INDEXER_MAX_ATTEMPTS}
+    assert indexer.status()["dead"] == 1
+
+    # Dead rows are skipped until requeued
+    assert asyncio.run(indexer.drain()) == 0
+    assert indexer.requeue_dead() == 1
+    indexer.broken.clear()
+    assert asyncio.run(indexer.drain()) == 1
+    assert _outbox(outbox_db) == {}
+
+
+def test_outage_keeps_rows_without_counting_attempts(outbox_db):
+    add_entry(outbox_db, "first", "2024-03-01")
+    add_entry(outbox_db, "second", "2024-03-02")
+    indexer = FakeIndexer(down=True)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(indexer.drain())
+
+    assert sorted(_outbox(outbox_db).values()) == [0, 0]
+    assert indexer.status()["pending"] == 2
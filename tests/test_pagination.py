@@ -0,0 +1,63 @@
+from datetime import date
+
+import pytest
+
+from backend.db.crud import add_entry, decode_cursor, encode_cursor, get_entries_page
+
+
+def _seed(db):
+    # Several entries share a date so the id tie-breaker matters
+    days = ["2024-03-02", "2024-03-01", "2024-03-02", "2024-03-03", "2024-03-01", "2024-03-02", "2024-03-04"]
+    return [add_entry(db, f"entry number {i}", day) for i, day in enumerate(days)]
+
+
+def _walk(db, limit, **kwargs):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = get_entries_page(db, limit=limit, cursor=cursor, **kwargs)
+        pages.append([row.id for row in rows])
+        if cursor is None:
+            return pages
+
+
+def test_pages_follow_date_then_id(db):
+    entries = _seed(db)
+    expected = [entry.id for entry in sorted(entries, key=lambda entry: (entry.date, entry.id))]
+
+    pages = _walk(db, limit=2)
+
+    assert [entry_id for page in pages for entry_id in page] == expected
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+
+
+def test_descending_is_the_reverse(db):
+    entries = _seed(db)
+    expected = [entry.id for entry in sorted(entries, key=lambda entry: (entry.date, entry.id), reverse=True)]
+
+    pages = _walk(db, limit=3, descending=True)
+
+    assert [entry_id for page in pages for entry_id in page] == expected
+
+
+def test_exact_multiple_ends_without_an_empty_page(db):
+    _seed(db)
+    rows, cursor = get_entries_page(db, limit=7)
+    assert len(rows) == 7 and cursor is None
+
+    pages = _walk(db, limit=7)
+    assert len(pages) == 1
+
+
+def test_date_range_and_summary_rows(db):
+    _seed(db)
+    rows, cursor = get_entries_page(db, limit=10, date_from=date(2024, 3, 2), date_to=date(2024, 3, 3), summary=True)
+
+    assert cursor is None
+    assert [row.date for row in rows] == [date(2024, 3, 2)] * 3 + [date(2024, 3, 3)]
+    assert rows[0].preview.startswith("entry number")
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor(date(2024, 3, 2), 17)) == (date(2024, 3, 2), 17)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
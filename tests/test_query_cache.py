@@ -0,0 +1,54 @@
+from backend.utils.query_cache import QueryEmbeddingCache, normalize_query
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return [float(len(self.calls))]
+
+
+def test_repeat_and_near_repeat_queries_hit():
+    cache, encode = QueryEmbeddingCache(max_entries=8), CountingEncoder()
+
+    first = cache.get_or_compute("minilm", "torch", "Why was I tired?", encode)
+    again = cache.get_or_compute("minilm", "torch", "  why WAS i tired ", encode)
+
+    assert first == again == [1.0]
+    assert encode.calls == ["Why was I tired?"]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert normalize_query("Why was I tired?!") == normalize_query("why was i tired")
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryEmbeddingCache(max_entries=2)
+    cache.set("minilm", "torch", "a", [1.0])
+    cache.set("minilm", "torch", "b", [2.0])
+    cache.get("minilm", "torch", "a")       # a is now the most recent
+    cache.set("minilm", "torch", "c", [3.0])
+
+    assert cache.get("minilm", "torch", "b") is None
+    assert cache.get("minilm", "torch", "a") == [1.0]
+    assert cache.get("minilm", "torch", "c") == [3.0]
+    assert cache.stats()["entries"] == 2
+
+
+def test_model_and_backend_are_part_of_the_key():
+    cache, encode = QueryEmbeddingCache(), CountingEncoder()
+    for model, backend in [("minilm", "torch"), ("minilm", "onnx-int8"), ("mpnet", "torch")]:
+        cache.get_or_compute(model, backend, "same question", encode)
+
+    assert len(encode.calls) == 3
+
+
+def test_returned_vectors_are_copies_and_size_zero_disables():
+    cache = QueryEmbeddingCache()
+    cache.set("minilm", "torch", "q", [1.0])
+    cache.get("minilm", "torch", "q").append(2.0)
+    assert cache.get("minilm", "torch", "q") == [1.0]
+
+    disabled = QueryEmbeddingCache(max_entries=0)
+    disabled.set("minilm", "torch", "q", [1.0])
+    assert disabled.get("minilm", "torch", "q") is None
@@ -0,0 +1,59 @@
+import uuid
+from datetime import date
+from types import SimpleNamespace
+
+from backend.utils.splitter import split_text_with_offsets
+from backend.vectorstore.indexer import POINT_NAMESPACE, chunk_entry, chunk_point_id
+
+
+def _text(count):
+    # Words shorter than four characters each count as one token
+    return "  ".join(f"w{i}" for i in range(count))
+
+
+def test_chunks_respect_the_budget_and_overlap():
+    text = _text(25)
+    chunks = split_text_with_offsets(text, max_tokens=10, overlap_tokens=3)
+
+    words = [chunk.split() for _, chunk in chunks]
+    assert [len(chunk) for chunk in words] == [10, 10, 10, 4]
+    assert words[0][-3:] == words[1][:3]
+    assert words[-1][-1] == "w24"
+
+
+def test_offsets_point_into_the_original_text():
+    text = "  Morning run.\n\nThen   coffee with Sam, then work. " * 3
+    for offset, chunk in split_text_with_offsets(text, max_tokens=6, overlap_tokens=2):
+        assert text[offset:offset + len(chunk)] == chunk
+        assert chunk == chunk.strip()
+
+
+def test_edge_cases():
+    assert split_text_with_offsets("   ") == []
+    assert split_text_with_offsets("short entry") == [(0, "short entry")]
+    # A word over the budget becomes its own chunk instead of looping forever
+    long_word = "x" * 100
+    chunks = split_text_with_offsets(f"a {long_word} b", max_tokens=5, overlap_tokens=2)
+    assert [chunk for _, chunk in chunks] == ["a", long_word, "b"]
+
+
+def test_point_ids_are_stable_uuid5():
+    point_id = chunk_point_id(42, 3)
+    assert point_id == str(uuid.uuid5(POINT_NAMESPACE, "42:3"))
+    assert uuid.UUID(point_id).version == 5
+    assert point_id != chunk_point_id(42, 4) != chunk_point_id(43, 3)
+
+
+def test_chunk_entry_payloads():
+    entry = SimpleNamespace(
+        id=7, date=date(2024, 3, 1), text=_text(300), source_type="Audio", tags="Work, family", mood_label="Happy"
+    )
+    chunks = chunk_entry(entry)
+
+    assert len(chunks) > 1
+    assert [chunk["id"] for chunk in chunks] == [chunk_point_id(7, i) for i in range(len(chunks))]
+    payload = chunks[1]["payload"]
+    assert payload["entry_id"] == 7 and payload["chunk_index"] == 1
+    assert payload["date"] == "2024-03-01"
+    assert (payload["source"], payload["mood"], payload["tags"]) == ("audio", "happy", ["work", "family"])
+    assert entry.text[payload["offset"]:].startswith(payload["text"])
@@ -0,0 +1,35 @@
+from backend.db.crud import add_entry, filter_entries_by_tags, list_tag_names
+
+
+def _seed(db):
+    return {
+        "work": add_entry(db, "long day at the office", "2024-03-01", tags="Work"),
+        "both": add_entry(db, "dinner with the team", "2024-03-02", tags="work, family"),
+        "family": add_entry(db, "sunday lunch", "2024-03-03", tags="family"),
+        "none": add_entry(db, "nothing tagged", "2024-03-04"),
+    }
+
+
+def _ids(entries):
+    return [entry.id for entry in entries]
+
+
+def test_any_tag_matches_by_default(db):
+    entries = _seed(db)
+    expected = [entries["work"].id, entries["both"].id, entries["family"].id]
+    assert _ids(filter_entries_by_tags(db, ["work", "family"])) == expected
+
+
+def test_match_all_requires_every_tag(db):
+    entries = _seed(db)
+    assert _ids(filter_entries_by_tags(db, ["work", "family"], match_all=True)) == [entries["both"].id]
+    assert _ids(filter_entries_by_tags(db, ["work"], match_all=True)) == [entries["work"].id, entries["both"].id]
+
+
+def test_tag_names_are_normalized(db):
+    entries = _seed(db)
+    # Repeated and differently cased names count once, so AND still finds the entry
+    assert _ids(filter_entries_by_tags(db, ["WORK", " work", "Family"], match_all=True)) == [entries["both"].id]
+    assert filter_entries_by_tags(db, ["unknown"]) == []
+    assert filter_entries_by_tags(db, [" ", ""]) == []
+    assert list_tag_names(db) == ["family", "work"]
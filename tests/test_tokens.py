@@ -0,0 +1,18 @@
+from backend.utils import tokens
+from backend.utils.tokens import count_tokens, truncate_to_tokens
+
+
+def test_without_a_chat_tokenizer_counts_are_estimated():
+    assert tokens.CONTEXT_TOKENIZER == "" and tokens.get_tokenizer() is None
+    assert count_tokens("a tiny note") == 5  # 1 + 2 + 2
+    assert count_tokens("extraordinarily") == 4
+
+
+def test_truncation_keeps_whole_words_within_budget():
+    text = "walked along the river before breakfast"
+    cut = truncate_to_tokens(text, 6)
+
+    assert text.startswith(cut) and count_tokens(cut) <= 6
+    assert cut == "walked along the"
+    assert truncate_to_tokens(text, 100) == text
+    assert truncate_to_tokens(text, 0) == ""
@@ -0,0 +1,78 @@
+"""Readers must not be blocked while ingestion is writing.
+
+A writer inserts entries in long transactions (as the importer does) while
+readers run /insights/-style aggregates against the same database file.
+"""
+import time
+import threading
+from datetime import date
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import sessionmaker
+
+from backend.db.database import create_sqlite_engine
+from backend.db.models import Base, JournalEntry
+
+WRITE_BATCHES = 10
+ROWS_PER_BATCH = 200
+HOLD_SECONDS = 0.2          # time each write transaction stays open after inserting
+READERS = 4
+MAX_READ_SECONDS = 0.5      # far below HOLD_SECONDS * WRITE_BATCHES
+
+
+def test_readers_not_blocked_by_writer(tmp_path):
+    engine = create_sqlite_engine(str(tmp_path / "wal.db"))
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+
+    writer_started = threading.Event()
+    writer_done = threading.Event()
+    read_times = []
+    errors = []
+
+    def writer():
+        try:
+            for batch in range(WRITE_BATCHES):
+                with Session() as db:
+                    db.add_all([
+                        JournalEntry(date=date(2024, 1, 1 + n % 28), text=f"batch {batch} entry {n}", mood_label="calm")
+                        for n in range(ROWS_PER_BATCH)
+                    ])
+                    db.flush()
+                    writer_started.set()
+                    time.sleep(HOLD_SECONDS)  # write lock held, transaction uncommitted
+                    db.commit()
+        except Exception as e:
+            errors.append(f"writer: {e}")
+        finally:
+            writer_started.set()
+            writer_done.set()
+
+    def reader():
+        writer_started.wait()
+        try:
+            while not writer_done.is_set():
+                with Session() as db:
+                    started = time.perf_counter()
+                    db.query(JournalEntry.date, func.count(JournalEntry.id)).group_by(JournalEntry.date).all()
+                    read_times.append(time.perf_counter() - started)
+        except Exception as e:
+            errors.append(f"reader: {e}")
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(READERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with Session() as db:
+        written = db.query(func.count(JournalEntry.id)).scalar()
+    engine.dispose()
+
+    assert not errors
+    assert written == WRITE_BATCHES * ROWS_PER_BATCH
+    assert read_times, "readers never ran while the writer held its transaction"
+    assert max(read_times) < MAX_READ_SECONDS